@@ -0,0 +1,45 @@
+# migrations/add_citation_crawls.py
+
+"""
+Citation crawler: idempotent citation edges and crawl checkpoints.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+# Revision identifiers
+revision = 'vvvv'  # Replace with a unique identifier
+down_revision = 'wwww'  # Replace with the paper search index migration identifier
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop duplicate edges, keeping the oldest row, so each citation can be inserted once
+    op.execute("""
+        DELETE FROM citations
+        WHERE id NOT IN (SELECT MIN(id) FROM citations GROUP BY paper_id, cited_paper_id)
+    """)
+    op.create_unique_constraint('uq_citations_paper_cited', 'citations', ['paper_id', 'cited_paper_id'])
+
+    # Crawl checkpoints table
+    op.create_table(
+        'citation_crawls',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('paper_id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(50), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('references_count', sa.Integer(), default=0),
+        sa.Column('attempts', sa.Integer(), default=0),
+        sa.Column('error', sa.String(500), nullable=True),
+        sa.Column('crawled_at', sa.DateTime(), default=datetime.utcnow),
+        sa.ForeignKeyConstraint(['paper_id'], ['papers.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('paper_id', 'source', name='uq_citation_crawls_paper_source')
+    )
+
+
+def downgrade():
+    op.drop_table('citation_crawls')
+    op.drop_constraint('uq_citations_paper_cited', 'citations', type_='unique')
@@ -0,0 +1,29 @@
+# migrations/add_paper_keywords_unique.py
+
+"""
+Unique paper-keyword links, so keywords can be linked with ON CONFLICT DO NOTHING.
+"""
+
+from alembic import op
+
+# Revision identifiers
+revision = 'uuuu'  # Replace with a unique identifier
+down_revision = 'vvvv'  # Replace with the citation crawls migration identifier
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The table has no primary key to keep one row by, so rebuild it from its distinct rows
+    op.execute("CREATE TABLE paper_keywords_distinct AS SELECT DISTINCT paper_id, keyword_id FROM paper_keywords")
+    op.execute("DELETE FROM paper_keywords")
+    op.execute("""
+        INSERT INTO paper_keywords (paper_id, keyword_id)
+        SELECT paper_id, keyword_id FROM paper_keywords_distinct
+    """)
+    op.execute("DROP TABLE paper_keywords_distinct")
+    op.create_unique_constraint('uq_paper_keywords_paper_keyword', 'paper_keywords', ['paper_id', 'keyword_id'])
+
+
+def downgrade():
+    op.drop_constraint('uq_paper_keywords_paper_keyword', 'paper_keywords', type_='unique')
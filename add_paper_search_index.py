@@ -0,0 +1,47 @@
+# migrations/add_paper_search_index.py
+
+"""
+Full-text index over the saved paper library (PostgreSQL).
+"""
+
+from alembic import op
+
+# Revision identifiers
+revision = 'wwww'  # Replace with a unique identifier
+down_revision = 'zzzz'  # Replace with the search result sets migration identifier
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Weighted document vector: title A, authors B, abstract C, full text D
+    op.execute("ALTER TABLE papers ADD COLUMN IF NOT EXISTS search_vector tsvector")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION papers_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            -- Full text is capped, as a tsvector can't hold more than 1MB of lexemes
+            NEW.search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(NEW.authors, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(NEW.abstract, '')), 'C') ||
+                setweight(to_tsvector('english', left(coalesce(NEW.full_text, ''), 200000)), 'D');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER papers_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, authors, abstract, full_text ON papers
+        FOR EACH ROW EXECUTE PROCEDURE papers_search_vector_update()
+    """)
+
+    # Backfill existing papers through the trigger, then index them
+    op.execute("UPDATE papers SET title = title")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_papers_search_vector ON papers USING GIN (search_vector)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_papers_search_vector")
+    op.execute("DROP TRIGGER IF EXISTS papers_search_vector_trigger ON papers")
+    op.execute("DROP FUNCTION IF EXISTS papers_search_vector_update()")
+    op.execute("ALTER TABLE papers DROP COLUMN IF EXISTS search_vector")
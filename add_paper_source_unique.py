@@ -0,0 +1,74 @@
+# migrations/add_paper_source_unique.py
+
+"""
+Unique (source_db, paper_id) for saved papers, and a case-insensitive title index for matching saves.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers
+revision = 'rrrr'  # Replace with a unique identifier
+down_revision = 'ssss'  # Replace with the result set query text migration identifier
+branch_labels = None
+depends_on = None
+
+# Columns referencing papers.id, with the other columns of any unique constraint they are part of
+PAPER_REFERENCES = [
+    ('citations', 'paper_id', ['cited_paper_id']),
+    ('citations', 'cited_paper_id', ['paper_id']),
+    ('citation_crawls', 'paper_id', ['source']),
+    ('paper_keywords', 'paper_id', ['keyword_id']),
+    ('paper_collections', 'paper_id', ['collection_id']),
+    ('search_result_items', 'paper_id', []),
+]
+
+
+def _repoint(table, column, others):
+    """Point references to duplicate papers at the kept paper, dropping any it already has."""
+    if others:
+        match = ' AND '.join(f"kept.{other} = {table}.{other}" for other in others)
+        op.execute(f"""
+            DELETE FROM {table}
+            WHERE {column} IN (SELECT duplicate_id FROM paper_duplicates)
+              AND EXISTS (
+                  SELECT 1 FROM {table} kept
+                  JOIN paper_duplicates d ON kept.{column} = d.keep_id
+                  WHERE d.duplicate_id = {table}.{column} AND {match}
+              )
+        """)
+    op.execute(f"""
+        UPDATE {table}
+        SET {column} = (SELECT keep_id FROM paper_duplicates WHERE duplicate_id = {table}.{column})
+        WHERE {column} IN (SELECT duplicate_id FROM paper_duplicates)
+    """)
+
+
+def upgrade():
+    # Concurrent saves may already have stored a source record twice; keep the oldest row of each
+    op.execute("""
+        CREATE TABLE paper_duplicates AS
+        SELECT p.id AS duplicate_id, k.keep_id
+        FROM papers p
+        JOIN (
+            SELECT source_db, paper_id, MIN(id) AS keep_id
+            FROM papers
+            WHERE paper_id <> ''
+            GROUP BY source_db, paper_id
+            HAVING COUNT(*) > 1
+        ) k ON p.source_db = k.source_db AND p.paper_id = k.paper_id
+        WHERE p.id <> k.keep_id
+    """)
+    for table, column, others in PAPER_REFERENCES:
+        _repoint(table, column, others)
+    op.execute("DELETE FROM papers WHERE id IN (SELECT duplicate_id FROM paper_duplicates)")
+    op.execute("DROP TABLE paper_duplicates")
+
+    op.create_index('uq_papers_source_paper_id', 'papers', ['source_db', 'paper_id'], unique=True,
+                    postgresql_where=sa.text("paper_id <> ''"), sqlite_where=sa.text("paper_id <> ''"))
+    op.create_index('idx_papers_title_lower', 'papers', [sa.text('lower(title)')])
+
+
+def downgrade():
+    op.drop_index('idx_papers_title_lower', table_name='papers')
+    op.drop_index('uq_papers_source_paper_id', table_name='papers')
@@ -0,0 +1,24 @@
+# migrations/add_result_set_exhausted.py
+
+"""
+Record whether stored search results hold every match.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers
+revision = 'tttt'  # Replace with a unique identifier
+down_revision = 'uuuu'  # Replace with the paper keywords unique constraint migration identifier
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing result sets are taken as incomplete, so short ones are fetched again rather than replayed
+    op.add_column('search_result_sets',
+                  sa.Column('exhausted', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    op.drop_column('search_result_sets', 'exhausted')
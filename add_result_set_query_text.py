@@ -0,0 +1,22 @@
+# migrations/add_result_set_query_text.py
+
+"""
+Keep the query text stored search results were fetched with.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers
+revision = 'ssss'  # Replace with a unique identifier
+down_revision = 'tttt'  # Replace with the result set exhausted flag migration identifier
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('search_result_sets', sa.Column('query_text', sa.String(500), nullable=True))
+
+
+def downgrade():
+    op.drop_column('search_result_sets', 'query_text')
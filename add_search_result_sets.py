@@ -0,0 +1,59 @@
+# migrations/add_search_result_sets.py
+
+"""
+Store search results against search history.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+# Revision identifiers
+revision = 'zzzz'  # Replace with a unique identifier
+down_revision = 'xxxx'  # Replace with the literature search tables migration identifier
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Search result sets table
+    op.create_table(
+        'search_result_sets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('query_key', sa.String(64), nullable=False),
+        sa.Column('query', sa.String(500), nullable=False),
+        sa.Column('source_db', sa.String(100), nullable=True),
+        sa.Column('filters', sa.Text(), nullable=True),
+        sa.Column('requested', sa.Integer(), nullable=True),
+        sa.Column('results_count', sa.Integer(), default=0),
+        sa.Column('fetched_at', sa.DateTime(), default=datetime.utcnow),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('query_key')
+    )
+    op.create_index('idx_search_result_sets_query_key', 'search_result_sets', ['query_key'])
+
+    # Search result items table
+    op.create_table(
+        'search_result_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('result_set_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('paper_id', sa.Integer(), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['result_set_id'], ['search_result_sets.id']),
+        sa.ForeignKeyConstraint(['paper_id'], ['papers.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_search_result_items_result_set_id', 'search_result_items', ['result_set_id'])
+
+    # Link search history to stored results
+    op.add_column('search_queries', sa.Column('result_set_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_search_queries_result_set_id', 'search_queries', 'search_result_sets',
+                          ['result_set_id'], ['id'])
+
+
+def downgrade():
+    op.drop_constraint('fk_search_queries_result_set_id', 'search_queries', type_='foreignkey')
+    op.drop_column('search_queries', 'result_set_id')
+    op.drop_table('search_result_items')
+    op.drop_table('search_result_sets')
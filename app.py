@@ -47,6 +47,12 @@ def create_app(config_class=Config):
     from modules.literature_search.routes import literature_bp
     app.register_blueprint(literature_bp, url_prefix='/literature')
 
+    # Keep the most popular literature searches cached ahead of demand
+    from modules.literature_search.config import LiteratureSearchConfig
+    if LiteratureSearchConfig.WARMER_ENABLED:
+        from modules.literature_search.warmer import CacheWarmer
+        CacheWarmer.from_config().start(app, LiteratureSearchConfig.WARMER_INTERVAL)
+
     # Register Settings module
     from modules.settings import init_settings_module
     init_settings_module(app)
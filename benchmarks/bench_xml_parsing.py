@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark for arXiv/PubMed response parsing.
+
+Compares the old whole-document parse (ET.fromstring followed by findall
+scans) against the incremental iterparse path used by the search clients,
+reporting time and peak memory for each. Pass recorded efetch or arXiv
+responses with --pubmed/--arxiv, or --fixtures for the small responses in
+benchmarks/fixtures; without them, synthetic responses of the requested size
+are generated.
+
+The win from iterparse is memory, not speed. Peak memory stays flat (about
+5 MiB against 140 MiB for a 3000-record efetch), while wall time is roughly
+even: iterparse is slower on small arXiv feeds (around 300 records) and only
+pulls ahead on large batches of a few thousand records.
+
+Usage:
+    python benchmarks/bench_xml_parsing.py --records 2000
+    python benchmarks/bench_xml_parsing.py --fixtures
+    python benchmarks/bench_xml_parsing.py --pubmed efetch.xml --arxiv query.xml
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.literature_search.api_clients import (ArxivClient, PubMedClient, ARXIV_NS, ATOM_ENTRY,
+                                                   PUBMED_PATHS)
+from modules.literature_search.xml_stream import iter_elements
+
+# Small efetch and arXiv responses in the upstream formats, for --fixtures
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Descendant lookups used before PUBMED_PATHS, for the path comparison
+LEGACY_PUBMED_PATHS = {
+    'title': './/ArticleTitle',
+    'abstract': './/AbstractText',
+    'author_list': './/AuthorList',
+    'journal': './/Journal/Title',
+    'pub_date': './/PubDate',
+    'article_ids': './/ArticleIdList',
+}
+
+
+def synthetic_pubmed(records):
+    """Build an efetch response with the given number of PubmedArticle records."""
+    articles = []
+    for i in range(records):
+        authors = ''.join(
+            f"<Author><LastName>Author{j}</LastName><ForeName>Name</ForeName><Initials>N</Initials></Author>"
+            for j in range(8)
+        )
+        references = ''.join(
+            f"<Reference><Citation>Reference {j}</Citation><ArticleIdList>"
+            f"<ArticleId IdType=\"pubmed\">{i * 100 + j}</ArticleId></ArticleIdList></Reference>"
+            for j in range(30)
+        )
+        articles.append(
+            f"<PubmedArticle><MedlineCitation><PMID>{i}</PMID><Article>"
+            f"<Journal><JournalIssue><PubDate><Year>2020</Year><Month>Mar</Month><Day>1</Day></PubDate>"
+            f"</JournalIssue><Title>Journal of Benchmarks</Title></Journal>"
+            f"<ArticleTitle>Synthetic article {i}</ArticleTitle>"
+            f"<Abstract><AbstractText Label=\"BACKGROUND\">{'Background text. ' * 20}</AbstractText>"
+            f"<AbstractText Label=\"RESULTS\">{'Results text. ' * 20}</AbstractText></Abstract>"
+            f"<AuthorList>{authors}</AuthorList></Article>"
+            f"<MeshHeadingList>{'<MeshHeading><DescriptorName>Term</DescriptorName></MeshHeading>' * 15}"
+            f"</MeshHeadingList></MedlineCitation>"
+            f"<PubmedData><ArticleIdList><ArticleId IdType=\"pubmed\">{i}</ArticleId>"
+            f"<ArticleId IdType=\"doi\">10.1000/bench.{i}</ArticleId></ArticleIdList>"
+            f"<ReferenceList>{references}</ReferenceList></PubmedData></PubmedArticle>"
+        )
+    return f"<?xml version=\"1.0\"?><PubmedArticleSet>{''.join(articles)}</PubmedArticleSet>".encode()
+
+
+def synthetic_arxiv(records):
+    """Build an arXiv Atom feed with the given number of entries."""
+    entries = []
+    for i in range(records):
+        authors = ''.join(f"<author><name>Author {j}</name></author>" for j in range(6))
+        entries.append(
+            f"<entry><id>http://arxiv.org/abs/2001.{i:05d}v1</id>"
+            f"<published>2020-01-01T00:00:00Z</published>"
+            f"<title>Synthetic preprint {i}</title><summary>{'Summary text. ' * 40}</summary>{authors}"
+            f"<link rel=\"alternate\" href=\"http://arxiv.org/abs/2001.{i:05d}v1\"/>"
+            f"<arxiv:id>2001.{i:05d}</arxiv:id><arxiv:category term=\"cs.LG\"/></entry>"
+        )
+    return (
+        "<?xml version=\"1.0\"?><feed xmlns=\"http://www.w3.org/2005/Atom\" "
+        f"xmlns:arxiv=\"http://arxiv.org/schemas/atom\">{''.join(entries)}</feed>"
+    ).encode()
+
+
+def measure(label, func, repeat):
+    """Run func repeat times, printing the best wall time and the peak traced memory."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"  {label:<32} {best * 1000:9.1f} ms  {peak / 1024 / 1024:8.1f} MiB peak  ({count} records)")
+    return best
+
+
+def bench_pubmed(body, repeat):
+    client = PubMedClient.__new__(PubMedClient)
+
+    def whole_document():
+        root = ET.fromstring(body)
+        return len([client.format_paper(article) for article in root.findall('.//PubmedArticle')])
+
+    def streaming():
+        return len([client.format_paper(article) for article in iter_elements(io.BytesIO(body), 'PubmedArticle')])
+
+    print(f"PubMed efetch ({len(body) / 1024 / 1024:.1f} MiB)")
+    old = measure("fromstring + findall", whole_document, repeat)
+    new = measure("iterparse + direct paths", streaming, repeat)
+    print(f"  speedup: {old / new:.2f}x")
+
+    # Field lookups alone, on one parsed record, called the way format_paper calls them
+    article = next(iter(ET.fromstring(body).findall('PubmedArticle')), None)
+    if article is not None:
+        for name in PUBMED_PATHS:
+            method = article.findall if name == 'abstract' else article.find
+            legacy = min(_time_lookup(method, LEGACY_PUBMED_PATHS[name]) for _ in range(repeat))
+            direct = min(_time_lookup(method, PUBMED_PATHS[name]) for _ in range(repeat))
+            print(f"  lookup {name:<12} {legacy * 1e6:7.2f} us -> {direct * 1e6:7.2f} us")
+
+
+def _time_lookup(method, path, iterations=2000):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        method(path)
+    return (time.perf_counter() - start) / iterations
+
+
+def bench_arxiv(body, repeat):
+    client = ArxivClient.__new__(ArxivClient)
+
+    def whole_document():
+        root = ET.fromstring(body)
+        return len([client.format_paper(entry, ARXIV_NS) for entry in root.findall('.//atom:entry', ARXIV_NS)])
+
+    def streaming():
+        return len([client.format_paper(entry, ARXIV_NS) for entry in iter_elements(io.BytesIO(body), ATOM_ENTRY)])
+
+    print(f"arXiv query ({len(body) / 1024 / 1024:.1f} MiB)")
+    old = measure("fromstring + findall", whole_document, repeat)
+    new = measure("iterparse", streaming, repeat)
+    print(f"  speedup: {old / new:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark literature search XML parsing')
+    parser.add_argument('--pubmed', help='Recorded efetch XML response')
+    parser.add_argument('--arxiv', help='Recorded arXiv query XML response')
+    parser.add_argument('--fixtures', action='store_true', help='Use the responses in benchmarks/fixtures')
+    parser.add_argument('--records', type=int, default=1000, help='Records per synthetic response')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per parser (best is reported)')
+    args = parser.parse_args()
+    if args.fixtures:
+        args.pubmed = args.pubmed or os.path.join(FIXTURE_DIR, 'efetch_pubmed.xml')
+        args.arxiv = args.arxiv or os.path.join(FIXTURE_DIR, 'arxiv_query.xml')
+
+    if args.pubmed:
+        with open(args.pubmed, 'rb') as f:
+            pubmed_body = f.read()
+    else:
+        pubmed_body = synthetic_pubmed(args.records)
+
+    if args.arxiv:
+        with open(args.arxiv, 'rb') as f:
+            arxiv_body = f.read()
+    else:
+        arxiv_body = synthetic_arxiv(args.records)
+
+    bench_pubmed(pubmed_body, args.repeat)
+    bench_arxiv(arxiv_body, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
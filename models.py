@@ -1,6 +1,7 @@
 import datetime
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, func, Table
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, func, Table, UniqueConstraint, \
+    DDL, event, Index, text
 from sqlalchemy.orm import relationship
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -186,6 +187,11 @@ class CollaborationSession(db.Model):
 class Paper(db.Model):
     """Model for scientific papers."""
     __tablename__ = 'papers'
+    __table_args__ = (
+        # One row per source record, so concurrent saves can't insert the same paper twice
+        Index('uq_papers_source_paper_id', 'source_db', 'paper_id', unique=True,
+              postgresql_where=text("paper_id <> ''"), sqlite_where=text("paper_id <> ''")),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String(500), nullable=False)
@@ -215,9 +221,44 @@ class Paper(db.Model):
         return f"<Paper {self.title[:30]}...>"
 
 
+# Saved papers without a DOI or source ID match are looked up by title, case-insensitively
+Index('idx_papers_title_lower', func.lower(Paper.title))
+
+
+# Full-text index over the library (PostgreSQL only). The search_vector column isn't
+# mapped: a trigger keeps it in step with the text columns, and only searches read it.
+PAPER_SEARCH_DDL = [
+    "ALTER TABLE papers ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE INDEX IF NOT EXISTS idx_papers_search_vector ON papers USING GIN (search_vector)",
+    """
+    CREATE OR REPLACE FUNCTION papers_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        -- Full text is capped, as a tsvector can't hold more than 1MB of lexemes
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.authors, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.abstract, '')), 'C') ||
+            setweight(to_tsvector('english', left(coalesce(NEW.full_text, ''), 200000)), 'D');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS papers_search_vector_trigger ON papers",
+    """
+    CREATE TRIGGER papers_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, authors, abstract, full_text ON papers
+    FOR EACH ROW EXECUTE PROCEDURE papers_search_vector_update()
+    """,
+]
+
+for statement in PAPER_SEARCH_DDL:
+    event.listen(Paper.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+
 class Citation(db.Model):
     """Model for paper citations."""
     __tablename__ = 'citations'
+    __table_args__ = (UniqueConstraint('paper_id', 'cited_paper_id', name='uq_citations_paper_cited'),)
 
     id = Column(Integer, primary_key=True)
     paper_id = Column(Integer, ForeignKey('papers.id'))
@@ -228,6 +269,24 @@ class Citation(db.Model):
     cited_paper = relationship('Paper', foreign_keys=[cited_paper_id], back_populates='cited_by')
 
 
+class CitationCrawl(db.Model):
+    """Model for the outcome of fetching a paper's references, so citation crawls can resume."""
+    __tablename__ = 'citation_crawls'
+    __table_args__ = (UniqueConstraint('paper_id', 'source', name='uq_citation_crawls_paper_source'),)
+
+    id = Column(Integer, primary_key=True)
+    paper_id = Column(Integer, ForeignKey('papers.id'), nullable=False)
+    source = Column(String(50), nullable=False)  # Metadata source the references were fetched from
+    status = Column(String(20), nullable=False)  # 'done', 'not_found' or 'error'
+    references_count = Column(Integer, default=0)
+    attempts = Column(Integer, default=0)
+    error = Column(String(500))
+    crawled_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CitationCrawl {self.paper_id} {self.status}>"
+
+
 class Keyword(db.Model):
     """Model for paper keywords."""
     __tablename__ = 'keywords'
@@ -242,7 +301,8 @@ class Keyword(db.Model):
 # Association table for papers and keywords
 paper_keywords = Table('paper_keywords', db.metadata,
                        Column('paper_id', Integer, ForeignKey('papers.id')),
-                       Column('keyword_id', Integer, ForeignKey('keywords.id'))
+                       Column('keyword_id', Integer, ForeignKey('keywords.id')),
+                       UniqueConstraint('paper_id', 'keyword_id', name='uq_paper_keywords_paper_keyword')
                        )
 
 
@@ -282,9 +342,11 @@ class SearchQuery(db.Model):
     user_id = Column(Integer, ForeignKey('users.id'))
     source_db = Column(String(100))  # 'all', 'arxiv', 'pubmed', etc.
     results_count = Column(Integer, default=0)
+    result_set_id = Column(Integer, ForeignKey('search_result_sets.id'), nullable=True)  # Stored results, if kept
 
     # Relationship
     user = relationship('User')
+    result_set = relationship('SearchResultSet')
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -292,6 +354,40 @@ class SearchQuery(db.Model):
     def __repr__(self):
         return f"<SearchQuery {self.query}>"
 
+
+class SearchResultSet(db.Model):
+    """Model for the stored results of a normalized search, shared by every search history entry for it."""
+    __tablename__ = 'search_result_sets'
+
+    id = Column(Integer, primary_key=True)
+    query_key = Column(String(64), index=True, unique=True, nullable=False)  # Hash of query, source and filters
+    query = Column(String(500), nullable=False)  # Canonical form of the query
+    query_text = Column(String(500))  # Query as entered for the search that produced the stored results
+    source_db = Column(String(100))
+    filters = Column(JSONType)
+    requested = Column(Integer)  # Number of results asked for when the results were fetched
+    results_count = Column(Integer, default=0)
+    exhausted = Column(Boolean, default=False)  # Whether every source answered with all of its matches
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationship
+    items = relationship('SearchResultItem', order_by='SearchResultItem.position',
+                         cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f"<SearchResultSet {self.query}>"
+
+
+class SearchResultItem(db.Model):
+    """Model for one ranked result of a stored search."""
+    __tablename__ = 'search_result_items'
+
+    id = Column(Integer, primary_key=True)
+    result_set_id = Column(Integer, ForeignKey('search_result_sets.id'), index=True, nullable=False)
+    position = Column(Integer, nullable=False)
+    paper_id = Column(Integer, ForeignKey('papers.id'), nullable=True)  # Set if the paper has been saved
+    payload = Column(JSONType)  # Paper dictionary as returned by the search
+
 from datetime import datetime
 
 # Add these classes to your models.py file
@@ -4,12 +4,42 @@ import urllib.parse
 import xml.etree.ElementTree as ET
 from datetime import datetime
 import json
+import threading
 import time
-from typing import List, Dict, Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed, TimeoutError as FuturesTimeoutError
+from typing import List, Dict, Any, Optional, Union, Iterable, Iterator, Tuple, Callable
 
 # Add these imports at the top
 from modules.literature_search.cache import APICache
+from modules.literature_search.circuit_breaker import CircuitBreaker, CircuitOpenError
 from modules.literature_search.config import LiteratureSearchConfig
+from modules.literature_search.dedup import deduplicate_papers
+from modules.literature_search.filters import SearchFilter
+from modules.literature_search.http_pool import get_session, retry_delay
+from modules.literature_search.ranking import BM25Ranker, source_order_prior
+from modules.literature_search.query_canonical import canonical_query
+from modules.literature_search.rate_limiter import ncbi_bucket
+from modules.literature_search.singleflight import SingleFlight
+from modules.literature_search.xml_stream import iter_response_elements
+
+# Shared worker pool used to query several sources at the same time
+_search_executor = ThreadPoolExecutor(
+    max_workers=LiteratureSearchConfig.SEARCH_WORKERS,
+    thread_name_prefix='literature-search'
+)
+
+# arXiv returns Atom feeds; records are matched in Clark notation while streaming
+ARXIV_NS = {'atom': 'http://www.w3.org/2005/Atom',
+            'arxiv': 'http://arxiv.org/schemas/atom'}
+ATOM_ENTRY = '{http://www.w3.org/2005/Atom}entry'
+
+# Cache entries with a background refresh in flight, so each stale entry is refreshed once
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+class HistoryExpiredError(Exception):
+    """Raised when a result set on the E-utilities history server has expired."""
 
 
 # Update the BaseSearchClient class
@@ -18,15 +48,224 @@ class BaseSearchClient:
 
     def __init__(self):
         self.name = "base"
-        self.cache = APICache(
+        self.base_url = None
+        # Cache endpoint of search(), for warming; None if the client doesn't cache searches itself
+        self.search_endpoint: Optional[str] = None
+        self.cache = APICache.shared(
             cache_dir=LiteratureSearchConfig.CACHE_DIR,
-            timeout_seconds=LiteratureSearchConfig.CACHE_TIMEOUT
+            timeout_seconds=LiteratureSearchConfig.CACHE_TIMEOUT,
+            memory_entries=LiteratureSearchConfig.CACHE_MEMORY_ENTRIES,
+            max_bytes=LiteratureSearchConfig.CACHE_MAX_BYTES,
+            sweep_interval=LiteratureSearchConfig.CACHE_SWEEP_INTERVAL,
+            stale_seconds=LiteratureSearchConfig.CACHE_STALE_TTL
         ) if LiteratureSearchConfig.CACHE_ENABLED else None
 
-    def search(self, query: str, max_results: int = 25) -> List[Dict[str, Any]]:
-        """Search for papers matching query."""
+    @property
+    def session(self) -> requests.Session:
+        """Shared keep-alive session for this client's API host."""
+        return get_session(self.base_url)
+
+    @property
+    def singleflight(self) -> SingleFlight:
+        """Process-wide coalescer for identical concurrent upstream requests."""
+        return SingleFlight.shared(
+            lock_dir=LiteratureSearchConfig.SINGLEFLIGHT_DIR,
+            wait_timeout=LiteratureSearchConfig.SINGLEFLIGHT_WAIT
+        )
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Process-wide circuit breaker for this client's source."""
+        return CircuitBreaker.for_source(
+            self.name,
+            failure_threshold=LiteratureSearchConfig.CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=LiteratureSearchConfig.CIRCUIT_RECOVERY_TIMEOUT
+        )
+
+    def _call_upstream(self, fetch: Callable[[], Any]) -> Any:
+        """Call the source through its circuit breaker, raising CircuitOpenError if it is open."""
+        breaker = self.breaker
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"{self.name} is temporarily unavailable")
+
+        try:
+            data = fetch()
+        except (requests.RequestException, ET.ParseError):
+            breaker.record_failure()
+            raise
+        except Exception:
+            # The source answered, so the failure isn't a sign of an outage
+            breaker.record_success()
+            raise
+
+        breaker.record_success()
+        return data
+
+    def _fetch_once(self, endpoint: str, params: Dict[str, Any], fetch: Callable[[], Any],
+                    refresh: bool = False) -> Any:
+        """
+        Fetch a request from upstream and cache it, coalescing identical concurrent requests.
+
+        Callers in this process share one fetch; workers in other processes wait
+        for it and then read its result from the shared cache. With refresh, the
+        fetch is made even if a fresh entry is cached.
+        """
+        def load():
+            if self.cache is None:
+                return self._call_upstream(fetch)
+
+            # Another worker may have cached it while we waited for its fetch
+            entry = None if refresh else self.cache.get_entry(endpoint, params, allow_stale=False)
+            if entry is not None:
+                return entry[0]
+
+            # Errors propagate from fetch, so failed requests are never cached
+            data = self._call_upstream(fetch)
+            self.cache.set(endpoint, params, data)
+            return data
+
+        # Same normalization as the cache key
+        return self.singleflight.do(f"{endpoint}:{json.dumps(params, sort_keys=True)}", load)
+
+    def _refresh(self, endpoint: str, params: Dict[str, Any], fetch: Callable[[], Any],
+                 refresh_key: Tuple[str, str]) -> None:
+        """Re-fetch a stale cache entry in the background."""
+        try:
+            self._fetch_once(endpoint, params, fetch)
+        except Exception as e:
+            print(f"Error refreshing {endpoint}: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(refresh_key)
+
+    def _cached(self, endpoint: str, params: Dict[str, Any], fetch: Callable[[], Any]) -> Any:
+        """
+        Return the cached response for a request, calling fetch and caching its result on a miss.
+
+        Stale entries are served immediately while a background refresh runs, or
+        served as they are while the source's circuit breaker is open.
+        """
+        if self.cache is None:
+            return self._fetch_once(endpoint, params, fetch)
+
+        entry = self.cache.get_entry(endpoint, params)
+        if entry is not None:
+            data, stale = entry
+            if stale and self.breaker.state != CircuitBreaker.OPEN:
+                refresh_key = (endpoint, json.dumps(params, sort_keys=True))
+                with _refreshing_lock:
+                    start_refresh = refresh_key not in _refreshing
+                    _refreshing.add(refresh_key)
+                if start_refresh:
+                    _search_executor.submit(self._refresh, endpoint, params, fetch, refresh_key)
+            return data
+
+        return self._fetch_once(endpoint, params, fetch)
+
+    def search(self, query: str, max_results: int = 25,
+               filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
+        """Search for papers matching query, restricted by filters if given."""
         raise NotImplementedError("Subclasses must implement search method")
 
+    def _cached_search(self, endpoint: str, query: str, max_results: int, filters: Optional[SearchFilter],
+                       fetch: Callable[[int], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Return up to max_results papers for a search, sharing cache entries between result counts.
+
+        Searches are fetched and cached at fixed result-count tiers, so requests
+        for different counts are served by slicing one cached superset. A cached
+        tier that came back short already holds every match and can serve any
+        larger count too.
+
+        Args:
+            endpoint: Cache endpoint name of the search
+            query: The search query
+            max_results: Maximum number of results to return
+            filters: Optional filters to restrict the results
+            fetch: Runs the search upstream for a given number of results
+
+        Returns:
+            List of paper dictionaries
+        """
+        size = self._search_tier(endpoint, query, max_results, filters)
+        papers = self._cached(endpoint, self._search_params(query, size, filters), lambda: fetch(size))
+        return papers[:max_results]
+
+    def _search_tier(self, endpoint: str, query: str, max_results: int,
+                     filters: Optional[SearchFilter]) -> int:
+        """Pick the result-count tier that answers a search: the smallest usable cached one, else the next up."""
+        tiers = [tier for tier in LiteratureSearchConfig.CACHE_RESULT_TIERS if tier >= max_results] or [max_results]
+
+        if self.cache is not None:
+            for tier in LiteratureSearchConfig.CACHE_RESULT_TIERS:
+                cached = self.cache.peek(endpoint, self._search_params(query, tier, filters))
+                if cached is not None and (tier >= max_results or len(cached) < tier):
+                    return tier
+        return tiers[0]
+
+    def warm_search(self, query: str, max_results: int, filters: Optional[SearchFilter],
+                    lead_time: float, budget: int, pace: Optional[Callable[[], Any]] = None) -> int:
+        """
+        Re-fetch the cached results of a search if they are missing or about to expire.
+
+        Args:
+            query: The search query
+            max_results: Number of results the search asks for
+            filters: Optional filters to restrict the results
+            lead_time: Refresh entries that expire within this many seconds
+            budget: Maximum number of searches to run upstream
+            pace: Optional callable blocking until the next upstream search may be made
+
+        Returns:
+            Number of searches run upstream
+        """
+        endpoint = self.search_endpoint
+        if endpoint is None or self.cache is None or budget <= 0:
+            return 0
+        if filters is not None and not filters.allows_source(self.name):
+            return 0
+
+        size = self._search_tier(endpoint, query, max_results, filters)
+        params = self._search_params(query, size, filters)
+        expires_in = self.cache.expires_in(endpoint, params)
+        if expires_in is not None and expires_in > lead_time:
+            return 0
+
+        if pace is not None:
+            pace()
+        self._fetch_once(endpoint, params, lambda: self._fetch_search(query, size, filters), refresh=True)
+        return 1
+
+    def search_page(self, query: str, page_size: int = 25, state: Optional[Dict[str, Any]] = None,
+                    filters: Optional[SearchFilter] = None) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Get one page of results for a query.
+
+        Args:
+            query: The search query
+            page_size: Number of results per page
+            state: Paging state returned with the previous page, or None for the first page
+            filters: Optional filters to restrict the results
+
+        Returns:
+            The page of paper dictionaries, and the state for the next page (None after the last page)
+        """
+        raise NotImplementedError("Subclasses must implement search_page method")
+
+    def prefetch_page(self, query: str, page_size: int, state: Optional[Dict[str, Any]],
+                      filters: Optional[SearchFilter] = None) -> None:
+        """Fetch the page for a paging state into the cache in the background."""
+        if not state:
+            return
+
+        def warm():
+            try:
+                self.search_page(query, page_size, state, filters)
+            except Exception as e:
+                print(f"Error prefetching {self.name} page: {e}")
+
+        _search_executor.submit(warm)
+
     def get_paper(self, paper_id: str) -> Dict[str, Any]:
         """Get details for a specific paper."""
         raise NotImplementedError("Subclasses must implement get_paper method")
@@ -35,6 +274,14 @@ class BaseSearchClient:
         """Format paper data to a standard structure."""
         raise NotImplementedError("Subclasses must implement format_paper method")
 
+    @staticmethod
+    def _search_params(query: str, max_results: int, filters: Optional[SearchFilter]) -> Dict[str, Any]:
+        """Build the cache parameters of a search, keyed by the canonical form of the query."""
+        params = {'query': canonical_query(query), 'max_results': max_results}
+        if filters is not None and not filters.is_empty():
+            params['filters'] = filters.to_params()
+        return params
+
 
 class ArxivClient(BaseSearchClient):
     """Client for searching arXiv."""
@@ -43,76 +290,89 @@ class ArxivClient(BaseSearchClient):
         super().__init__()
         self.name = "arxiv"
         self.base_url = "http://export.arxiv.org/api/query"
+        self.search_endpoint = 'arxiv:search'
 
-    def search(self, query: str, max_results: int = 25) -> List[Dict[str, Any]]:
+    def search(self, query: str, max_results: int = 25,
+               filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
         """Search for papers on arXiv."""
-        try:
-            # Encode query parameters
-            params = {
-                'search_query': query,
-                'max_results': max_results,
-                'sortBy': 'relevance'
-            }
-
-            # Send request to arXiv API
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-
-            # Parse XML response
-            root = ET.fromstring(response.content)
-
-            # Extract papers
-            papers = []
+        if filters is not None and not filters.allows_source(self.name):
+            return []
+        # Errors propagate, as with PubMed, so an outage shows in the source's status instead of as no results
+        return self._cached_search(
+            self.search_endpoint, query, max_results, filters,
+            lambda size: self._fetch_search(query, size, filters)
+        )
+
+    def search_page(self, query: str, page_size: int = 25, state: Optional[Dict[str, Any]] = None,
+                    filters: Optional[SearchFilter] = None) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Get one page of arXiv results, starting at the offset in state."""
+        if filters is not None and not filters.allows_source(self.name):
+            return [], None
+
+        start = state['start'] if state else 0
+        params = self._search_params(query, page_size, filters)
+        if start:
+            # The first page shares its cache entry with search()
+            params['start'] = start
+        papers = self._cached('arxiv:search', params, lambda: self._fetch_search(query, page_size, filters, start))
+
+        # arXiv doesn't say how many results remain, so a short page is the last one
+        next_state = {'start': start + page_size} if len(papers) >= page_size else None
+        return papers, next_state
+
+    def _fetch_search(self, query: str, max_results: int, filters: Optional[SearchFilter] = None,
+                      start: int = 0) -> List[Dict[str, Any]]:
+        """Run a search against the arXiv API, bypassing the cache."""
+        # Send request to arXiv API, parsing entries as the body streams in
+        response = self.session.get(self.base_url, params=self._query_params(query, max_results, filters, start),
+                                    stream=True, timeout=LiteratureSearchConfig.HTTP_TIMEOUT)
+
+        # Extract papers
+        papers = []
+        for entry in iter_response_elements(response, ATOM_ENTRY):
+            try:
+                paper = self.format_paper(entry, ARXIV_NS)
+                papers.append(paper)
+            except Exception as e:
+                print(f"Error formatting arXiv paper: {e}")
+                # Continue with next paper
+                continue
 
-            # Define namespace mapping (arXiv uses Atom)
-            ns = {'atom': 'http://www.w3.org/2005/Atom',
-                  'arxiv': 'http://arxiv.org/schemas/atom'}
+        return papers
 
-            # Find all entries
-            for entry in root.findall('.//atom:entry', ns):
-                try:
-                    paper = self.format_paper(entry, ns)
-                    papers.append(paper)
-                except Exception as e:
-                    print(f"Error formatting arXiv paper: {e}")
-                    # Continue with next paper
-                    continue
-
-            return papers
-        except ET.ParseError as e:
-            print(f"Error parsing arXiv XML: {e}")
-            return []
-        except requests.RequestException as e:
-            print(f"Error connecting to arXiv API: {e}")
-            return []
-        except Exception as e:
-            print(f"Error searching arxiv: {e}")
-            return []
+    @staticmethod
+    def _query_params(query: str, max_results: int, filters: Optional[SearchFilter] = None,
+                      start: int = 0) -> Dict[str, Any]:
+        """Build the arXiv API parameters of a search."""
+        params = {
+            'search_query': filters.arxiv_query(query) if filters is not None else query,
+            'max_results': max_results,
+            'sortBy': 'relevance'
+        }
+        if start:
+            params['start'] = start
+        return params
 
     def get_paper(self, paper_id: str) -> Dict[str, Any]:
         """Get a specific paper from arXiv."""
+        return self._cached('arxiv:paper', {'id': paper_id}, lambda: self._fetch_paper(paper_id))
+
+    def _fetch_paper(self, paper_id: str) -> Dict[str, Any]:
+        """Fetch a specific paper from the arXiv API, bypassing the cache."""
         # Encode query parameters
         params = {
             'id_list': paper_id
         }
 
         # Send request to arXiv API
-        response = requests.get(self.base_url, params=params)
-        response.raise_for_status()
+        response = self.session.get(self.base_url, params=params, stream=True,
+                                    timeout=LiteratureSearchConfig.HTTP_TIMEOUT)
 
-        # Parse XML response
-        root = ET.fromstring(response.content)
+        # Format the first entry while it is still attached to the parser
+        for entry in iter_response_elements(response, ATOM_ENTRY):
+            return self.format_paper(entry, ARXIV_NS)
 
-        # Define namespace mapping
-        ns = {'atom': 'http://www.w3.org/2005/Atom',
-              'arxiv': 'http://arxiv.org/schemas/atom'}
-
-        # Find entry
-        entry = root.find('.//atom:entry', ns)
-        if entry is None:
-            raise ValueError(f"Paper with ID {paper_id} not found")
-
-        return self.format_paper(entry, ns)
+        raise ValueError(f"Paper with ID {paper_id} not found")
 
     def format_paper(self, entry: ET.Element, ns: Dict[str, str]) -> Dict[str, Any]:
         """Format arXiv paper data to standard structure."""
@@ -180,37 +440,168 @@ class ArxivClient(BaseSearchClient):
 
         return paper
 
+
+# Direct child paths into a PubmedArticle, so lookups don't scan the whole record
+PUBMED_PATHS = {
+    'title': 'MedlineCitation/Article/ArticleTitle',
+    'abstract': 'MedlineCitation/Article/Abstract/AbstractText',
+    'author_list': 'MedlineCitation/Article/AuthorList',
+    'journal': 'MedlineCitation/Article/Journal/Title',
+    'pub_date': 'MedlineCitation/Article/Journal/JournalIssue/PubDate',
+    'article_ids': 'PubmedData/ArticleIdList',
+}
+
+
 class PubMedClient(BaseSearchClient):
     """Client for searching PubMed."""
 
-    def __init__(self, email: str = "app@example.com", tool: str = "literature_search"):
+    def __init__(self, email: str = "app@example.com", tool: str = "literature_search",
+                 api_key: Optional[str] = None):
         super().__init__()
         self.name = "pubmed"
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+        self.search_endpoint = 'pubmed:search'
         self.email = email
         self.tool = tool
-
-    def search(self, query: str, max_results: int = 25) -> List[Dict[str, Any]]:
+        self.api_key = api_key or LiteratureSearchConfig.PUBMED_API_KEY
+        # Shared by every worker, so all NCBI calls stay within the limit for this key
+        self.rate_limiter = ncbi_bucket(self.api_key)
+
+    def _ncbi_get(self, url: str, params: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """
+        Send a rate-limited request to an E-utilities endpoint.
+
+        The shared session doesn't retry 429 for NCBI, so rate-limited requests
+        are retried here, taking a token from the bucket for every attempt.
+        """
+        if self.api_key:
+            params = dict(params, api_key=self.api_key)
+
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            response = self.session.get(url, params=params, stream=stream,
+                                        timeout=LiteratureSearchConfig.HTTP_TIMEOUT)
+            if response.status_code != 429 or attempt >= LiteratureSearchConfig.HTTP_MAX_RETRIES:
+                return response
+
+            response.close()
+            time.sleep(retry_delay(response, attempt))
+            attempt += 1
+
+    def search(self, query: str, max_results: int = 25,
+               filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
         """Search for papers on PubMed."""
-        # First, use esearch to get paper IDs
-        search_url = f"{self.base_url}/esearch.fcgi"
+        if filters is not None and not filters.allows_source(self.name):
+            return []
+        return self._cached_search(
+            self.search_endpoint, query, max_results, filters,
+            lambda size: self._fetch_search(query, size, filters)
+        )
+
+    def _esearch_params(self, query: str, filters: Optional[SearchFilter]) -> Dict[str, Any]:
+        """Build esearch parameters, with the filters translated to E-utilities syntax."""
         params = {
             'db': 'pubmed',
-            'term': query,
-            'retmax': max_results,
+            'term': filters.pubmed_term(query) if filters is not None else query,
             'sort': 'relevance',
             'retmode': 'json',
             'email': self.email,
             'tool': self.tool
         }
+        if filters is not None:
+            params.update(filters.pubmed_params())
+        return params
+
+    def search_page(self, query: str, page_size: int = 25, state: Optional[Dict[str, Any]] = None,
+                    filters: Optional[SearchFilter] = None) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Get one page of PubMed results.
+
+        The first page keeps its result set on the E-utilities history server,
+        so later pages are fetched from it by offset without repeating the
+        search. Result sets expire after a while; pages of an expired one are
+        fetched by re-running esearch at the offset instead.
+        """
+        if filters is not None and not filters.allows_source(self.name):
+            return [], None
+
+        if not state:
+            start = 0
+            page = self._cached(
+                'pubmed:first_page',
+                self._search_params(query, page_size, filters),
+                lambda: self._fetch_first_page(query, page_size, filters)
+            )
+            papers = page['papers']
+            history = {'web_env': page['web_env'], 'query_key': page['query_key'], 'count': page['count']}
+        else:
+            start = state['start']
+            history = {key: state[key] for key in ('web_env', 'query_key', 'count')}
+            count = min(page_size, history['count'] - start)
+            papers = None
+            if history['web_env']:
+                try:
+                    papers = self._cached(
+                        'pubmed:history_page',
+                        {'web_env': history['web_env'], 'query_key': history['query_key'],
+                         'start': start, 'count': count},
+                        lambda: self._fetch_history_page(history['web_env'], history['query_key'], start, count)
+                    )
+                except HistoryExpiredError:
+                    papers = None
+            if papers is None:
+                papers = self._cached(
+                    'pubmed:search',
+                    dict(self._search_params(query, count, filters), start=start),
+                    lambda: self._fetch_search(query, count, filters, start)
+                )
+
+        next_start = start + page_size
+        next_state = dict(history, start=next_start) if next_start < history['count'] else None
+        return papers, next_state
+
+    def _fetch_first_page(self, query: str, page_size: int,
+                          filters: Optional[SearchFilter] = None) -> Dict[str, Any]:
+        """Run esearch with the history server enabled and fetch the first page, bypassing the cache."""
+        params = dict(self._esearch_params(query, filters), retmax=page_size, usehistory='y')
+        search_data = self._ncbi_json(f"{self.base_url}/esearch.fcgi", params)['esearchresult']
+
+        return {
+            'papers': self._fetch_ids(search_data['idlist']),
+            'count': int(search_data.get('count', 0)),
+            'web_env': search_data.get('webenv'),
+            'query_key': search_data.get('querykey')
+        }
+
+    def _fetch_search(self, query: str, max_results: int, filters: Optional[SearchFilter] = None,
+                      start: int = 0) -> List[Dict[str, Any]]:
+        """Run a search against the E-utilities API, bypassing the cache."""
+        # First, use esearch to get paper IDs
+        search_url = f"{self.base_url}/esearch.fcgi"
+        params = dict(self._esearch_params(query, filters), retmax=max_results)
+        if start:
+            params['retstart'] = start
 
-        response = requests.get(search_url, params=params)
+        response = self._ncbi_get(search_url, params)
         response.raise_for_status()
         search_data = response.json()
 
         # Extract paper IDs
-        paper_ids = search_data['esearchresult']['idlist']
+        return self._fetch_ids(search_data['esearchresult']['idlist'])
+
+    def _efetch_params(self, paper_ids: List[str]) -> Dict[str, Any]:
+        """Build efetch parameters for the full records of a list of PubMed IDs."""
+        return {
+            'db': 'pubmed',
+            'id': ','.join(paper_ids),
+            'retmode': 'xml',
+            'email': self.email,
+            'tool': self.tool
+        }
 
+    def _fetch_ids(self, paper_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch and format the records for a list of PubMed IDs."""
         if not paper_ids:
             return []
 
@@ -221,65 +612,134 @@ class PubMedClient(BaseSearchClient):
         batch_size = 50
         for i in range(0, len(paper_ids), batch_size):
             batch_ids = paper_ids[i:i + batch_size]
+            response = self._ncbi_get(f"{self.base_url}/efetch.fcgi", self._efetch_params(batch_ids), stream=True)
 
-            fetch_url = f"{self.base_url}/efetch.fcgi"
-            params = {
-                'db': 'pubmed',
-                'id': ','.join(batch_ids),
-                'retmode': 'xml',
-                'email': self.email,
-                'tool': self.tool
-            }
+            # Parse articles as the response streams in
+            for article in iter_response_elements(response, 'PubmedArticle'):
+                paper = self.format_paper(article)
+                papers.append(paper)
 
-            response = requests.get(fetch_url, params=params)
-            response.raise_for_status()
+        return papers
 
-            # Parse XML response
-            root = ET.fromstring(response.content)
+    def iter_search(self, query: str, max_records: Optional[int] = None,
+                    page_size: Optional[int] = None,
+                    filters: Optional[SearchFilter] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield every paper matching a query, page by page.
+
+        The result set is stored on the E-utilities history server, so it can be
+        paged through beyond esearch's retmax without re-sending IDs. The next
+        page is fetched in the background while the current one is consumed.
+
+        Args:
+            query: The search query
+            max_records: Maximum number of papers to yield, or None for all matches
+            page_size: Number of records per efetch request
+            filters: Optional filters to restrict the result set
+
+        Yields:
+            Formatted paper dictionaries
+        """
+        if filters is not None and not filters.allows_source(self.name):
+            return
+        page_size = page_size or LiteratureSearchConfig.PUBMED_HISTORY_PAGE_SIZE
+
+        # Run the search once and keep the result set on the history server
+        params = dict(self._esearch_params(query, filters), retmax=0, usehistory='y')
+        search_data = self._call_upstream(
+            lambda: self._ncbi_json(f"{self.base_url}/esearch.fcgi", params)
+        )['esearchresult']
+
+        total = int(search_data.get('count', 0))
+        if max_records is not None:
+            total = min(total, max_records)
+        if total == 0:
+            return
+
+        web_env = search_data['webenv']
+        query_key = search_data['querykey']
+
+        def fetch_page(start: int) -> List[Dict[str, Any]]:
+            count = min(page_size, total - start)
+
+            def fetch() -> List[Dict[str, Any]]:
+                try:
+                    return self._fetch_history_page(web_env, query_key, start, count)
+                except HistoryExpiredError:
+                    # Re-run the search at this offset rather than silently ending the stream
+                    return self._fetch_search(query, count, filters, start)
 
-            # Extract papers
-            for article in root.findall('.//PubmedArticle'):
-                paper = self.format_paper(article)
-                papers.append(paper)
+            return self._call_upstream(fetch)
 
-            # Be nice to the API
-            time.sleep(0.34)  # NCBI allows 3 requests per second
+        starts = range(0, total, page_size)
+        next_page = _search_executor.submit(fetch_page, starts[0])
+        try:
+            for i in range(len(starts)):
+                page = next_page.result()
+                # Prefetch the following page while this one is being consumed
+                if i + 1 < len(starts):
+                    next_page = _search_executor.submit(fetch_page, starts[i + 1])
+                yield from page
+        finally:
+            next_page.cancel()
+
+    def _ncbi_json(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a rate-limited E-utilities request and decode its JSON response."""
+        response = self._ncbi_get(url, params)
+        response.raise_for_status()
+        return response.json()
 
-        return papers
+    def _fetch_history_page(self, web_env: str, query_key: str, start: int,
+                            count: int) -> List[Dict[str, Any]]:
+        """
+        Fetch one page of a result set stored on the history server.
 
-    def get_paper(self, paper_id: str) -> Dict[str, Any]:
-        """Get a specific paper from PubMed."""
-        fetch_url = f"{self.base_url}/efetch.fcgi"
+        An expired result set still comes back with HTTP 200, as an
+        <eFetchResult><ERROR> document with no articles in it.
+
+        Raises:
+            HistoryExpiredError: If a non-empty page came back without any articles
+        """
         params = {
             'db': 'pubmed',
-            'id': paper_id,
+            'WebEnv': web_env,
+            'query_key': query_key,
+            'retstart': start,
+            'retmax': count,
             'retmode': 'xml',
             'email': self.email,
             'tool': self.tool
         }
 
-        response = requests.get(fetch_url, params=params)
-        response.raise_for_status()
+        response = self._ncbi_get(f"{self.base_url}/efetch.fcgi", params, stream=True)
+        papers = [self.format_paper(article) for article in iter_response_elements(response, 'PubmedArticle')]
+        if count > 0 and not papers:
+            raise HistoryExpiredError(f"PubMed result set {query_key} expired before record {start}")
+        return papers
+
+    def get_paper(self, paper_id: str) -> Dict[str, Any]:
+        """Get a specific paper from PubMed."""
+        return self._cached('pubmed:paper', {'id': paper_id}, lambda: self._fetch_paper(paper_id))
 
-        # Parse XML response
-        root = ET.fromstring(response.content)
+    def _fetch_paper(self, paper_id: str) -> Dict[str, Any]:
+        """Fetch a specific paper from the E-utilities API, bypassing the cache."""
+        response = self._ncbi_get(f"{self.base_url}/efetch.fcgi", self._efetch_params([paper_id]), stream=True)
 
-        # Find article
-        article = root.find('.//PubmedArticle')
-        if article is None:
-            raise ValueError(f"Paper with ID {paper_id} not found")
+        # Format the first article while it is still attached to the parser
+        for article in iter_response_elements(response, 'PubmedArticle'):
+            return self.format_paper(article)
 
-        return self.format_paper(article)
+        raise ValueError(f"Paper with ID {paper_id} not found")
 
     def format_paper(self, article: ET.Element) -> Dict[str, Any]:
         """Format PubMed paper data to standard structure."""
         # Extract basic information
         try:
-            title_elem = article.find('.//ArticleTitle')
+            title_elem = article.find(PUBMED_PATHS['title'])
             title = title_elem.text if title_elem is not None else "No title"
 
             # Extract abstract
-            abstract_parts = article.findall('.//AbstractText')
+            abstract_parts = article.findall(PUBMED_PATHS['abstract'])
             abstract = ''
             for part in abstract_parts:
                 label = part.get('Label')
@@ -290,9 +750,9 @@ class PubMedClient(BaseSearchClient):
 
             # Extract authors
             authors = []
-            author_list = article.find('.//AuthorList')
+            author_list = article.find(PUBMED_PATHS['author_list'])
             if author_list is not None:
-                for author in author_list.findall('.//Author'):
+                for author in author_list.findall('Author'):
                     last_name = author.find('./LastName')
                     fore_name = author.find('./ForeName')
                     initials = author.find('./Initials')
@@ -309,14 +769,14 @@ class PubMedClient(BaseSearchClient):
                         authors.append(' '.join(name_parts))
 
             # Extract journal info
-            journal_elem = article.find('.//Journal/Title')
+            journal_elem = article.find(PUBMED_PATHS['journal'])
             journal = journal_elem.text if journal_elem is not None else "Unknown Journal"
 
             # Extract published date
             published_date = None
             year = None
 
-            pub_date = article.find('.//PubDate')
+            pub_date = article.find(PUBMED_PATHS['pub_date'])
             if pub_date is not None:
                 year_elem = pub_date.find('./Year')
                 if year_elem is not None and year_elem.text:
@@ -347,9 +807,9 @@ class PubMedClient(BaseSearchClient):
 
             # Extract DOI
             doi = None
-            article_id_list = article.find('.//ArticleIdList')
+            article_id_list = article.find(PUBMED_PATHS['article_ids'])
             if article_id_list is not None:
-                for article_id in article_id_list.findall('.//ArticleId'):
+                for article_id in article_id_list.findall('ArticleId'):
                     if article_id.get('IdType') == 'doi':
                         doi = article_id.text
                         break
@@ -357,7 +817,7 @@ class PubMedClient(BaseSearchClient):
             # Extract PubMed ID
             pmid = None
             if article_id_list is not None:
-                for article_id in article_id_list.findall('.//ArticleId'):
+                for article_id in article_id_list.findall('ArticleId'):
                     if article_id.get('IdType') == 'pubmed':
                         pmid = article_id.text
                         break
@@ -403,14 +863,22 @@ class SearchClientFactory:
     """Factory for creating search clients."""
 
     @staticmethod
-    def get_client(source: str) -> BaseSearchClient:
+    def get_client(source: str, pubmed_api_key: Optional[str] = None) -> BaseSearchClient:
         """Get a search client for the specified source."""
+        if LiteratureSearchConfig.ASYNC_CLIENTS:
+            try:
+                from modules.literature_search.async_clients import AsyncSearchClientFactory
+            except ImportError:  # httpx isn't installed: stay on the blocking clients
+                pass
+            else:
+                return AsyncSearchClientFactory.get_client(source, pubmed_api_key=pubmed_api_key)
+
         if source == 'arxiv':
             return ArxivClient()
         elif source == 'pubmed':
-            return PubMedClient()
+            return PubMedClient(api_key=pubmed_api_key)
         elif source == 'all':
-            return MultiSourceClient()
+            return MultiSourceClient(pubmed_api_key=pubmed_api_key)
         else:
             raise ValueError(f"Unsupported source: {source}")
 
@@ -418,32 +886,214 @@ class SearchClientFactory:
 class MultiSourceClient(BaseSearchClient):
     """Client that searches multiple sources."""
 
-    def __init__(self):
+    def __init__(self, deadline: Optional[float] = None, pubmed_api_key: Optional[str] = None):
         super().__init__()
         self.name = "all"
         self.clients = [
             ArxivClient(),
-            PubMedClient()
+            PubMedClient(api_key=pubmed_api_key)
         ]
+        # Overall time budget for a search across all sources, in seconds
+        self.deadline = deadline if deadline is not None else LiteratureSearchConfig.MULTI_SOURCE_DEADLINE
+        # Per-source status of the last search ('ok', 'error', 'unavailable' or 'timeout')
+        self.source_status: Dict[str, Dict[str, Any]] = {}
+
+    def _source_result(self, client: BaseSearchClient, future: Future, started: float,
+                       requested: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Unpack a finished source search into its papers and status flags."""
+        elapsed = round(time.monotonic() - started, 3)
+        try:
+            papers = future.result()
+            status = {'status': 'ok', 'count': len(papers), 'elapsed': elapsed}
+            if requested is not None:
+                # A source that answered with fewer papers than it was asked for has no more matches
+                status['exhausted'] = len(papers) < requested
+            return papers, status
+        except CircuitOpenError as e:
+            return [], {'status': 'unavailable', 'count': 0, 'elapsed': elapsed, 'error': str(e)}
+        except Exception as e:
+            print(f"Error searching {client.name}: {e}")
+            return [], {'status': 'error', 'count': 0, 'elapsed': elapsed, 'error': str(e)}
+
+    def iter_search(self, query: str, max_results: int = 25,
+                    filters: Optional[SearchFilter] = None) -> Iterator[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Search all sources concurrently, yielding each source's results as soon as it finishes.
+
+        Sources that have not answered once the deadline has passed are yielded
+        with an empty result list and a 'timeout' status. Sources the filters
+        exclude are not searched at all.
+
+        Yields:
+            Tuples of (source name, list of paper dictionaries, status dictionary)
+        """
+        clients = self._active_clients(filters)
+        if not clients:
+            return
 
-    def search(self, query: str, max_results: int = 25) -> List[Dict[str, Any]]:
-        """Search for papers across all sources."""
         # Distribute max_results across clients
-        per_client = max(5, max_results // len(self.clients))
+        per_client = max(5, max_results // len(clients))
+
+        yield from self._run_concurrently({
+            client: (lambda client=client: client.search(query, per_client, filters))
+            for client in clients
+        }, per_client)
+
+    def warm_search(self, query: str, max_results: int, filters: Optional[SearchFilter],
+                    lead_time: float, budget: int, pace: Optional[Callable[[], Any]] = None) -> int:
+        """Warm each source's share of a search, as iter_search would request it."""
+        clients = self._active_clients(filters)
+        if not clients:
+            return 0
+
+        per_client = max(5, max_results // len(clients))
+        used = 0
+        for client in clients:
+            used += client.warm_search(query, per_client, filters, lead_time, budget - used, pace)
+        return used
+
+    def _active_clients(self, filters: Optional[SearchFilter]) -> List[BaseSearchClient]:
+        """Get the clients for the sources the filters allow."""
+        return [client for client in self.clients if filters is None or filters.allows_source(client.name)]
+
+    def _run_concurrently(self, calls: Dict[BaseSearchClient, Callable[[], List[Dict[str, Any]]]],
+                          requested: Optional[int] = None
+                          ) -> Iterator[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Run one search call per source concurrently, yielding each result as soon as it is ready.
+
+        Sources that have not answered once the deadline has passed are yielded
+        with an empty result list and a 'timeout' status. Given the number of
+        results each call asked for, answers are flagged 'exhausted' when short.
+        """
+        started = time.monotonic()
+        futures = {_search_executor.submit(call): client for client, call in calls.items()}
+
+        pending = dict(futures)
+        try:
+            for future in as_completed(futures, timeout=self.deadline):
+                client = pending.pop(future)
+                papers, status = self._source_result(client, future, started, requested)
+                yield client.name, papers, status
+        except FuturesTimeoutError:
+            for future, client in pending.items():
+                if future.done():
+                    papers, status = self._source_result(client, future, started, requested)
+                    yield client.name, papers, status
+                else:
+                    # Let the request finish in the background, but stop waiting for it
+                    future.cancel()
+                    print(f"Timed out searching {client.name} after {self.deadline}s")
+                    yield client.name, [], {'status': 'timeout', 'count': 0, 'elapsed': self.deadline}
 
-        all_papers = []
-        for client in self.clients:
-            try:
-                papers = client.search(query, per_client)
-                all_papers.extend(papers)
-            except Exception as e:
-                print(f"Error searching {client.name}: {e}")
+    def search(self, query: str, max_results: int = 25,
+               filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
+        """Search for papers across all sources."""
+        return self._merge_results(query, max_results, self.iter_search(query, max_results, filters))
 
-        # Sort by relevance (assuming more recent papers are more relevant)
-        all_papers.sort(key=lambda p: p.get('published_date', datetime.min), reverse=True)
+    def _merge_results(self, query: str, max_results: int,
+                       batches: Iterable[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Record each source's status, then deduplicate and rank the papers of all sources."""
+        all_papers = []
+        source_ranks = {}
+        self.source_status = {}
+        for source, papers, status in batches:
+            all_papers.extend(papers)
+            source_ranks.update(source_order_prior(papers))
+            self.source_status[source] = status
+
+        # Merge preprints with their published versions and other cross-source duplicates
+        all_papers = deduplicate_papers(all_papers)
+
+        # Return up to max_results, most relevant first
+        return self.rank(query, all_papers, source_ranks)[:max_results]
+
+    def rank(self, query: str, papers: List[Dict[str, Any]],
+             source_ranks: Dict[Tuple[Any, Any], float]) -> List[Dict[str, Any]]:
+        """
+        Rank merged results against the query, using each source's own order as a prior.
+
+        Args:
+            query: The search query
+            papers: Deduplicated papers from all sources
+            source_ranks: Source order priors, see source_order_prior
+
+        Returns:
+            The papers, most relevant first
+        """
+        ranker = BM25Ranker(
+            k1=LiteratureSearchConfig.RANK_BM25_K1,
+            b=LiteratureSearchConfig.RANK_BM25_B,
+            title_boost=LiteratureSearchConfig.RANK_TITLE_BOOST,
+            prior_weight=LiteratureSearchConfig.RANK_PRIOR_WEIGHT
+        )
+        return ranker.rank(query, papers, source_ranks)
+
+    def search_page(self, query: str, page_size: int = 25, state: Optional[Dict[str, Any]] = None,
+                    filters: Optional[SearchFilter] = None) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Get one page of results from all sources.
+
+        Each source pages independently with its own share of page_size. The
+        state tracks every source that still has results, so an exhausted
+        source drops out while the others carry on, and a source that failed
+        or timed out is asked for the same page again next time.
+        """
+        if not state:
+            clients = self._active_clients(filters)
+            if not clients:
+                return [], None
+            # Sources start from their first page, which is an empty state
+            state = {'per_source': max(5, page_size // len(clients)),
+                     'sources': {client.name: {} for client in clients}}
+
+        per_source = state['per_source']
+        clients = {client.name: client for client in self.clients}
+        next_states: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        def page_call(client: BaseSearchClient, source_state: Dict[str, Any]):
+            def call():
+                papers, next_state = client.search_page(query, per_source, source_state, filters)
+                next_states[client.name] = next_state
+                return papers
+            return call
 
-        # Return up to max_results
-        return all_papers[:max_results]
+        all_papers = []
+        source_ranks = {}
+        self.source_status = {}
+        for source, papers, status in self._run_concurrently({
+            clients[name]: page_call(clients[name], source_state)
+            for name, source_state in state['sources'].items() if name in clients
+        }):
+            all_papers.extend(papers)
+            source_ranks.update(source_order_prior(papers))
+            self.source_status[source] = status
+            if status['status'] != 'ok':
+                next_states[source] = state['sources'][source]
+
+        # Duplicates and ranking are resolved within the page
+        ranker = BM25Ranker(
+            k1=LiteratureSearchConfig.RANK_BM25_K1,
+            b=LiteratureSearchConfig.RANK_BM25_B,
+            title_boost=LiteratureSearchConfig.RANK_TITLE_BOOST,
+            prior_weight=LiteratureSearchConfig.RANK_PRIOR_WEIGHT
+        )
+        papers = ranker.rank(query, deduplicate_papers(all_papers), source_ranks)
+
+        remaining = {name: source_state for name, source_state in next_states.items() if source_state is not None}
+        next_state = {'per_source': per_source, 'sources': remaining} if remaining else None
+        return papers, next_state
+
+    def prefetch_page(self, query: str, page_size: int, state: Optional[Dict[str, Any]],
+                      filters: Optional[SearchFilter] = None) -> None:
+        """Fetch each source's share of the page for a paging state into the cache in the background."""
+        if not state:
+            return
+
+        clients = {client.name: client for client in self.clients}
+        for name, source_state in state['sources'].items():
+            if name in clients:
+                clients[name].prefetch_page(query, state['per_source'], source_state, filters)
 
     def get_paper(self, paper_id: str) -> Dict[str, Any]:
         """Get a paper by ID."""
@@ -0,0 +1,487 @@
+# modules/literature_search/async_clients.py
+
+"""asyncio versions of the search clients, with a blocking facade for existing callers."""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import urllib.parse
+import weakref
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+import httpx
+import requests
+
+from modules.literature_search.api_clients import (
+    ARXIV_NS, ATOM_ENTRY, ArxivClient, BaseSearchClient, MultiSourceClient, PubMedClient,
+    _refreshing, _refreshing_lock
+)
+from modules.literature_search.circuit_breaker import CircuitBreaker, CircuitOpenError
+from modules.literature_search.config import LiteratureSearchConfig
+from modules.literature_search.filters import SearchFilter
+from modules.literature_search.http_pool import RETRY_STATUSES, retry_delay
+from modules.literature_search.rate_limiter import TokenBucket
+from modules.literature_search.xml_stream import aiter_elements
+
+# One connection pool per (event loop, host); an AsyncClient can't be shared between loops
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = \
+    weakref.WeakKeyDictionary()
+
+# Upstream fetches in flight per event loop, so identical concurrent requests share one
+_inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = \
+    weakref.WeakKeyDictionary()
+
+# Fire-and-forget tasks (refreshes, timed-out sources), kept referenced until they finish
+_background_tasks: Set[asyncio.Future] = set()
+
+# Threads that hold a SingleFlight slot while the event loop makes the fetch. Kept apart from the
+# default executor, which the fetches themselves use for cache and rate limiter calls.
+_singleflight_executor = ThreadPoolExecutor(
+    max_workers=LiteratureSearchConfig.SEARCH_WORKERS,
+    thread_name_prefix='literature-search-singleflight'
+)
+
+# Event loop the blocking facade runs coroutines on, one per process
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_loop_lock = threading.Lock()
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """
+    Get the shared async HTTP client for the host of a URL, on the running event loop.
+
+    Args:
+        url: Any URL on the host to talk to
+
+    Returns:
+        An httpx AsyncClient with keep-alive and a bounded connection pool
+    """
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    host = urllib.parse.urlsplit(url).netloc
+    client = clients.get(host)
+    if client is None:
+        limits = httpx.Limits(max_connections=LiteratureSearchConfig.HTTP_POOL_SIZE,
+                              max_keepalive_connections=LiteratureSearchConfig.HTTP_POOL_SIZE)
+        client = httpx.AsyncClient(
+            # The transport retries failed connections; retryable statuses are handled in _open
+            transport=httpx.AsyncHTTPTransport(retries=LiteratureSearchConfig.HTTP_MAX_RETRIES, limits=limits),
+            timeout=LiteratureSearchConfig.HTTP_TIMEOUT,
+            follow_redirects=True
+        )
+        clients[host] = client
+    return client
+
+
+@asynccontextmanager
+async def _open(url: str, params: Dict[str, Any],
+                limiter: Optional[TokenBucket] = None) -> AsyncIterator[httpx.Response]:
+    """
+    Send a streamed GET request, retrying rate limiting and transient server errors.
+
+    Args:
+        url: Request URL
+        params: Query parameters
+        limiter: Token bucket every attempt, including retries, takes a token from
+    """
+    client = get_async_client(url)
+    attempt = 0
+    while True:
+        if limiter is not None:
+            await limiter.acquire_async()
+        response = await client.send(client.build_request('GET', url, params=params), stream=True)
+        if response.status_code not in RETRY_STATUSES or attempt >= LiteratureSearchConfig.HTTP_MAX_RETRIES:
+            break
+        await response.aclose()
+        await asyncio.sleep(retry_delay(response, attempt))
+        attempt += 1
+
+    try:
+        yield response
+    finally:
+        await response.aclose()
+
+
+async def _iter_xml(url: str, params: Dict[str, Any], tag: str,
+                    limiter: Optional[TokenBucket] = None) -> AsyncIterator[ET.Element]:
+    """Request an XML document and parse its records as the body streams in."""
+    async with _open(url, params, limiter) as response:
+        response.raise_for_status()
+        async for elem in aiter_elements(response.aiter_bytes(), tag):
+            yield elem
+
+
+def _requests_error(error: httpx.HTTPError) -> requests.RequestException:
+    """Translate an httpx error into the requests exception the blocking clients would raise."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return requests.HTTPError(str(error))
+    if isinstance(error, httpx.TimeoutException):
+        return requests.Timeout(str(error))
+    if isinstance(error, httpx.TransportError):
+        return requests.ConnectionError(str(error))
+    return requests.RequestException(str(error))
+
+
+def _spawn(awaitable: Awaitable[Any]) -> asyncio.Future:
+    """Run an awaitable in the background without waiting for it."""
+    def finished(task: asyncio.Future) -> None:
+        _background_tasks.discard(task)
+        # Errors were already reported where they happened; just mark them retrieved
+        if not task.cancelled():
+            task.exception()
+
+    task = asyncio.ensure_future(awaitable)
+    _background_tasks.add(task)
+    task.add_done_callback(finished)
+    return task
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Get the event loop of this process's facade thread, starting it on first use."""
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            thread = threading.Thread(target=_loop.run_forever, name="literature-search-loop", daemon=True)
+            thread.start()
+        return _loop
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine on the shared background event loop and wait for its result.
+
+    All blocking callers share one loop, so their requests share its
+    connection pools and run concurrently while the callers wait.
+
+    Args:
+        coro: The coroutine to run
+
+    Returns:
+        The result of the coroutine
+
+    Raises:
+        Whatever the coroutine raised
+    """
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_sync called from the search event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+class AsyncClientMixin:
+    """
+    Async request plumbing for search clients, mirroring the blocking path of BaseSearchClient.
+
+    Responses go through the same shared cache, circuit breaker and
+    SingleFlight as the blocking path, so identical requests are coalesced
+    across worker processes and with blocking callers. Cache and rate limiter
+    calls run in threads, off the event loop, and httpx errors are raised as
+    the requests exceptions callers already handle.
+
+    Subclasses implement asearch and aget_paper; search and get_paper run
+    them on the background event loop, so existing callers keep working.
+    """
+
+    async def asearch(self, query: str, max_results: int = 25,
+                      filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
+        """Search for papers matching query, restricted by filters if given."""
+        raise NotImplementedError("Subclasses must implement asearch method")
+
+    async def aget_paper(self, paper_id: str) -> Dict[str, Any]:
+        """Get details for a specific paper."""
+        raise NotImplementedError("Subclasses must implement aget_paper method")
+
+    def search(self, query: str, max_results: int = 25,
+               filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
+        """Search for papers, blocking until the async search finishes."""
+        return run_sync(self.asearch(query, max_results, filters))
+
+    def get_paper(self, paper_id: str) -> Dict[str, Any]:
+        """Get details for a specific paper, blocking until the async request finishes."""
+        return run_sync(self.aget_paper(paper_id))
+
+    async def _acall_upstream(self, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Call the source through its circuit breaker, raising CircuitOpenError if it is open."""
+        breaker = self.breaker
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"{self.name} is temporarily unavailable")
+
+        try:
+            data = await fetch()
+        except httpx.HTTPError as e:
+            breaker.record_failure()
+            raise _requests_error(e) from e
+        except ET.ParseError:
+            breaker.record_failure()
+            raise
+        except Exception:
+            # The source answered, so the failure isn't a sign of an outage
+            breaker.record_success()
+            raise
+
+        breaker.record_success()
+        return data
+
+    async def _afetch_once(self, endpoint: str, params: Dict[str, Any],
+                           fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Fetch a request from upstream and cache it, sharing the fetch with identical concurrent requests.
+
+        Requests on this loop share one task. The task takes the request's
+        SingleFlight slot in a thread, so blocking callers and other workers
+        wait for it (or it for them), while the fetch itself runs on the loop.
+        """
+        loop = asyncio.get_running_loop()
+
+        def load():
+            if self.cache is not None:
+                # Another caller or worker may have cached it while we waited for its fetch
+                entry = self.cache.get_entry(endpoint, params, allow_stale=False)
+                if entry is not None:
+                    return entry[0]
+
+            # Errors propagate from fetch, so failed requests are never cached
+            data = asyncio.run_coroutine_threadsafe(self._acall_upstream(fetch), loop).result()
+            if self.cache is not None:
+                self.cache.set(endpoint, params, data)
+            return data
+
+        # Same normalization as the cache key, and the same key as the blocking path
+        key = f"{endpoint}:{json.dumps(params, sort_keys=True)}"
+        inflight = _inflight.setdefault(loop, {})
+        task = inflight.get(key)
+        if task is None:
+            task = loop.run_in_executor(_singleflight_executor, self.singleflight.do, key, load)
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+
+        # A caller giving up must not cancel the fetch for everyone else
+        return await asyncio.shield(task)
+
+    async def _arefresh(self, endpoint: str, params: Dict[str, Any], fetch: Callable[[], Awaitable[Any]],
+                        refresh_key) -> None:
+        """Re-fetch a stale cache entry in the background."""
+        try:
+            await self._afetch_once(endpoint, params, fetch)
+        except Exception as e:
+            print(f"Error refreshing {endpoint}: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(refresh_key)
+
+    async def _acached(self, endpoint: str, params: Dict[str, Any], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached response for a request, calling fetch and caching its result on a miss.
+
+        Stale entries are served immediately while a background refresh runs, or
+        served as they are while the source's circuit breaker is open.
+        """
+        if self.cache is None:
+            return await self._afetch_once(endpoint, params, fetch)
+
+        entry = await asyncio.to_thread(self.cache.get_entry, endpoint, params)
+        if entry is not None:
+            data, stale = entry
+            if stale and self.breaker.state != CircuitBreaker.OPEN:
+                refresh_key = (endpoint, json.dumps(params, sort_keys=True))
+                with _refreshing_lock:
+                    start_refresh = refresh_key not in _refreshing
+                    _refreshing.add(refresh_key)
+                if start_refresh:
+                    _spawn(self._arefresh(endpoint, params, fetch, refresh_key))
+            return data
+
+        return await self._afetch_once(endpoint, params, fetch)
+
+    async def _acached_search(self, endpoint: str, query: str, max_results: int, filters: Optional[SearchFilter],
+                              fetch: Callable[[int], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Return up to max_results papers for a search, sharing cache entries between result counts."""
+        # Probing the cached tiers reads the cache database, so do it off the loop
+        size = await asyncio.to_thread(self._search_tier, endpoint, query, max_results, filters)
+        papers = await self._acached(endpoint, self._search_params(query, size, filters), lambda: fetch(size))
+        return papers[:max_results]
+
+
+class AsyncArxivClient(AsyncClientMixin, ArxivClient):
+    """arXiv client making its requests with asyncio."""
+
+    async def asearch(self, query: str, max_results: int = 25,
+                      filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
+        """Search for papers on arXiv."""
+        if filters is not None and not filters.allows_source(self.name):
+            return []
+        # Errors propagate, as with PubMed, so an outage shows in the source's status instead of as no results
+        return await self._acached_search(
+            self.search_endpoint, query, max_results, filters,
+            lambda size: self._afetch_search(query, size, filters)
+        )
+
+    async def _afetch_search(self, query: str, max_results: int, filters: Optional[SearchFilter] = None,
+                             start: int = 0) -> List[Dict[str, Any]]:
+        """Run a search against the arXiv API, bypassing the cache."""
+        papers = []
+        async for entry in _iter_xml(self.base_url, self._query_params(query, max_results, filters, start),
+                                     ATOM_ENTRY):
+            try:
+                papers.append(self.format_paper(entry, ARXIV_NS))
+            except Exception as e:
+                print(f"Error formatting arXiv paper: {e}")
+        return papers
+
+    async def aget_paper(self, paper_id: str) -> Dict[str, Any]:
+        """Get a specific paper from arXiv."""
+        return await self._acached('arxiv:paper', {'id': paper_id}, lambda: self._afetch_paper(paper_id))
+
+    async def _afetch_paper(self, paper_id: str) -> Dict[str, Any]:
+        """Fetch a specific paper from the arXiv API, bypassing the cache."""
+        entries = _iter_xml(self.base_url, {'id_list': paper_id}, ATOM_ENTRY)
+        try:
+            # Format the first entry while it is still attached to the parser
+            async for entry in entries:
+                return self.format_paper(entry, ARXIV_NS)
+        finally:
+            # Release the connection without reading the rest of the body
+            await entries.aclose()
+
+        raise ValueError(f"Paper with ID {paper_id} not found")
+
+
+class AsyncPubMedClient(AsyncClientMixin, PubMedClient):
+    """PubMed client making its requests with asyncio."""
+
+    def _ncbi_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the API key, if there is one, to E-utilities parameters."""
+        return dict(params, api_key=self.api_key) if self.api_key else params
+
+    async def _ancbi_json(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a rate-limited E-utilities request and decode its JSON response."""
+        async with _open(url, self._ncbi_params(params), self.rate_limiter) as response:
+            await response.aread()
+            response.raise_for_status()
+            return response.json()
+
+    async def _ancbi_xml(self, url: str, params: Dict[str, Any], tag: str) -> AsyncIterator[ET.Element]:
+        """Send a rate-limited E-utilities request and parse its XML records as they stream in."""
+        async for elem in _iter_xml(url, self._ncbi_params(params), tag, self.rate_limiter):
+            yield elem
+
+    async def asearch(self, query: str, max_results: int = 25,
+                      filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
+        """Search for papers on PubMed."""
+        if filters is not None and not filters.allows_source(self.name):
+            return []
+        return await self._acached_search(
+            self.search_endpoint, query, max_results, filters,
+            lambda size: self._afetch_search(query, size, filters)
+        )
+
+    async def _afetch_search(self, query: str, max_results: int, filters: Optional[SearchFilter] = None,
+                             start: int = 0) -> List[Dict[str, Any]]:
+        """Run a search against the E-utilities API, bypassing the cache."""
+        params = dict(self._esearch_params(query, filters), retmax=max_results)
+        if start:
+            params['retstart'] = start
+
+        search_data = await self._ancbi_json(f"{self.base_url}/esearch.fcgi", params)
+        return await self._afetch_ids(search_data['esearchresult']['idlist'])
+
+    async def _afetch_ids(self, paper_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch and format the records for a list of PubMed IDs, all batches at once."""
+        async def fetch_batch(batch_ids: List[str]) -> List[Dict[str, Any]]:
+            return [self.format_paper(article) async for article in
+                    self._ancbi_xml(f"{self.base_url}/efetch.fcgi", self._efetch_params(batch_ids), 'PubmedArticle')]
+
+        # Fetch in batches to avoid large requests; the rate limiter spaces them out
+        batch_size = 50
+        batches = await asyncio.gather(*(
+            fetch_batch(paper_ids[i:i + batch_size]) for i in range(0, len(paper_ids), batch_size)
+        ))
+        return [paper for batch in batches for paper in batch]
+
+    async def aget_paper(self, paper_id: str) -> Dict[str, Any]:
+        """Get a specific paper from PubMed."""
+        return await self._acached('pubmed:paper', {'id': paper_id}, lambda: self._afetch_paper(paper_id))
+
+    async def _afetch_paper(self, paper_id: str) -> Dict[str, Any]:
+        """Fetch a specific paper from the E-utilities API, bypassing the cache."""
+        articles = self._ancbi_xml(f"{self.base_url}/efetch.fcgi", self._efetch_params([paper_id]), 'PubmedArticle')
+        try:
+            # Format the first article while it is still attached to the parser
+            async for article in articles:
+                return self.format_paper(article)
+        finally:
+            # Release the connection without reading the rest of the body
+            await articles.aclose()
+
+        raise ValueError(f"Paper with ID {paper_id} not found")
+
+
+class AsyncMultiSourceClient(AsyncClientMixin, MultiSourceClient):
+    """Client searching all sources concurrently on one event loop."""
+
+    def __init__(self, deadline: Optional[float] = None, pubmed_api_key: Optional[str] = None):
+        super().__init__(deadline=deadline, pubmed_api_key=pubmed_api_key)
+        self.clients = [
+            AsyncArxivClient(),
+            AsyncPubMedClient(api_key=pubmed_api_key)
+        ]
+
+    async def asearch(self, query: str, max_results: int = 25,
+                      filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
+        """
+        Search all sources concurrently, then deduplicate and rank the results.
+
+        Sources that have not answered by the deadline are reported with a
+        'timeout' status; their requests carry on in the background, so the
+        cache is warm for the next search.
+        """
+        clients = self._active_clients(filters)
+        if not clients:
+            self.source_status = {}
+            return []
+
+        # Distribute max_results across clients
+        per_client = max(5, max_results // len(clients))
+
+        started = time.monotonic()
+        tasks = {client: asyncio.ensure_future(client.asearch(query, per_client, filters)) for client in clients}
+        done, _ = await asyncio.wait(tasks.values(), timeout=self.deadline)
+
+        batches = []
+        for client, task in tasks.items():
+            if task in done:
+                papers, status = self._source_result(client, task, started, per_client)
+            else:
+                _spawn(task)
+                print(f"Timed out searching {client.name} after {self.deadline}s")
+                papers, status = [], {'status': 'timeout', 'count': 0, 'elapsed': self.deadline}
+            batches.append((client.name, papers, status))
+
+        return self._merge_results(query, max_results, batches)
+
+
+class AsyncSearchClientFactory:
+    """Factory for creating asyncio search clients."""
+
+    @staticmethod
+    def get_client(source: str, pubmed_api_key: Optional[str] = None) -> BaseSearchClient:
+        """Get an asyncio search client for the specified source."""
+        if source == 'arxiv':
+            return AsyncArxivClient()
+        elif source == 'pubmed':
+            return AsyncPubMedClient(api_key=pubmed_api_key)
+        elif source == 'all':
+            return AsyncMultiSourceClient(pubmed_api_key=pubmed_api_key)
+        else:
+            raise ValueError(f"Unsupported source: {source}")
@@ -4,26 +4,140 @@ import hashlib
 import json
 import os
 import pickle
-from datetime import datetime, timedelta
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from typing import Any, Dict, Optional, Tuple
 
 
 class APICache:
-    """Simple cache for API responses."""
+    """
+    Two-tier cache for API responses.
 
-    def __init__(self, cache_dir="./cache", timeout_seconds=3600):
+    An in-process LRU sits in front of a single SQLite file shared by every
+    worker process. The file is kept under a byte budget by evicting the least
+    recently used entries. Expired entries stay available as stale data for a
+    grace period and are then removed by a background sweeper thread.
+    """
+
+    DB_FILENAME = "api_cache.sqlite3"
+
+    # Process-wide instances, so every client shares one memory tier per cache directory
+    _shared_instances: Dict[Tuple[str, int], "APICache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cache_dir="./cache", timeout_seconds=3600, memory_entries=512,
+                 max_bytes=256 * 1024 * 1024, sweep_interval=300, stale_seconds=0):
         """
         Initialize the cache.
 
         Args:
-            cache_dir: Directory to store cache files
+            cache_dir: Directory holding the cache database
             timeout_seconds: Time before cache entries expire
+            memory_entries: Maximum number of entries kept in the in-process tier
+            max_bytes: Budget for the total size of cached payloads on disk
+            sweep_interval: Seconds between background sweeps, or 0 to disable the sweeper
+            stale_seconds: How long expired entries can still be served as stale data
         """
         self.cache_dir = cache_dir
         self.timeout = timeout_seconds
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.stale_seconds = stale_seconds
+        self.db_path = os.path.join(cache_dir, self.DB_FILENAME)
+
+        # In-process tier: key -> (created, data), least recently used first
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0}
+
+        # SQLite connections can't be shared between threads or across a fork
+        self._local = threading.local()
+        self._sweeper_pid = None
+        self._writes_since_budget_check = 0
+
+        # Access times waiting to be written to disk in one batch, so reads don't each take the write lock
+        self._pending_access: Dict[str, float] = {}
+        self._access_flushed = time.time()
 
         # Create cache directory if it doesn't exist
         os.makedirs(cache_dir, exist_ok=True)
+        self._init_db()
+
+    @classmethod
+    def shared(cls, cache_dir="./cache", timeout_seconds=3600, memory_entries=512,
+               max_bytes=256 * 1024 * 1024, sweep_interval=300, stale_seconds=0) -> "APICache":
+        """
+        Get the process-wide cache for a directory, creating it on first use.
+
+        Args:
+            cache_dir: Directory holding the cache database
+            timeout_seconds: Time before cache entries expire
+            memory_entries: Maximum number of entries kept in the in-process tier
+            max_bytes: Budget for the total size of cached payloads on disk
+            sweep_interval: Seconds between background sweeps, or 0 to disable the sweeper
+            stale_seconds: How long expired entries can still be served as stale data
+
+        Returns:
+            The shared APICache instance
+        """
+        with cls._shared_lock:
+            key = (cache_dir, timeout_seconds)
+            if key not in cls._shared_instances:
+                cls._shared_instances[key] = cls(cache_dir, timeout_seconds, memory_entries,
+                                                 max_bytes, sweep_interval, stale_seconds)
+            return cls._shared_instances[key]
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection to the cache database, reconnecting after a fork."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # Autocommit mode; WAL lets readers in other workers proceed during writes
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_db(self) -> None:
+        """Create the cache table if it doesn't exist."""
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " data BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_created ON entries (created)")
+
+    def _ensure_sweeper(self) -> None:
+        """Start the background sweeper in this process if it isn't running yet."""
+        if not self.sweep_interval or self._sweeper_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._sweeper_pid == os.getpid():
+                return
+            self._sweeper_pid = os.getpid()
+
+        thread = threading.Thread(target=self._sweep_loop, name="api-cache-sweeper", daemon=True)
+        thread.start()
+
+    def _sweep_loop(self) -> None:
+        """Periodically sweep the cache until the process exits."""
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping cache: {e}")
 
     def _get_cache_key(self, endpoint: str, params: Dict[str, Any]) -> str:
         """
@@ -43,49 +157,292 @@ class APICache:
         key = f"{endpoint}:{param_str}"
         return hashlib.md5(key.encode()).hexdigest()
 
-    def _get_cache_path(self, key: str) -> str:
+    def _is_expired(self, created: float) -> bool:
+        """Check whether an entry created at the given epoch time is past the timeout."""
+        return time.time() - created > self.timeout
+
+    def _is_dead(self, created: float) -> bool:
+        """Check whether an entry is past both the timeout and the stale window."""
+        return time.time() - created > self.timeout + self.stale_seconds
+
+    def _remember(self, key: str, created: float, data: Any) -> None:
+        """Store an entry in the in-process tier, evicting the least recently used ones."""
+        with self._lock:
+            self._memory[key] = (created, data)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str, newer_than: float = 0) -> Optional[Tuple[float, Any]]:
         """
-        Get the file path for a cache key.
+        Read an entry from the disk tier.
 
         Args:
             key: Cache key
+            newer_than: Only read the entry if it was created after this epoch time
 
         Returns:
-            Path to the cache file
+            Tuple of (created, data) or None if the entry is missing, older or unreadable
         """
-        return os.path.join(self.cache_dir, f"{key}.cache")
+        try:
+            row = self._connect().execute("SELECT created, data FROM entries WHERE key = ? AND created > ?",
+                                          (key, newer_than)).fetchone()
+            if row is None:
+                return None
+            return row[0], pickle.loads(row[1])
+        except Exception:
+            # If there's any error reading the cache, treat it as a miss
+            return None
 
-    def get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+    def _touch(self, key: str) -> None:
+        """Mark an entry as recently used, writing access times to disk in batches."""
+        now = time.time()
+        with self._lock:
+            self._pending_access[key] = now
+            due = len(self._pending_access) >= 100 or now - self._access_flushed >= 30
+        if due:
+            self._flush_access()
+
+    def _flush_access(self) -> None:
+        """Write the pending access times to the disk tier in one transaction."""
+        with self._lock:
+            pending, self._pending_access = self._pending_access, {}
+            self._access_flushed = time.time()
+        if not pending:
+            return
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany("UPDATE entries SET accessed = ? WHERE key = ?",
+                             [(accessed, key) for key, accessed in pending.items()])
+            conn.execute("COMMIT")
+        except Exception as e:
+            # Access times only order evictions, so losing a batch is harmless
+            print(f"Error recording cache access times: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+
+    def _write_disk(self, key: str, created: float, data: Any) -> None:
         """
-        Get a cached response if available and not expired.
+        Write an entry to the disk tier.
+
+        Args:
+            key: Cache key
+            created: Epoch time the entry was created
+            data: Response data to cache
+        """
+        try:
+            payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            self._connect().execute(
+                "INSERT OR REPLACE INTO entries (key, created, accessed, size, data) VALUES (?, ?, ?, ?, ?)",
+                (key, created, created, len(payload), sqlite3.Binary(payload))
+            )
+        except Exception as e:
+            # Log error but continue
+            print(f"Error caching response: {e}")
+            return
+
+        # Summing sizes scans the table, so only check the budget every so often between sweeps
+        self._writes_since_budget_check += 1
+        if self._writes_since_budget_check >= 100:
+            self._writes_since_budget_check = 0
+            self._enforce_budget()
+
+    def _enforce_budget(self) -> int:
+        """
+        Evict least recently used entries until the disk tier fits in max_bytes.
+
+        Returns:
+            Number of entries evicted
+        """
+        self._flush_access()
+        conn = self._connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        # Delete the least recently used entries up to and including the one that covers the excess
+        cursor = conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            " SELECT key FROM ("
+            "  SELECT key, size, SUM(size) OVER (ORDER BY accessed, key) AS running FROM entries"
+            " ) WHERE running - size < ?)",
+            (total - self.max_bytes,)
+        )
+        evicted = max(cursor.rowcount, 0)
+
+        with self._lock:
+            self._stats['evictions'] += evicted
+        return evicted
+
+    def sweep(self) -> int:
+        """
+        Remove entries past the stale window and enforce the byte budget.
+
+        Returns:
+            Number of entries removed
+        """
+        conn = self._connect()
+        cursor = conn.execute("DELETE FROM entries WHERE created < ?",
+                              (time.time() - self.timeout - self.stale_seconds,))
+        removed = max(cursor.rowcount, 0)
+
+        with self._lock:
+            self._stats['evictions'] += removed
+            for key in [k for k, (created, _) in self._memory.items() if self._is_dead(created)]:
+                del self._memory[key]
+
+        return removed + self._enforce_budget() + self._remove_legacy_files()
+
+    def _remove_legacy_files(self, limit: int = 1000) -> int:
+        """
+        Delete a batch of per-entry files left behind by the old file-per-entry cache.
+
+        Args:
+            limit: Maximum number of files to delete in one call
+
+        Returns:
+            Number of files deleted
+        """
+        removed = 0
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if removed >= limit:
+                    break
+                if entry.name.endswith('.cache') and entry.is_file():
+                    try:
+                        os.remove(entry.path)
+                        removed += 1
+                    except OSError:
+                        continue
+        return removed
+
+    def _lookup(self, key: str, touch: bool = True) -> Optional[Tuple[float, Any, str]]:
+        """
+        Find an entry that is fresh or still within the stale window.
+
+        Args:
+            key: Cache key
+            touch: Whether to mark the entry as used; probes leave both tiers as they are
+
+        Returns:
+            Tuple of (created, data, tier name) or None if there is no usable entry
+        """
+        # Memory tier first
+        with self._lock:
+            memory = self._memory.get(key)
+            if memory is not None:
+                if not self._is_expired(memory[0]):
+                    if touch:
+                        self._memory.move_to_end(key)
+                    fresh = True
+                else:
+                    fresh = False
+                    if self._is_dead(memory[0]):
+                        del self._memory[key]
+                        memory = None
+
+        if memory is not None and fresh:
+            if touch:
+                self._touch(key)
+            return memory[0], memory[1], 'memory'
+
+        # Then the disk tier, where another worker may have refreshed an entry this process holds stale
+        entry = self._read_disk(key, memory[0] if memory is not None else 0)
+        if entry is not None and not self._is_dead(entry[0]):
+            if touch:
+                self._remember(key, entry[0], entry[1])
+                self._touch(key)
+            return entry[0], entry[1], 'disk'
+
+        if memory is not None:
+            if touch:
+                with self._lock:
+                    if key in self._memory:
+                        self._memory.move_to_end(key)
+                self._touch(key)
+            return memory[0], memory[1], 'memory'
+        return None
+
+    def get_entry(self, endpoint: str, params: Dict[str, Any],
+                  allow_stale: bool = True) -> Optional[Tuple[Any, bool]]:
+        """
+        Get a cached response together with whether it has expired.
+
+        Expired entries are still returned for stale_seconds after the timeout,
+        so callers can serve them while they refresh the data.
 
         Args:
             endpoint: API endpoint
             params: Request parameters
+            allow_stale: Whether to return expired entries that are still in the stale window
 
         Returns:
-            Cached response or None if not found or expired
+            Tuple of (cached response, is_stale) or None if nothing usable is cached
         """
-        key = self._get_cache_key(endpoint, params)
-        path = self._get_cache_path(key)
-
-        # Check if cache file exists
-        if not os.path.exists(path):
-            return None
+        self._ensure_sweeper()
+        found = self._lookup(self._get_cache_key(endpoint, params))
 
-        try:
-            # Load cache data
-            with open(path, "rb") as f:
-                timestamp, data = pickle.load(f)
+        with self._lock:
+            if found is None:
+                self._stats['misses'] += 1
+                return None
 
-            # Check if cache is expired
-            if datetime.utcnow() - timestamp > timedelta(seconds=self.timeout):
+            created, data, tier = found
+            stale = self._is_expired(created)
+            if stale and not allow_stale:
+                self._stats['misses'] += 1
                 return None
 
-            return data
-        except Exception:
-            # If there's any error reading the cache, return None
-            return None
+            self._stats['stale_hits' if stale else f'{tier}_hits'] += 1
+            return data, stale
+
+    def peek(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+        """
+        Get a usable cached response without counting it as a hit or miss.
+
+        Used to probe for alternative entries that could answer a request.
+
+        Args:
+            endpoint: API endpoint
+            params: Request parameters
+
+        Returns:
+            Cached response (possibly stale) or None if nothing usable is cached
+        """
+        found = self._lookup(self._get_cache_key(endpoint, params), touch=False)
+        return found[1] if found is not None else None
+
+    def expires_in(self, endpoint: str, params: Dict[str, Any]) -> Optional[float]:
+        """
+        Get how long a cached response stays fresh, without counting it as a hit or miss.
+
+        Args:
+            endpoint: API endpoint
+            params: Request parameters
+
+        Returns:
+            Seconds until the entry expires (negative once stale), or None if nothing usable is cached
+        """
+        found = self._lookup(self._get_cache_key(endpoint, params), touch=False)
+        return found[0] + self.timeout - time.time() if found is not None else None
+
+    def get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+        """
+        Get a cached response if available and not expired.
+
+        Cached values are shared between callers and must be treated as read-only.
+
+        Args:
+            endpoint: API endpoint
+            params: Request parameters
+
+        Returns:
+            Cached response or None if not found or expired
+        """
+        entry = self.get_entry(endpoint, params, allow_stale=False)
+        return entry[0] if entry is not None else None
 
     def set(self, endpoint: str, params: Dict[str, Any], data: Any) -> None:
         """
@@ -96,14 +453,21 @@ class APICache:
             params: Request parameters
             data: Response data to cache
         """
+        self._ensure_sweeper()
         key = self._get_cache_key(endpoint, params)
-        path = self._get_cache_path(key)
+        created = time.time()
 
-        try:
-            # Save cache data with timestamp
-            with open(path, "wb") as f:
-                pickle.dump((datetime.utcnow(), data), f)
-        except Exception as e:
-            # Log error but continue
-            print(f"Error caching response: {e}")
-            
\ No newline at end of file
+        self._remember(key, created, data)
+        self._write_disk(key, created, data)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get hit/miss counters for this cache.
+
+        Returns:
+            Dictionary with memory_hits, disk_hits, stale_hits, misses, evictions and memory_entries
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        return stats
@@ -0,0 +1,111 @@
+# modules/literature_search/circuit_breaker.py
+
+import threading
+import time
+from typing import Dict
+
+
+class CircuitOpenError(Exception):
+    """Raised when a source is skipped because its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for an upstream literature source.
+
+    The breaker opens after failure_threshold consecutive failures and rejects
+    requests until recovery_timeout has passed. It then lets a single probe
+    request through (half-open); a successful probe closes the breaker and a
+    failed one opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # Process-wide breakers, one per source
+    _registry: Dict[str, "CircuitBreaker"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            name: Name of the source this breaker protects
+            failure_threshold: Consecutive failures before the breaker opens
+            recovery_timeout: Seconds to wait before probing an open source again
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_source(cls, name: str, failure_threshold: int = 5,
+                   recovery_timeout: float = 30.0) -> "CircuitBreaker":
+        """
+        Get the process-wide breaker for a source, creating it on first use.
+
+        Args:
+            name: Name of the source
+            failure_threshold: Consecutive failures before the breaker opens
+            recovery_timeout: Seconds to wait before probing an open source again
+
+        Returns:
+            The shared CircuitBreaker instance
+        """
+        with cls._registry_lock:
+            if name not in cls._registry:
+                cls._registry[name] = cls(name, failure_threshold, recovery_timeout)
+            return cls._registry[name]
+
+    @property
+    def state(self) -> str:
+        """Current state, moving an open breaker to half-open once the recovery timeout has passed."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request to the source may be made now.
+
+        In the half-open state only one probe is allowed until it reports back.
+
+        Returns:
+            True if the request may proceed
+        """
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful request, closing the breaker."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the breaker if the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"Circuit breaker for {self.name} opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
@@ -0,0 +1,379 @@
+# modules/literature_search/citation_crawler.py
+
+"""Offline crawler filling the citations table from the reference lists of saved papers."""
+
+import os
+import re
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from sqlalchemy import or_, select
+
+try:
+    import fcntl
+except ImportError:  # Windows: crawls aren't kept from overlapping
+    fcntl = None
+
+from models import db, Citation, CitationCrawl, Paper
+from modules.literature_search.config import LiteratureSearchConfig
+from modules.literature_search.db_utils import conflict_insert
+from modules.literature_search.dedup import normalize_doi
+from modules.literature_search.http_pool import get_session
+from modules.literature_search.rate_limiter import TokenBucket
+from modules.literature_search.service import LiteratureSearchService
+
+_YEAR = re.compile(r'\d{4}')
+
+
+class ReferenceSource:
+    """
+    Base class for metadata services listing the references of a paper by DOI.
+
+    Subclasses implement _fetch_references; requests are paced by a token
+    bucket per source, shared by all worker processes.
+    """
+
+    name = 'base'
+
+    def __init__(self, base_url: str, rate: float = 1.0):
+        """
+        Initialize the source.
+
+        Args:
+            base_url: Root URL of the service
+            rate: Requests per second allowed, across all workers
+        """
+        self.base_url = base_url.rstrip('/')
+        self.bucket = TokenBucket.shared(f"references-{self.name}", rate,
+                                         state_dir=LiteratureSearchConfig.RATE_LIMIT_DIR)
+
+    @property
+    def session(self) -> requests.Session:
+        """Shared keep-alive session for this source's host."""
+        return get_session(self.base_url)
+
+    def get_references(self, doi: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the works a paper cites.
+
+        Args:
+            doi: DOI of the citing paper
+
+        Returns:
+            Paper dictionaries of the cited works, or None if the source doesn't know the DOI
+        """
+        self.bucket.acquire()
+        return self._fetch_references(doi)
+
+    def _fetch_references(self, doi: str) -> Optional[List[Dict[str, Any]]]:
+        """Fetch the references of a paper; see get_references."""
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+class CrossrefReferenceSource(ReferenceSource):
+    """Reference lists deposited with Crossref by publishers."""
+
+    name = 'crossref'
+
+    def __init__(self, base_url: Optional[str] = None, rate: float = 5.0, mailto: Optional[str] = None):
+        """
+        Initialize the source.
+
+        Args:
+            base_url: Root URL of the Crossref REST API
+            rate: Requests per second allowed, across all workers
+            mailto: Contact address, which puts requests in Crossref's polite pool
+        """
+        super().__init__(base_url or LiteratureSearchConfig.CROSSREF_URL, rate)
+        self.mailto = mailto
+
+    def _fetch_references(self, doi: str) -> Optional[List[Dict[str, Any]]]:
+        """Fetch the references of a paper from its Crossref work record."""
+        params = {'mailto': self.mailto} if self.mailto else None
+        response = self.session.get(f"{self.base_url}/works/{urllib.parse.quote(doi)}", params=params,
+                                    timeout=LiteratureSearchConfig.HTTP_TIMEOUT)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        references = []
+        for reference in response.json().get('message', {}).get('reference') or []:
+            paper = self.format_reference(reference)
+            if paper is not None:
+                references.append(paper)
+        return references
+
+    def format_reference(self, reference: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Format a Crossref reference to standard structure.
+
+        Args:
+            reference: Entry of a work's 'reference' list
+
+        Returns:
+            Paper dictionary, or None if the reference has neither a DOI nor a title to match on
+        """
+        doi = normalize_doi(reference.get('DOI'))
+        if doi and len(doi) > 100:
+            doi = None
+        title = reference.get('article-title') or reference.get('volume-title') or reference.get('series-title')
+        if not doi and not title:
+            return None
+
+        year = _YEAR.search(reference.get('year') or '')
+        return {
+            # Saved papers need a title; a reference known only by DOI is titled with it until saved properly
+            'title': (title or doi)[:500],
+            'authors': reference.get('author', ''),
+            'abstract': '',
+            'doi': doi,
+            'url': f"https://doi.org/{doi}" if doi else None,
+            'journal': (reference.get('journal-title') or '')[:255],
+            'year': int(year.group()) if year else None,
+            'source_db': self.name,
+            'paper_id': doi or ''
+        }
+
+
+# Reference sources by name
+REFERENCE_SOURCES = {
+    'crossref': CrossrefReferenceSource,
+}
+
+
+def get_reference_source(name: str) -> ReferenceSource:
+    """
+    Create a reference source from the settings in LiteratureSearchConfig.
+
+    Args:
+        name: Name of the source
+
+    Returns:
+        The ReferenceSource instance
+    """
+    if name not in REFERENCE_SOURCES:
+        raise ValueError(f"Unsupported reference source: {name}")
+
+    rate = LiteratureSearchConfig.CITATION_SOURCE_RATES.get(name, 1.0)
+    if name == 'crossref':
+        return CrossrefReferenceSource(rate=rate, mailto=LiteratureSearchConfig.CROSSREF_MAILTO)
+    return REFERENCE_SOURCES[name](rate=rate)
+
+
+class CitationCrawler:
+    """
+    Fill the citations table from the reference lists of saved papers.
+
+    Papers with a DOI are crawled in ID order, in batches. Each batch's
+    reference lists are fetched concurrently, the cited works are resolved
+    to saved papers, new ones being saved, and the citation edges and the
+    outcome per paper are committed together. The outcomes are the
+    checkpoint: a crawl picks up with the papers that have none, and
+    retries failed fetches up to max_attempts times over later crawls.
+
+    Papers saved from reference lists aren't crawled themselves, so the
+    crawl stays within the library rather than following citations outward.
+    """
+
+    def __init__(self, source: ReferenceSource, concurrency: int = 4, batch_size: int = 20,
+                 max_attempts: int = 3, lock_path: str = "./cache/citation_crawler.lock"):
+        """
+        Initialize the crawler.
+
+        Args:
+            source: Metadata service to fetch reference lists from
+            concurrency: Reference lists fetched at once
+            batch_size: Papers written and checkpointed together
+            max_attempts: Failed fetches before a paper is left alone
+            lock_path: Lock file keeping crawls from overlapping
+        """
+        self.source = source
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.lock_path = lock_path
+        self.service = LiteratureSearchService()
+
+        os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+
+    @classmethod
+    def from_config(cls, source: Optional[str] = None) -> "CitationCrawler":
+        """Create a crawler with the settings in LiteratureSearchConfig."""
+        return cls(
+            get_reference_source(source or LiteratureSearchConfig.CITATION_SOURCE),
+            concurrency=LiteratureSearchConfig.CITATION_CRAWL_CONCURRENCY,
+            batch_size=LiteratureSearchConfig.CITATION_CRAWL_BATCH,
+            max_attempts=LiteratureSearchConfig.CITATION_CRAWL_MAX_ATTEMPTS,
+            lock_path=LiteratureSearchConfig.CITATION_CRAWL_LOCK
+        )
+
+    def pending(self, after: int = 0, limit: Optional[int] = None) -> List[Tuple[int, str]]:
+        """
+        Get papers whose references haven't been crawled from the source yet.
+
+        Args:
+            after: Only papers with a higher ID
+            limit: Maximum number of papers
+
+        Returns:
+            (paper ID, DOI) pairs in ID order
+        """
+        settled = select(CitationCrawl.paper_id).where(
+            CitationCrawl.source == self.source.name,
+            or_(CitationCrawl.status != 'error', CitationCrawl.attempts >= self.max_attempts)
+        )
+        query = select(Paper.id, Paper.doi). \
+            where(Paper.id > after, Paper.doi.isnot(None), Paper.doi != '', Paper.id.notin_(settled),
+                  or_(Paper.source_db.is_(None), Paper.source_db != self.source.name)). \
+            order_by(Paper.id). \
+            limit(limit or self.batch_size)
+        return [(paper_id, doi) for paper_id, doi in db.session.execute(query)]
+
+    def _fetch(self, doi: str) -> Tuple[str, Any]:
+        """Fetch one reference list, returning (status, references or error message)."""
+        try:
+            references = self.source.get_references(normalize_doi(doi) or doi)
+        except Exception as e:
+            return 'error', str(e)
+        if references is None:
+            return 'not_found', []
+        return 'done', references
+
+    def crawl(self, max_papers: Optional[int] = None) -> Dict[str, int]:
+        """
+        Crawl pending papers, committing after every batch.
+
+        Needs an application context for database access.
+
+        Args:
+            max_papers: Stop after this many papers, or None to crawl all pending papers
+
+        Returns:
+            Dictionary with the number of papers crawled, failed fetches and citations added
+        """
+        stats = {'papers': 0, 'errors': 0, 'citations': 0}
+        after = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="citation-crawler") as pool:
+            while max_papers is None or stats['papers'] < max_papers:
+                limit = self.batch_size if max_papers is None else min(self.batch_size,
+                                                                       max_papers - stats['papers'])
+                batch = self.pending(after, limit)
+                if not batch:
+                    break
+                after = batch[-1][0]
+
+                outcomes = list(pool.map(self._fetch, [doi for _, doi in batch]))
+                try:
+                    stats['citations'] += self._write(batch, outcomes)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error writing citations: {e}")
+                    outcomes = [('error', str(e))] * len(batch)
+                    self._checkpoint(batch, outcomes, {})
+                stats['papers'] += len(batch)
+                stats['errors'] += sum(1 for status, _ in outcomes if status == 'error')
+
+        return stats
+
+    def _write(self, batch: List[Tuple[int, str]], outcomes: List[Tuple[str, Any]]) -> int:
+        """Save a batch's cited works and citations, checkpoint it and commit; returns citations added."""
+        references = [reference for status, found in outcomes if status == 'done' for reference in found]
+        cited_ids = self.service.save_papers(references, None) if references else []
+
+        edges = {}
+        counts = {}
+        position = 0
+        for (paper_id, _), (status, found) in zip(batch, outcomes):
+            if status != 'done':
+                continue
+            cited = cited_ids[position:position + len(found)]
+            position += len(found)
+            counts[paper_id] = len(found)
+            for cited_id in cited:
+                if cited_id != paper_id:
+                    edges[(paper_id, cited_id)] = {'paper_id': paper_id, 'cited_paper_id': cited_id}
+
+        added = 0
+        rows = list(edges.values())
+        batch_size = LiteratureSearchConfig.SAVE_BATCH_SIZE
+        for start in range(0, len(rows), batch_size):
+            result = db.session.execute(
+                conflict_insert(Citation.__table__).values(rows[start:start + batch_size]).on_conflict_do_nothing()
+            )
+            added += max(result.rowcount or 0, 0)
+
+        self._checkpoint(batch, outcomes, counts)
+        return added
+
+    def _checkpoint(self, batch: List[Tuple[int, str]], outcomes: List[Tuple[str, Any]],
+                    counts: Dict[int, int]) -> None:
+        """Record the outcome for each paper of a batch and commit."""
+        existing = {
+            crawl.paper_id: crawl
+            for crawl in db.session.query(CitationCrawl).filter(
+                CitationCrawl.source == self.source.name,
+                CitationCrawl.paper_id.in_([paper_id for paper_id, _ in batch])
+            )
+        }
+        now = datetime.utcnow()
+        for (paper_id, _), (status, found) in zip(batch, outcomes):
+            crawl = existing.get(paper_id)
+            if crawl is None:
+                crawl = CitationCrawl(paper_id=paper_id, source=self.source.name, attempts=0)
+                db.session.add(crawl)
+            crawl.status = status
+            crawl.attempts = (crawl.attempts or 0) + 1
+            crawl.references_count = counts.get(paper_id, 0)
+            crawl.error = found[:500] if status == 'error' else None
+            crawl.crawled_at = now
+        db.session.commit()
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[bool]:
+        """Try to take the crawl lock, yielding whether it was taken."""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            locked = True
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    locked = False
+            yield locked
+        finally:
+            # Closing the descriptor also releases the file lock
+            os.close(fd)
+
+    def run(self, max_papers: Optional[int] = None) -> Optional[Dict[str, int]]:
+        """
+        Crawl unless another crawl is running.
+
+        Args:
+            max_papers: Stop after this many papers, or None to crawl all pending papers
+
+        Returns:
+            The stats of the crawl, or None if it was skipped
+        """
+        with self._exclusive() as locked:
+            if not locked:
+                return None
+            return self.crawl(max_papers)
+
+
+if __name__ == '__main__':
+    # Crawl from cron or by hand, e.g. python -m modules.literature_search.citation_crawler --max-papers 1000
+    import argparse
+
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description="Fill the citations table from reference lists")
+    parser.add_argument('--source', default=LiteratureSearchConfig.CITATION_SOURCE, choices=sorted(REFERENCE_SOURCES))
+    parser.add_argument('--max-papers', type=int, default=None)
+    args = parser.parse_args()
+
+    with create_app().app_context():
+        print(CitationCrawler.from_config(args.source).run(args.max_papers))
@@ -0,0 +1,436 @@
+# modules/literature_search/citation_graph.py
+
+"""In-memory citation graph over the citations table, for multi-hop queries."""
+
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Fall back to building the arrays and ranking in pure Python
+    np = None
+
+from sqlalchemy import func, select
+
+from models import db, Citation
+from modules.literature_search.config import LiteratureSearchConfig
+
+# Directions of traversal: along citations, against them, or both ways
+DIRECTIONS = ('out', 'in', 'both')
+
+
+def _csr(size: int, sources: array, targets: array):
+    """
+    Build a compressed sparse row adjacency from an edge list.
+
+    Args:
+        size: Number of nodes
+        sources: Source node of each edge
+        targets: Target node of each edge
+
+    Returns:
+        Tuple of (offsets, neighbors), as numpy arrays if numpy is installed:
+        the neighbors of node i are neighbors[offsets[i]:offsets[i + 1]]
+    """
+    if np is not None:
+        source_nodes = np.frombuffer(sources, dtype=np.int64) if sources else np.zeros(0, dtype=np.int64)
+        target_nodes = np.frombuffer(targets, dtype=np.int64) if targets else np.zeros(0, dtype=np.int64)
+        offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source_nodes, minlength=size), out=offsets[1:])
+        # A stable sort by source keeps each node's neighbors in edge order
+        return offsets, target_nodes[np.argsort(source_nodes, kind='stable')]
+
+    offsets = array('q', bytes(8 * (size + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    neighbors = array('q', bytes(8 * len(sources)))
+    fill = offsets[:size]
+    for source, target in zip(sources, targets):
+        neighbors[fill[source]] = target
+        fill[source] += 1
+    return offsets, neighbors
+
+
+def _pagerank(size: int, offsets, neighbors, damping: float, tolerance: float = 1e-8,
+              max_iterations: int = 100) -> List[float]:
+    """
+    PageRank of every node by power iteration, with dangling nodes' rank spread evenly.
+
+    Args:
+        size: Number of nodes
+        offsets: CSR offsets of the outgoing edges
+        neighbors: CSR targets of the outgoing edges
+        damping: Damping factor
+        tolerance: Total change in rank below which the iteration stops
+        max_iterations: Most iterations to run
+
+    Returns:
+        Rank of each node
+    """
+    if np is not None:
+        degrees = np.diff(offsets)
+        sources = np.repeat(np.arange(size), degrees)
+        dangling_nodes = degrees == 0
+        rank = np.full(size, 1.0 / size)
+        share = np.zeros(size)
+
+        for _ in range(max_iterations):
+            base = (1 - damping) / size + damping * rank[dangling_nodes].sum() / size
+            np.divide(rank, degrees, out=share, where=~dangling_nodes)
+            updated = np.bincount(neighbors, weights=damping * share[sources], minlength=size) + base
+
+            delta = np.abs(updated - rank).sum()
+            rank = updated
+            if delta < tolerance:
+                break
+        return rank.tolist()
+
+    degrees = [offsets[node + 1] - offsets[node] for node in range(size)]
+    rank = [1.0 / size] * size
+
+    for _ in range(max_iterations):
+        dangling = sum(rank[node] for node in range(size) if not degrees[node])
+        base = (1 - damping) / size + damping * dangling / size
+        updated = [base] * size
+        for node in range(size):
+            if degrees[node]:
+                share = damping * rank[node] / degrees[node]
+                for target in neighbors[offsets[node]:offsets[node + 1]]:
+                    updated[target] += share
+
+        delta = sum(abs(new - old) for new, old in zip(updated, rank))
+        rank = updated
+        if delta < tolerance:
+            break
+    return rank
+
+
+class CitationGraph:
+    """
+    Citation graph held as compressed sparse row arrays.
+
+    Papers are numbered densely in the order they first appear in a
+    citation; edges point from the citing paper to the cited one and are
+    kept in both directions, so citing and cited papers are each one array
+    slice away. Duplicate citations and self-citations are dropped.
+
+    The graph is refreshed from citations added since the last refresh,
+    found by ID, at most every refresh_interval seconds. Deleted citations
+    show up as a change in the row count and trigger a full reload; edits of
+    existing citation rows aren't picked up until then.
+    """
+
+    # Process-wide graphs, keyed by database URL
+    _registry: Dict[str, "CitationGraph"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, refresh_interval: float = 60, damping: float = 0.85):
+        """
+        Initialize an empty graph.
+
+        Args:
+            refresh_interval: Seconds between checks of the citations table
+            damping: PageRank damping factor
+        """
+        self.refresh_interval = refresh_interval
+        self.damping = damping
+        self._lock = threading.Lock()
+        self._clear()
+
+    @classmethod
+    def shared(cls) -> "CitationGraph":
+        """
+        Get the process-wide graph for the current database, creating it on first use.
+
+        Returns:
+            The shared CitationGraph instance
+        """
+        key = str(db.engine.url)
+        with cls._registry_lock:
+            if key not in cls._registry:
+                cls._registry[key] = cls(LiteratureSearchConfig.CITATION_GRAPH_REFRESH,
+                                         LiteratureSearchConfig.CITATION_GRAPH_DAMPING)
+            return cls._registry[key]
+
+    def _clear(self) -> None:
+        """Drop every node and edge."""
+        self._ids = array('q')  # Paper ID of each node
+        self._nodes: Dict[int, int] = {}  # Node of each paper ID
+        self._sources = array('q')  # Edge list, citing node -> cited node
+        self._targets = array('q')
+        self._out = _csr(0, self._sources, self._targets)
+        self._in = _csr(0, self._targets, self._sources)
+        self._last_id = 0  # Highest citation row ID loaded
+        self._rows = 0  # Citation rows loaded, including dropped ones
+        self._refreshed: Optional[float] = None
+        self._influence: Optional[List[float]] = None
+        self._version = getattr(self, '_version', 0) + 1  # Changes whenever the edges do
+
+    def _node(self, paper_id: int) -> int:
+        """Get the node of a paper, adding it if new."""
+        node = self._nodes.get(paper_id)
+        if node is None:
+            node = self._nodes[paper_id] = len(self._ids)
+            self._ids.append(paper_id)
+        return node
+
+    def _load(self, rows: List[Tuple[int, Optional[int], Optional[int]]]) -> None:
+        """Add citation rows to the graph and rebuild the adjacency arrays."""
+        loaded = len(self._sources)
+        added = {}
+        for row_id, citing, cited in rows:
+            self._last_id = max(self._last_id, row_id)
+            self._rows += 1
+            if citing is None or cited is None or citing == cited:
+                continue
+            added.setdefault((self._node(citing), self._node(cited)), None)
+
+        # Drop the edges the graph already has
+        if added and loaded:
+            if np is not None:
+                size = len(self._ids)
+                candidates = np.array(list(added), dtype=np.int64)
+                existing = np.frombuffer(self._sources, dtype=np.int64) * size + \
+                    np.frombuffer(self._targets, dtype=np.int64)
+                known = np.isin(candidates[:, 0] * size + candidates[:, 1], existing)
+                added = [edge for edge, is_known in zip(added, known.tolist()) if not is_known]
+                del existing
+            else:
+                offsets, neighbors = self._out
+                # Nodes added by this batch have no edges in the arrays yet
+                added = [(source, target) for source, target in added
+                         if not (source + 1 < len(offsets) and target in neighbors[offsets[source]:offsets[source + 1]])]
+
+        if added:
+            for source, target in added:
+                self._sources.append(source)
+                self._targets.append(target)
+
+            # Fresh arrays rather than updates in place, so readers holding the old ones are unaffected
+            self._out = _csr(len(self._ids), self._sources, self._targets)
+            self._in = _csr(len(self._ids), self._targets, self._sources)
+            self._influence = None
+            self._version += 1
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Load citations added since the last refresh.
+
+        Args:
+            force: Check the citations table even if the last check was recent
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._refreshed is not None and now - self._refreshed < self.refresh_interval:
+                return
+
+            rows = db.session.execute(
+                select(Citation.id, Citation.paper_id, Citation.cited_paper_id)
+                .where(Citation.id > self._last_id)
+                .order_by(Citation.id)
+            ).all()
+            self._load(rows)
+
+            # Deletions leave no trace to refresh from, but change the count
+            count = db.session.scalar(select(func.count(Citation.id)).where(Citation.id <= self._last_id))
+            if count != self._rows:
+                self._clear()
+                self._load(db.session.execute(
+                    select(Citation.id, Citation.paper_id, Citation.cited_paper_id).order_by(Citation.id)
+                ).all())
+
+            self._refreshed = now
+
+    def _adjacent(self, node: int, direction: str) -> Iterable[int]:
+        """Get the neighbors of a node in a direction."""
+        if direction != 'in':
+            offsets, neighbors = self._out
+            yield from neighbors[offsets[node]:offsets[node + 1]].tolist()
+        if direction != 'out':
+            offsets, neighbors = self._in
+            yield from neighbors[offsets[node]:offsets[node + 1]].tolist()
+
+    def neighborhoods(self, paper_ids: Iterable[int], hops: int = 2,
+                       direction: str = 'both') -> Dict[int, Dict[int, int]]:
+        """
+        Get the papers within a number of citation hops of each of several papers.
+
+        Args:
+            paper_ids: IDs of the papers to start from
+            hops: Maximum number of citations followed
+            direction: 'out' follows citations to cited papers, 'in' to citing
+                papers, 'both' either way
+
+        Returns:
+            For each paper ID, a dictionary of the IDs of the papers reached
+            (excluding itself) and their distance in hops
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction: {direction}")
+
+        self.refresh()
+        result = {}
+        with self._lock:
+            for paper_id in paper_ids:
+                start = self._nodes.get(paper_id)
+                if start is None:
+                    result[paper_id] = {}
+                    continue
+
+                distances = {start: 0}
+                frontier = [start]
+                for hop in range(1, hops + 1):
+                    reached = []
+                    for node in frontier:
+                        for neighbor in self._adjacent(node, direction):
+                            if neighbor not in distances:
+                                distances[neighbor] = hop
+                                reached.append(neighbor)
+                    frontier = reached
+                    if not frontier:
+                        break
+
+                del distances[start]
+                result[paper_id] = {self._ids[node]: hop for node, hop in distances.items()}
+        return result
+
+    def neighborhood(self, paper_id: int, hops: int = 2, direction: str = 'both') -> Dict[int, int]:
+        """
+        Get the papers within a number of citation hops of a paper.
+
+        Args:
+            paper_id: ID of the paper to start from
+            hops: Maximum number of citations followed
+            direction: 'out', 'in' or 'both', as for neighborhoods
+
+        Returns:
+            Dictionary of the IDs of the papers reached and their distance in hops
+        """
+        return self.neighborhoods([paper_id], hops, direction)[paper_id]
+
+    def _shared_neighbors(self, paper_ids: Iterable[int], first: str, second: str,
+                           top: Optional[int]) -> Dict[int, List[Tuple[int, int]]]:
+        """Count the papers reached by one step in the first direction, then one in the second."""
+        self.refresh()
+        result = {}
+        with self._lock:
+            for paper_id in paper_ids:
+                start = self._nodes.get(paper_id)
+                counts = Counter()
+                if start is not None:
+                    for middle in self._adjacent(start, first):
+                        counts.update(node for node in self._adjacent(middle, second) if node != start)
+                ranked = sorted(counts.items(), key=lambda item: (-item[1], self._ids[item[0]]))
+                result[paper_id] = [(self._ids[node], count) for node, count in ranked[:top]]
+        return result
+
+    def co_citations(self, paper_ids: Iterable[int],
+                     top: Optional[int] = None) -> Dict[int, List[Tuple[int, int]]]:
+        """
+        Get the papers most often cited together with each of several papers.
+
+        Args:
+            paper_ids: IDs of the papers
+            top: Maximum number of co-cited papers per paper, or None for all
+
+        Returns:
+            For each paper ID, (paper ID, number of papers citing both) pairs,
+            most co-cited first
+        """
+        return self._shared_neighbors(paper_ids, 'in', 'out', top)
+
+    def couplings(self, paper_ids: Iterable[int],
+                  top: Optional[int] = None) -> Dict[int, List[Tuple[int, int]]]:
+        """
+        Get the papers sharing the most references with each of several papers.
+
+        Args:
+            paper_ids: IDs of the papers
+            top: Maximum number of coupled papers per paper, or None for all
+
+        Returns:
+            For each paper ID, (paper ID, number of shared references) pairs,
+            most coupled first
+        """
+        return self._shared_neighbors(paper_ids, 'out', 'in', top)
+
+    def influence(self, paper_ids: Iterable[int]) -> Dict[int, float]:
+        """
+        Get PageRank influence scores of papers.
+
+        Scores are scaled so the average paper in the graph scores 1. They are
+        computed for the whole graph at once, without holding the graph lock,
+        and reused until it changes.
+
+        Args:
+            paper_ids: IDs of the papers
+
+        Returns:
+            Dictionary of scores by paper ID, for the papers in the graph
+        """
+        self.refresh()
+        with self._lock:
+            if not self._ids:
+                return {}
+            influence = self._influence
+            version, size, (offsets, neighbors) = self._version, len(self._ids), self._out
+
+        if influence is None:
+            # Other queries and refreshes go ahead meanwhile; the arrays are never modified in place
+            influence = [rank * size for rank in _pagerank(size, offsets, neighbors, self.damping)]
+
+        with self._lock:
+            if self._version == version:
+                self._influence = influence
+            return {
+                paper_id: influence[self._nodes[paper_id]]
+                for paper_id in paper_ids if paper_id in self._nodes and self._nodes[paper_id] < size
+            }
+
+    def related(self, paper_id: int, limit: int = 10) -> List[Dict[str, float]]:
+        """
+        Get the papers most closely related to a paper by citations.
+
+        Relatedness adds up direct citations either way, co-citations and
+        shared references, one point each; ties go to the more influential paper.
+
+        Args:
+            paper_id: ID of the paper
+            limit: Maximum number of related papers
+
+        Returns:
+            Dictionaries with the related 'paper_id', its 'score', whether the
+            paper cites it ('cited') or it cites the paper ('citing'), the
+            'co_citations' and shared references ('coupling') of the two, and
+            its 'influence', most related first
+        """
+        cited = self.neighborhood(paper_id, 1, 'out')
+        citing = self.neighborhood(paper_id, 1, 'in')
+        co_cited = dict(self.co_citations([paper_id])[paper_id])
+        coupled = dict(self.couplings([paper_id])[paper_id])
+
+        candidates = set(cited) | set(citing) | set(co_cited) | set(coupled)
+        influence = self.influence(candidates)
+
+        related = []
+        for candidate in candidates:
+            score = (candidate in cited) + (candidate in citing) + co_cited.get(candidate, 0) + \
+                coupled.get(candidate, 0)
+            related.append({
+                'paper_id': candidate,
+                'score': float(score),
+                'cited': candidate in cited,
+                'citing': candidate in citing,
+                'co_citations': co_cited.get(candidate, 0),
+                'coupling': coupled.get(candidate, 0),
+                'influence': round(influence.get(candidate, 0.0), 4)
+            })
+
+        related.sort(key=lambda item: (-item['score'], -item['influence'], item['paper_id']))
+        return related[:limit]
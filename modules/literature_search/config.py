@@ -7,12 +7,79 @@ class LiteratureSearchConfig:
     # API configuration
     PUBMED_EMAIL = "your-email@example.com"
     PUBMED_TOOL = "your-app-name"
+    PUBMED_API_KEY = None  # App-wide NCBI API key, used when the user hasn't configured one
+
+    # NCBI E-utilities rate limits, shared by all worker processes
+    PUBMED_RATE_LIMIT = 3.0  # Requests per second without an API key
+    PUBMED_RATE_LIMIT_WITH_KEY = 10.0  # Requests per second with an API key
+    RATE_LIMIT_DIR = "./cache/rate_limits"
+    PUBMED_HISTORY_PAGE_SIZE = 500  # Records per efetch page when streaming large result sets
+
+    # HTTP configuration (shared keep-alive sessions, one per API host)
+    HTTP_POOL_SIZE = 10  # Connections kept open per host
+    HTTP_TIMEOUT = 10  # Seconds before an upstream request times out
+    HTTP_MAX_RETRIES = 3  # Retries on connection errors, 429 and 5xx responses (NCBI 429s retry through its bucket)
+    HTTP_BACKOFF_FACTOR = 0.5  # Exponential backoff between retries: 0.5s, 1s, 2s, ...
 
     # Results configuration
     DEFAULT_MAX_RESULTS = 25
+    SAVE_BATCH_SIZE = 500  # Rows per INSERT statement when saving papers in bulk
+    KEYWORD_CACHE_ENTRIES = 10000  # Keyword text -> id entries interned per process
 
     # Cache configuration
     CACHE_ENABLED = True
     CACHE_TIMEOUT = 3600  # 1 hour
     CACHE_DIR = "./cache/literature_search"
-    
\ No newline at end of file
+    CACHE_MEMORY_ENTRIES = 512  # Entries kept in the in-process tier in front of the disk cache
+    CACHE_MAX_BYTES = 256 * 1024 * 1024  # Size budget for the on-disk cache file
+    CACHE_SWEEP_INTERVAL = 300  # Seconds between background sweeps of expired entries
+    CACHE_STALE_TTL = 86400  # Seconds expired entries may still be served while refreshing or during outages
+    CACHE_RESULT_TIERS = (25, 50, 100, 200, 500)  # Result counts searches are fetched and cached at
+    SINGLEFLIGHT_DIR = "./cache/inflight"  # Lock files coalescing identical requests across workers
+    SINGLEFLIGHT_WAIT = 30.0  # Seconds to wait for another worker's identical request before fetching anyway
+    RESULT_STORE_TTL = 3600  # Seconds stored search results answer new searches for the same query
+    RESULT_STORE_REPLAY_TTL = 7 * 86400  # Seconds stored results answer replays of a recent search
+
+    # Cache warming configuration
+    WARMER_ENABLED = True  # Keep the most popular searches cached in the background
+    WARMER_INTERVAL = 600  # Seconds between warming runs
+    WARMER_WINDOW = 7 * 86400  # Seconds of search history popularity is measured over
+    WARMER_TOP_N = 20  # Most popular searches warmed per source
+    WARMER_BUDGET = 40  # Upstream searches a warming run may make
+    WARMER_RATE = 0.2  # Upstream searches per second across all workers, leaving the rate limits to users
+    WARMER_LEAD_TIME = 900  # Seconds before expiry that cached results are refreshed
+    WARMER_LOCK = "./cache/warmer.lock"  # Lock file electing the one worker that warms
+
+    # Circuit breaker configuration (per source)
+    CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failures before a source is skipped
+    CIRCUIT_RECOVERY_TIMEOUT = 30  # Seconds before a skipped source is probed again
+
+    # Multi-source search configuration
+    ASYNC_CLIENTS = True  # Run searches on the asyncio clients (needs httpx), behind the same blocking interface
+    SEARCH_WORKERS = 8  # Threads shared by all concurrent source requests
+    MULTI_SOURCE_DEADLINE = 8.0  # Seconds to wait for all sources before returning partial results
+
+    # Relevance ranking of multi-source results (BM25 over title and abstract)
+    RANK_BM25_K1 = 1.2  # Term frequency saturation
+    RANK_BM25_B = 0.75  # Document length normalization
+    RANK_TITLE_BOOST = 2.0  # Weight of a title match relative to an abstract match
+    RANK_PRIOR_WEIGHT = 0.3  # Share of the score taken from each source's own result order
+
+    # Citation graph
+    CITATION_GRAPH_REFRESH = 60  # Seconds between checks of the citations table for new rows
+    CITATION_GRAPH_DAMPING = 0.85  # PageRank damping factor of influence scores
+
+    # Citation crawler
+    CITATION_SOURCE = 'crossref'  # Metadata source reference lists are fetched from
+    CITATION_SOURCE_RATES = {'crossref': 5.0}  # Reference requests per second per source, across all workers
+    CROSSREF_URL = "https://api.crossref.org"
+    CROSSREF_MAILTO = None  # Contact address sent to Crossref, for its polite pool
+    CITATION_CRAWL_CONCURRENCY = 4  # Reference lists fetched at once
+    CITATION_CRAWL_BATCH = 20  # Papers whose references are written and checkpointed together
+    CITATION_CRAWL_MAX_ATTEMPTS = 3  # Failed fetches before a paper is left alone
+    CITATION_CRAWL_LOCK = "./cache/citation_crawler.lock"  # Lock file keeping crawls from overlapping
+
+    # Similar papers (TF-IDF over titles and abstracts, reduced with truncated SVD; needs numpy)
+    SIMILARITY_DIR = "./cache/similarity"  # Index files, memory-mapped by every worker
+    SIMILARITY_FEATURES = 2 ** 17  # Hashed term features; the SVD components take FEATURES x DIMS floats
+    SIMILARITY_DIMS = 128  # Dimensions papers are reduced to
@@ -3,11 +3,17 @@ from dash import html, dcc, Input, Output, State, callback_context, ALL, MATCH
 import dash_bootstrap_components as dbc
 import requests
 import json
+import threading
+import uuid
 from datetime import datetime
 
 # Flag to determine if we're running standalone or in Flask
 STANDALONE_MODE = __name__ == "__main__"
 
+# Searches running in the background, by search ID, polled by the page until they are done
+_searches = {}
+_searches_lock = threading.Lock()
+
 # Define layout
 literature_layout = html.Div([
     dbc.Container([
@@ -189,6 +195,10 @@ literature_layout = html.Div([
     dcc.Store(id="literature-selected-paper-store"),
     dcc.Store(id="literature-selected-collection-store"),
     dcc.Store(id="literature-confirm-action-store"),
+    dcc.Store(id="literature-search-id-store"),
+
+    # Polls a running search so results show up as each source finishes
+    dcc.Interval(id="literature-search-poll", interval=500, disabled=True),
 ])
 
 # Mock data for standalone testing
@@ -397,6 +407,64 @@ def api_call(endpoint, method="get", params=None, json_data=None):
         return {"error": f"Unexpected error: {str(e)}"}
 
 
+def api_stream(endpoint, params=None):
+    """
+    Reads a Server-Sent Events API endpoint as it streams.
+
+    Args:
+        endpoint: API endpoint path (e.g., '/search/stream')
+        params: Query parameters
+
+    Yields:
+        Tuples of (event name, decoded JSON payload); failures arrive as a 'search-error' event
+    """
+    if STANDALONE_MODE:
+        print(f"[Standalone Mode] API Stream: GET {endpoint}")
+        results = MOCK_DATA["search_results"]
+        yield "batch", {"source": results["source"], "results": results["results"], "status": {"status": "ok"}}
+        yield "done", {"query": results["query"], "source": results["source"], "count": results["count"]}
+        return
+
+    full_url = f"{API_BASE_URL}{endpoint}"
+    print(f"[API Stream] GET {full_url}")
+    try:
+        with requests.get(full_url, params=params, stream=True) as response:
+            response.raise_for_status()
+
+            event = "message"
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    yield event, json.loads(line[len("data:"):])
+                    event = "message"
+    except (requests.RequestException, ValueError) as e:
+        print(f"[API Error] {e}")
+        yield "search-error", {"error": str(e)}
+
+
+def _run_search(search_id, params):
+    """Collect the batches of a streamed search into its progress entry, for the page to poll."""
+    for event, data in api_stream("/api/literature/search/stream", params=params):
+        with _searches_lock:
+            progress = _searches[search_id]
+            if event == "batch":
+                progress["results"].extend(data.get("results", []))
+                progress["sources"][data["source"]] = data.get("status", {})
+            elif event == "done":
+                progress["sources"].update(data.get("sources", {}))
+                progress["pending"] = False
+            elif event == "search-error":
+                progress["error"] = data.get("error", "Search failed")
+                progress["pending"] = False
+            progress["version"] += 1
+
+    with _searches_lock:
+        if _searches[search_id]["pending"]:
+            _searches[search_id]["pending"] = False
+            _searches[search_id]["version"] += 1
+
+
 def register_callbacks(dash_app):
     """Register all callbacks for the Dash app"""
 
@@ -414,6 +482,8 @@ def register_callbacks(dash_app):
         [
             Output("literature-search-results-store", "data"),
             Output("literature-search-loading", "children"),
+            Output("literature-search-id-store", "data"),
+            Output("literature-search-poll", "disabled"),
         ],
         [
             Input("literature-search-button", "n_clicks"),
@@ -427,7 +497,7 @@ def register_callbacks(dash_app):
     )
     def search_papers(n_clicks, query, source, max_results):
         if not n_clicks or not query:
-            return None, ""
+            return None, "", None, True
 
         params = {
             "query": query,
@@ -435,8 +505,51 @@ def register_callbacks(dash_app):
             "max_results": max_results
         }
 
-        results = api_call("/api/literature/search", params=params)
-        return results, ""
+        # Run the search in the background; the poll callback shows each source's results as they arrive
+        search_id = uuid.uuid4().hex
+        with _searches_lock:
+            _searches[search_id] = {"results": [], "sources": {}, "pending": True, "error": None,
+                                    "version": 0, "shown": 0}
+        threading.Thread(target=_run_search, args=(search_id, params), daemon=True).start()
+
+        return {"results": [], "count": 0, "pending": True}, "Searching...", search_id, False
+
+    # Show the results of a running search as they arrive
+    @dash_app.callback(
+        [
+            Output("literature-search-results-store", "data", allow_duplicate=True),
+            Output("literature-search-loading", "children", allow_duplicate=True),
+            Output("literature-search-poll", "disabled", allow_duplicate=True),
+        ],
+        [Input("literature-search-poll", "n_intervals")],
+        [State("literature-search-id-store", "data")],
+        prevent_initial_call=True,
+    )
+    def poll_search(_, search_id):
+        with _searches_lock:
+            progress = _searches.get(search_id)
+            if progress is None:
+                return dash.no_update, "", True
+
+            pending = progress["pending"]
+            if not pending:
+                del _searches[search_id]
+            elif progress["version"] == progress["shown"]:
+                # Nothing new since the last poll
+                return dash.no_update, dash.no_update, False
+            progress["shown"] = progress["version"]
+
+            if progress["error"] and not progress["results"]:
+                data = {"error": progress["error"]}
+            else:
+                data = {
+                    "results": list(progress["results"]),
+                    "count": len(progress["results"]),
+                    "sources": dict(progress["sources"]),
+                    "pending": pending
+                }
+
+        return data, "Searching..." if pending else "", not pending
 
     # Display search results
     @dash_app.callback(
@@ -455,6 +568,8 @@ def register_callbacks(dash_app):
         count = data.get("count", 0)
 
         if count == 0:
+            if data.get("pending"):
+                return html.Div("Searching...")
             return html.Div("No results found for your query.")
 
         result_cards = []
@@ -479,7 +594,7 @@ def register_callbacks(dash_app):
             )
 
         return html.Div([
-            html.H4(f"Found {count} results"),
+            html.H4(f"Found {count} results so far" if data.get("pending") else f"Found {count} results"),
             html.Div(result_cards),
         ])
 
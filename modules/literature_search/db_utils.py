@@ -0,0 +1,23 @@
+# modules/literature_search/db_utils.py
+
+"""Database helpers shared by the literature search service."""
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db
+
+
+def conflict_insert(table):
+    """
+    Start an INSERT that supports ON CONFLICT on the configured database.
+
+    Args:
+        table: Table to insert into
+
+    Returns:
+        A PostgreSQL or SQLite Insert construct, with on_conflict_do_nothing available
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return sqlite_insert(table)
+    return postgresql_insert(table)
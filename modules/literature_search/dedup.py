@@ -0,0 +1,354 @@
+# modules/literature_search/dedup.py
+
+"""Cross-source deduplication of paper records."""
+
+import random
+import re
+import unicodedata
+import zlib
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Prefixes people and APIs put in front of a bare DOI
+_DOI_PREFIX = re.compile(r'^(https?://(dx\.)?doi\.org/|doi:\s*)', re.IGNORECASE)
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+# Large prime for the MinHash permutations
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# Fields filled in from a duplicate when the kept record is missing them
+_MERGE_FIELDS = ('doi', 'abstract', 'url', 'published_date', 'year', 'full_text')
+# List fields whose terms are combined from every duplicate
+_MERGE_LIST_FIELDS = ('keywords', 'categories')
+
+
+def normalize_doi(doi: Optional[str]) -> Optional[str]:
+    """
+    Normalize a DOI for comparison.
+
+    DOIs are case-insensitive and often carry a resolver prefix, so
+    'https://doi.org/10.1000/ABC' and 'doi:10.1000/abc' compare equal.
+
+    Args:
+        doi: DOI in any common notation
+
+    Returns:
+        Lower-case bare DOI, or None if there is none
+    """
+    if not doi:
+        return None
+    doi = _DOI_PREFIX.sub('', doi.strip()).strip().lower()
+    return doi or None
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """
+    Reduce a title to lower-case ASCII words separated by single spaces.
+
+    Args:
+        title: Paper title
+
+    Returns:
+        Normalized title
+    """
+    if not title:
+        return ''
+    title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+    return _NON_ALNUM.sub(' ', title.lower()).strip()
+
+
+def title_shingles(title: Optional[str], size: int = 5) -> Set[str]:
+    """
+    Get the character shingles of a normalized title.
+
+    Args:
+        title: Paper title
+        size: Shingle length in characters
+
+    Returns:
+        Set of shingles, or a single shingle for very short titles
+    """
+    text = normalize_title(title)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def first_author_tokens(authors: Optional[str]) -> Set[str]:
+    """
+    Get the name tokens of the first author.
+
+    Sources disagree on name order ('Jane Smith' vs 'Smith Jane'), so names
+    are compared as token sets rather than strings.
+
+    Args:
+        authors: Comma-separated author list
+
+    Returns:
+        Set of normalized name tokens, empty if the authors are unknown
+    """
+    if not authors or authors == 'Unknown Authors':
+        return set()
+    return set(normalize_title(authors.split(',')[0]).split())
+
+
+def title_year_key(paper: Dict[str, Any]) -> Optional[Tuple[str, Optional[int]]]:
+    """
+    Key matching papers with the same normalized title and publication year.
+
+    Args:
+        paper: Paper dictionary in the standard client format
+
+    Returns:
+        Tuple of (normalized title, year), or None if the paper has no title
+    """
+    title = normalize_title(paper.get('title'))
+    if not title:
+        return None
+    try:
+        year = int(paper['year']) if paper.get('year') else None
+    except (TypeError, ValueError):
+        year = None
+    return title, year
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class PaperDeduplicator:
+    """
+    Incrementally merge duplicate papers from different sources.
+
+    Papers with the same normalized DOI are always merged. Papers without a
+    DOI match are compared by title: a MinHash signature of each title's
+    shingles is split into LSH bands, so only papers sharing a band bucket
+    are compared. This keeps deduplication close to linear in the number
+    of papers. Candidates are confirmed by exact shingle similarity and a
+    first-author check.
+
+    With exact_titles, as used when saving, similar titles are not enough:
+    papers match by DOI, by source ID, or by the same normalized title and
+    year, so "Part I" and "Part II" or an erratum and its article stay apart.
+
+    Kept records are copies of the first paper seen in each group, with a
+    'sources' list linking every source the paper was found in.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 32, bands: int = 8, exact_titles: bool = False):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            threshold: Minimum title shingle similarity for two papers to be duplicates
+            num_perm: Number of MinHash permutations in each signature
+            bands: Number of LSH bands the signature is split into (must divide num_perm)
+            exact_titles: Match by source ID and exact normalized title and year instead of similar titles
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.threshold = threshold
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.exact_titles = exact_titles
+
+        rng = random.Random(42)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+
+        self._records: List[Dict[str, Any]] = []
+        self._shingles: List[Set[str]] = []
+        self._signatures: List[List[int]] = []
+        self._by_doi: Dict[str, int] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._by_source: Dict[Tuple[str, str], int] = {}
+        self._by_title: Dict[Tuple[str, Optional[int]], int] = {}
+
+    def _signature(self, shingles: Set[str]) -> List[int]:
+        """Compute the MinHash signature of a shingle set."""
+        hashes = [zlib.crc32(s.encode()) for s in shingles]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        """Split a signature into its LSH bucket keys."""
+        return [(band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+
+    @staticmethod
+    def _source_link(paper: Dict[str, Any]) -> Dict[str, Any]:
+        """Describe where a paper record came from."""
+        return {
+            'source_db': paper.get('source_db'),
+            'paper_id': paper.get('paper_id'),
+            'url': paper.get('url'),
+        }
+
+    def _find_duplicate(self, paper: Dict[str, Any], doi: Optional[str], shingles: Set[str],
+                        signature: List[int]) -> Optional[int]:
+        """Find the index of an already seen record that paper duplicates."""
+        if doi and doi in self._by_doi:
+            return self._by_doi[doi]
+
+        if self.exact_titles:
+            return self._find_exact(paper, doi)
+
+        if not shingles:
+            return None
+
+        authors = first_author_tokens(paper.get('authors'))
+        # Signatures agree in roughly the Jaccard fraction of positions; use that as a cheap pre-filter
+        min_agreement = max(0.0, self.threshold - 0.2) * len(signature)
+        seen = set()
+        for key in self._band_keys(signature):
+            for index in self._buckets.get(key, ()):
+                if index in seen:
+                    continue
+                seen.add(index)
+
+                record = self._records[index]
+                record_doi = normalize_doi(record.get('doi'))
+                if doi and record_doi and doi != record_doi:
+                    # Different DOIs are different works, however similar the titles
+                    continue
+                agreement = sum(1 for x, y in zip(signature, self._signatures[index]) if x == y)
+                if agreement < min_agreement or jaccard(shingles, self._shingles[index]) < self.threshold:
+                    continue
+                record_authors = first_author_tokens(record.get('authors'))
+                if authors and record_authors and not authors & record_authors:
+                    continue
+                return index
+
+        return None
+
+    def _find_exact(self, paper: Dict[str, Any], doi: Optional[str]) -> Optional[int]:
+        """Find a record with the same source ID, or the same normalized title and year."""
+        if paper.get('source_db') and paper.get('paper_id'):
+            index = self._by_source.get((paper['source_db'], paper['paper_id']))
+            if index is not None:
+                return index
+
+        index = self._by_title.get(title_year_key(paper))
+        if index is None:
+            return None
+        record_doi = normalize_doi(self._records[index].get('doi'))
+        if doi and record_doi and doi != record_doi:
+            # Different DOIs are different works, even under the same title
+            return None
+        return index
+
+    def _index_exact(self, index: int, paper: Dict[str, Any]) -> None:
+        """Register a paper's source ID and title key for exact matching."""
+        if paper.get('source_db') and paper.get('paper_id'):
+            self._by_source.setdefault((paper['source_db'], paper['paper_id']), index)
+        key = title_year_key(paper)
+        if key is not None:
+            self._by_title.setdefault(key, index)
+
+    def _merge(self, index: int, paper: Dict[str, Any]) -> None:
+        """Fold a duplicate into the kept record."""
+        record = self._records[index]
+
+        link = self._source_link(paper)
+        if not any(s['source_db'] == link['source_db'] and s['paper_id'] == link['paper_id']
+                   for s in record['sources']):
+            record['sources'].append(link)
+
+        for field in _MERGE_FIELDS:
+            if not record.get(field) and paper.get(field):
+                record[field] = paper[field]
+
+        # Keep every source's terms, e.g. arXiv categories and PubMed MeSH keywords;
+        # a new list, so the cached paper dictionaries are left alone
+        for field in _MERGE_LIST_FIELDS:
+            if paper.get(field):
+                record[field] = list(dict.fromkeys(list(record.get(field) or []) + list(paper[field])))
+
+        # Prefer the journal of record over the preprint server
+        if record.get('journal') == 'arXiv' and paper.get('journal') and paper['journal'] != 'arXiv':
+            record['journal'] = paper['journal']
+
+        doi = normalize_doi(record.get('doi'))
+        if doi:
+            self._by_doi.setdefault(doi, index)
+        if self.exact_titles:
+            self._index_exact(index, paper)
+
+    def add(self, paper: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Add a paper, merging it into an earlier record if it is a duplicate.
+
+        Args:
+            paper: Paper dictionary in the standard client format
+
+        Returns:
+            The new kept record if the paper is new, or None if it was merged
+        """
+        doi = normalize_doi(paper.get('doi'))
+        shingles = set() if self.exact_titles else title_shingles(paper.get('title'))
+        signature = self._signature(shingles) if shingles else []
+
+        index = self._find_duplicate(paper, doi, shingles, signature)
+        if index is not None:
+            self._merge(index, paper)
+            return None
+
+        # Copy, so cached paper dictionaries are never modified by merges
+        record = dict(paper)
+        record['sources'] = [self._source_link(paper)]
+
+        index = len(self._records)
+        self._records.append(record)
+        self._shingles.append(shingles)
+        self._signatures.append(signature)
+        if doi:
+            self._by_doi[doi] = index
+        if self.exact_titles:
+            self._index_exact(index, paper)
+        for key in (self._band_keys(signature) if shingles else []):
+            self._buckets.setdefault(key, []).append(index)
+
+        return record
+
+    def find(self, paper: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Find the kept record a paper duplicates, without adding it.
+
+        Args:
+            paper: Paper dictionary in the standard client format
+
+        Returns:
+            The kept record, or None if the paper is new
+        """
+        doi = normalize_doi(paper.get('doi'))
+        shingles = set() if self.exact_titles else title_shingles(paper.get('title'))
+        signature = self._signature(shingles) if shingles else []
+        index = self._find_duplicate(paper, doi, shingles, signature)
+        return self._records[index] if index is not None else None
+
+    def is_duplicate(self, paper: Dict[str, Any]) -> bool:
+        """Check whether a paper duplicates one already added, without adding it."""
+        return self.find(paper) is not None
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        """Kept records, in the order their first copy was added."""
+        return list(self._records)
+
+
+def deduplicate_papers(papers: List[Dict[str, Any]], threshold: float = 0.8) -> List[Dict[str, Any]]:
+    """
+    Merge duplicate papers in a list of results.
+
+    Args:
+        papers: Paper dictionaries, possibly from several sources
+        threshold: Minimum title shingle similarity for two papers to be duplicates
+
+    Returns:
+        One record per distinct paper, in first-seen order, each with a 'sources' list
+    """
+    deduplicator = PaperDeduplicator(threshold=threshold)
+    for paper in papers:
+        deduplicator.add(paper)
+    return deduplicator.records
@@ -0,0 +1,184 @@
+# modules/literature_search/filters.py
+
+"""Structured search filters, translated into each source's native query syntax."""
+
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+# PubMed publication type tags for each paper type. Sources missing from a
+# type's mapping can't return papers of that type and are skipped.
+PAPER_TYPES = {
+    'preprint': {'arxiv': None, 'pubmed': 'preprint[pt]'},
+    'journal-article': {'pubmed': 'journal article[pt]'},
+    'review': {'pubmed': 'review[pt]'},
+    'clinical-trial': {'pubmed': 'clinical trial[pt]'},
+}
+
+# Open-ended ranges still need both bounds in the upstream syntax
+_EARLIEST_YEAR = 1800
+_LATEST_YEAR = 3000
+
+
+class SearchFilter:
+    """
+    Filters for a literature search.
+
+    The filters are pushed down into each source's query, so sources only
+    return matching papers and narrow filters don't waste the result budget
+    on papers that would be thrown away.
+    """
+
+    def __init__(self, year_from: Optional[int] = None, year_to: Optional[int] = None,
+                 sources: Optional[Sequence[str]] = None, paper_type: Optional[str] = None):
+        """
+        Initialize the filter.
+
+        Args:
+            year_from: Earliest publication year, inclusive
+            year_to: Latest publication year, inclusive
+            sources: Names of the sources to search, or None for all
+            paper_type: One of PAPER_TYPES, or None for any type
+        """
+        if paper_type is not None and paper_type not in PAPER_TYPES:
+            raise ValueError(f"Unsupported paper type: {paper_type}")
+        if year_from is not None and year_to is not None and year_from > year_to:
+            raise ValueError(f"Invalid year range: {year_from} to {year_to}")
+
+        self.year_from = year_from
+        self.year_to = year_to
+        self.sources = tuple(sorted(sources)) if sources else None
+        self.paper_type = paper_type
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, Any]) -> "SearchFilter":
+        """
+        Build a filter from request arguments.
+
+        Reads year_from, year_to, paper_type and sources (comma-separated).
+        Empty values are ignored.
+
+        Args:
+            args: Request arguments, e.g. request.args
+
+        Returns:
+            The SearchFilter
+        """
+        def year(name: str) -> Optional[int]:
+            value = (args.get(name) or '').strip()
+            if not value:
+                return None
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(f"Invalid {name}: {value}")
+
+        sources = [s.strip() for s in (args.get('sources') or '').split(',') if s.strip()]
+        return cls(
+            year_from=year('year_from'),
+            year_to=year('year_to'),
+            sources=sources or None,
+            paper_type=(args.get('paper_type') or '').strip() or None
+        )
+
+    def is_empty(self) -> bool:
+        """Whether the filter lets every paper through."""
+        return not self.to_params()
+
+    def to_params(self) -> Dict[str, Any]:
+        """
+        Get the filter settings that are set, e.g. for cache keys.
+
+        Returns:
+            Dictionary of the non-empty filter fields
+        """
+        params = {
+            'year_from': self.year_from,
+            'year_to': self.year_to,
+            'sources': list(self.sources) if self.sources else None,
+            'paper_type': self.paper_type,
+        }
+        return {name: value for name, value in params.items() if value is not None}
+
+    def allows_source(self, source: str) -> bool:
+        """Whether a source should be searched at all under this filter."""
+        if self.sources is not None and source not in self.sources:
+            return False
+        return self.paper_type is None or source in PAPER_TYPES[self.paper_type]
+
+    def arxiv_query(self, query: str) -> str:
+        """
+        Add the filter to an arXiv search_query.
+
+        Args:
+            query: The search query
+
+        Returns:
+            The query, restricted to the year range by submittedDate
+        """
+        if self.year_from is None and self.year_to is None:
+            return query
+
+        start = f"{self.year_from or _EARLIEST_YEAR}01010000"
+        end = f"{self.year_to or _LATEST_YEAR}12312359"
+        return f"({query}) AND submittedDate:[{start} TO {end}]"
+
+    def pubmed_term(self, query: str) -> str:
+        """
+        Add the paper type to an E-utilities search term.
+
+        Args:
+            query: The search query
+
+        Returns:
+            The term, restricted by publication type
+        """
+        tag = PAPER_TYPES[self.paper_type].get('pubmed') if self.paper_type else None
+        return f"({query}) AND {tag}" if tag else query
+
+    def pubmed_params(self) -> Dict[str, str]:
+        """
+        Get the esearch parameters for the year range.
+
+        Returns:
+            mindate, maxdate and datetype parameters, or an empty dictionary
+        """
+        if self.year_from is None and self.year_to is None:
+            return {}
+
+        # esearch needs both dates, so open ends are filled in
+        return {
+            'mindate': str(self.year_from or _EARLIEST_YEAR),
+            'maxdate': str(self.year_to or _LATEST_YEAR),
+            'datetype': 'pdat'
+        }
+
+    def matches(self, paper: Dict[str, Any]) -> bool:
+        """
+        Check a paper against the year range.
+
+        Sources apply the filter themselves; this catches papers whose
+        reported year disagrees with the date the source filtered on.
+
+        Args:
+            paper: Paper dictionary in the standard client format
+
+        Returns:
+            True if the paper is within the year range
+        """
+        if self.year_from is None and self.year_to is None:
+            return True
+
+        year = paper.get('year')
+        if not year:
+            published = paper.get('published_date')
+            year = published.year if isinstance(published, datetime) else None
+        if not year:
+            return False
+        if self.year_from is not None and year < self.year_from:
+            return False
+        if self.year_to is not None and year > self.year_to:
+            return False
+        return True
+
+    def __repr__(self):
+        return f"<SearchFilter {self.to_params()}>"
@@ -0,0 +1,93 @@
+# modules/literature_search/http_pool.py
+
+"""Shared HTTP sessions for the literature search clients."""
+
+import os
+import threading
+import urllib.parse
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from modules.literature_search.config import LiteratureSearchConfig
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Hosts whose clients pace themselves through a shared token bucket. A 429 from
+# them is retried by the client, so every retry takes a token like any request.
+BUCKET_LIMITED_HOSTS = frozenset(['eutils.ncbi.nlm.nih.gov'])
+
+# One session per (process, host), so keep-alive connections are reused across requests
+_sessions: Dict[Tuple[int, str], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _build_session(host: str) -> requests.Session:
+    """Create a session with a bounded connection pool and retry/backoff policy for a host."""
+    statuses = RETRY_STATUSES
+    if host in BUCKET_LIMITED_HOSTS:
+        statuses = tuple(status for status in RETRY_STATUSES if status != 429)
+
+    retry = Retry(
+        total=LiteratureSearchConfig.HTTP_MAX_RETRIES,
+        connect=LiteratureSearchConfig.HTTP_MAX_RETRIES,
+        read=LiteratureSearchConfig.HTTP_MAX_RETRIES,
+        status=LiteratureSearchConfig.HTTP_MAX_RETRIES,
+        backoff_factor=LiteratureSearchConfig.HTTP_BACKOFF_FACTOR,
+        status_forcelist=statuses,
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=LiteratureSearchConfig.HTTP_POOL_SIZE,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def retry_delay(response, attempt: int) -> float:
+    """
+    Seconds to wait before retrying a response.
+
+    Args:
+        response: The rejected response (requests or httpx)
+        attempt: Number of retries already made
+
+    Returns:
+        Its Retry-After header if it gives seconds, else exponential backoff
+    """
+    retry_after = response.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return float(retry_after)
+    return LiteratureSearchConfig.HTTP_BACKOFF_FACTOR * (2 ** attempt)
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Get the shared session for the host of a URL.
+
+    Sessions are created per process, so connections are never shared
+    between forked workers.
+
+    Args:
+        url: Any URL on the host to talk to
+
+    Returns:
+        A requests Session with keep-alive, pooling and retries configured
+    """
+    key = (os.getpid(), urllib.parse.urlsplit(url).netloc)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _build_session(key[1])
+            _sessions[key] = session
+        return session
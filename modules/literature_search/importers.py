@@ -0,0 +1,575 @@
+# modules/literature_search/importers.py
+
+"""Streaming import of BibTeX and RIS reference files (Zotero, EndNote, Mendeley exports) into the library."""
+
+import hashlib
+import itertools
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from models import db, paper_collections
+from modules.literature_search.config import LiteratureSearchConfig
+from modules.literature_search.dedup import normalize_doi, normalize_title
+
+IMPORT_FORMATS = ('bibtex', 'ris')
+
+# Source of imported papers; entries without a DOI get a content hash as their ID
+IMPORT_SOURCE = 'import'
+
+# Entries longer than this are taken to be malformed (e.g. an unbalanced brace) and skipped,
+# so a broken file can't make the parser buffer the rest of it
+MAX_ENTRY_CHARS = 1024 * 1024
+
+MONTHS = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+
+_ENTRY_START = re.compile(r'@\s*(\w+)\s*([{(])')
+_DELIMITERS = re.compile(r'[{}()"]')
+_FIELD_NAME = re.compile(r'\s*([^\s=,{}"#()]+)\s*=\s*')
+_BARE_VALUE = re.compile(r'[^\s,#{}()"]+')
+_RIS_LINE = re.compile(r'^([A-Z][A-Z0-9])  -(?: (.*))?$')
+_YEAR = re.compile(r'\d{4}')
+_MONTH = re.compile(r'^\d{4}[-/](\d{1,2})')
+
+# LaTeX accent commands and the combining characters they stand for
+_ACCENTS = {'"': '\u0308', "'": '\u0301', '`': '\u0300', '^': '\u0302', '~': '\u0303', '=': '\u0304',
+            '.': '\u0307', 'c': '\u0327', 'v': '\u030c', 'u': '\u0306', 'H': '\u030b', 'k': '\u0328'}
+_ACCENT = re.compile(r'\\([\'"`^~=.]|[cvuHk](?=[\s{]))\s*\{?\s*\\?([A-Za-z])\s*\}?')
+_ESCAPES = [('\\&', '&'), ('\\%', '%'), ('\\$', '$'), ('\\_', '_'), ('\\#', '#'), ('---', '\u2014'),
+            ('--', '\u2013'), ('~', ' ')]
+_COMMAND = re.compile(r'\\[A-Za-z]+\*?\s*')
+
+
+def latex_to_text(value: str) -> str:
+    """
+    Turn a BibTeX field value into plain text.
+
+    Handles accents, escaped special characters and dashes; other commands
+    are dropped, keeping their arguments (\\emph{word} becomes word).
+
+    Args:
+        value: Raw field value, without its outer delimiters
+
+    Returns:
+        Plain text with whitespace collapsed
+    """
+    value = _ACCENT.sub(lambda m: unicodedata.normalize('NFC', m.group(2) + _ACCENTS[m.group(1)]), value)
+    for escaped, text in _ESCAPES:
+        value = value.replace(escaped, text)
+    value = _COMMAND.sub('', value).replace('{', '').replace('}', '')
+    return ' '.join(value.split())
+
+
+def _bibtex_entries(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Split BibTeX text into (entry type, body) pairs, reading it a line at a time."""
+    entry_type = None
+    closing = None
+    depth = 0
+    quoted = False
+    parts: List[str] = []
+    size = 0
+
+    for line in lines:
+        while line:
+            if entry_type is None:
+                # Text between entries is a comment
+                match = _ENTRY_START.search(line)
+                if match is None:
+                    break
+                entry_type = match.group(1).lower()
+                closing = '}' if match.group(2) == '{' else ')'
+                depth, quoted, parts, size = 0, False, [], 0
+                line = line[match.end():]
+
+            end = None
+            for delimiter in _DELIMITERS.finditer(line):
+                char = delimiter.group()
+                if char == '{':
+                    depth += 1
+                elif char == '}' and depth > 0:
+                    depth -= 1
+                elif char == '"' and depth == 0:
+                    # Only matters in @entry(...), where a quoted value can hold a ')'
+                    quoted = not quoted
+                elif char == closing and depth == 0 and not quoted:
+                    end = delimiter.start()
+                    break
+
+            if end is None:
+                parts.append(line)
+                size += len(line)
+                if size > MAX_ENTRY_CHARS:
+                    print(f"Error importing BibTeX: skipping an unterminated @{entry_type} entry")
+                    entry_type = None
+                break
+
+            parts.append(line[:end])
+            yield entry_type, ''.join(parts)
+            entry_type = None
+            line = line[end + 1:]
+
+
+def _read_value(body: str, position: int, macros: Dict[str, str]) -> Tuple[str, int]:
+    """Read a field value, joining '#'-concatenated parts; returns the value and the position after it."""
+    parts = []
+    while True:
+        while position < len(body) and body[position].isspace():
+            position += 1
+        if position >= len(body):
+            break
+
+        char = body[position]
+        if char in '{"':
+            # Braced or quoted; braces inside either must balance
+            depth = 0
+            start = position + 1
+            position += 1
+            while position < len(body):
+                current = body[position]
+                if current == '{':
+                    depth += 1
+                elif current == '}':
+                    if depth == 0 and char == '{':
+                        break
+                    depth -= 1
+                elif current == '"' and char == '"' and depth == 0:
+                    break
+                position += 1
+            parts.append(body[start:position])
+            position += 1
+        else:
+            match = _BARE_VALUE.match(body, position)
+            if match is None:
+                break
+            token = match.group()
+            parts.append(token if token.isdigit() else macros.get(token.lower(), token))
+            position = match.end()
+
+        while position < len(body) and body[position].isspace():
+            position += 1
+        if position < len(body) and body[position] == '#':
+            position += 1
+            continue
+        break
+    return ''.join(parts), position
+
+
+def _read_fields(body: str, position: int, macros: Dict[str, str]) -> Dict[str, str]:
+    """Read 'name = value' pairs up to the end of an entry body."""
+    fields = {}
+    while position < len(body):
+        match = _FIELD_NAME.match(body, position)
+        if match is None:
+            # Skip junk up to the next field
+            comma = body.find(',', position)
+            if comma < 0:
+                break
+            position = comma + 1
+            continue
+        value, position = _read_value(body, match.end(), macros)
+        fields[match.group(1).lower()] = value
+        comma = body.find(',', position)
+        if comma < 0:
+            break
+        position = comma + 1
+    return fields
+
+
+def iter_bibtex(lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """
+    Parse BibTeX entries one at a time.
+
+    @string macros are expanded; @comment and @preamble are skipped.
+
+    Args:
+        lines: Lines of the file, read lazily
+
+    Returns:
+        Iterator of dictionaries of raw field values by lower-case field name,
+        with the entry type under 'ENTRYTYPE' and citation key under 'ID'
+    """
+    macros = dict((name, str(number)) for name, number in MONTHS.items())
+    for entry_type, body in _bibtex_entries(lines):
+        if entry_type in ('comment', 'preamble'):
+            continue
+        if entry_type == 'string':
+            macros.update({name: latex_to_text(value) for name, value in _read_fields(body, 0, macros).items()})
+            continue
+
+        comma = body.find(',')
+        fields = _read_fields(body, comma + 1, macros) if comma >= 0 else {}
+        fields['ENTRYTYPE'] = entry_type
+        fields['ID'] = body[:comma].strip() if comma >= 0 else body.strip()
+        yield fields
+
+
+def iter_ris(lines: Iterable[str]) -> Iterator[Dict[str, List[str]]]:
+    """
+    Parse RIS records one at a time.
+
+    Args:
+        lines: Lines of the file, read lazily
+
+    Returns:
+        Iterator of dictionaries of the values of each tag, in file order
+    """
+    record: Optional[Dict[str, List[str]]] = None
+    last_tag = None
+    size = 0
+    for line in lines:
+        line = line.rstrip('\r\n')
+        match = _RIS_LINE.match(line.lstrip('\ufeff'))
+        if match is None:
+            # Continuation of a long value
+            if record is not None and last_tag and line.strip():
+                record[last_tag][-1] += ' ' + line.strip()
+                size += len(line)
+            continue
+
+        tag, value = match.group(1), (match.group(2) or '').strip()
+        if tag == 'TY':
+            record, size = {}, 0
+        if record is None:
+            continue
+        if tag == 'ER':
+            yield record
+            record, last_tag = None, None
+            continue
+
+        record.setdefault(tag, []).append(value)
+        last_tag = tag
+        size += len(line)
+        if size > MAX_ENTRY_CHARS:
+            print("Error importing RIS: skipping a record without an ER line")
+            record, last_tag = None, None
+
+
+def _format_author(name: str) -> str:
+    """Turn 'Last, First' or 'Last, Jr, First' into 'First Last'."""
+    parts = [part.strip() for part in name.split(',')]
+    if len(parts) == 2:
+        return f"{parts[1]} {parts[0]}".strip()
+    if len(parts) >= 3:
+        return f"{parts[2]} {parts[0]} {parts[1]}".strip()
+    return name.strip()
+
+
+def _split_authors(value: str) -> List[str]:
+    """Split a BibTeX author list on 'and', leaving braced names such as {Barnes and Noble} whole."""
+    names = []
+    depth = 0
+    start = 0
+    for match in re.finditer(r'[{}]|\s+and\s+', value, re.IGNORECASE):
+        token = match.group()
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+        elif depth == 0:
+            names.append(value[start:match.start()])
+            start = match.end()
+    names.append(value[start:])
+    return [name for name in names if name.strip()]
+
+
+def _publication_date(year: Optional[int], month: Optional[int]) -> Optional[datetime]:
+    """Publication date, when the month is known as well as the year."""
+    if year is None or month is None or not 1 <= month <= 12:
+        return None
+    return datetime(year, month, 1)
+
+
+def _paper(title: str, authors: List[str], abstract: str, doi: Optional[str], url: Optional[str],
+           journal: str, year: Optional[int], month: Optional[int], keywords: List[str]) -> Optional[Dict[str, Any]]:
+    """Build a save_paper dictionary from parsed reference fields."""
+    if not title:
+        return None
+
+    doi = normalize_doi(doi)
+    if doi and len(doi) > 100:
+        doi = None
+    # Entries without a DOI get a stable ID, so importing the same file again matches them
+    paper_id = doi or hashlib.sha1(
+        f"{normalize_title(title)}|{year or ''}|{normalize_title(authors[0]) if authors else ''}".encode()
+    ).hexdigest()[:20]
+
+    return {
+        'title': title[:500],
+        'authors': ', '.join(authors),
+        'abstract': abstract,
+        'doi': doi,
+        'url': (url or (f"https://doi.org/{doi}" if doi else None) or '')[:500] or None,
+        'journal': journal[:255],
+        'published_date': _publication_date(year, month),
+        'year': year,
+        'source_db': IMPORT_SOURCE,
+        'paper_id': paper_id[:100],
+        # Longer keywords are usually free text that didn't split, and don't fit the keyword column
+        'keywords': [keyword for keyword in keywords if len(keyword) <= 100]
+    }
+
+
+def bibtex_to_paper(entry: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Map a parsed BibTeX entry to the save_paper dictionary schema.
+
+    Args:
+        entry: Entry as produced by iter_bibtex
+
+    Returns:
+        Paper dictionary, or None if the entry has no title
+    """
+    text = {name: latex_to_text(value) for name, value in entry.items() if name not in ('ENTRYTYPE', 'ID')}
+
+    # biblatex writes dates as date = {2020-05-01}
+    date = text.get('date', '')
+    year_match = _YEAR.search(text.get('year') or date)
+    month = text.get('month', '').lower()[:3]
+    month_match = _MONTH.match(date)
+    if month.isdigit():
+        month_number = int(month)
+    elif month in MONTHS:
+        month_number = MONTHS[month]
+    else:
+        month_number = int(month_match.group(1)) if month_match else None
+
+    authors = [_format_author(latex_to_text(name)) for name in _split_authors(entry.get('author', ''))]
+    return _paper(
+        title=text.get('title', ''),
+        authors=[name for name in authors if name.lower() != 'others'],
+        abstract=text.get('abstract', ''),
+        doi=text.get('doi'),
+        url=text.get('url'),
+        journal=text.get('journal') or text.get('journaltitle') or text.get('booktitle') or '',
+        year=int(year_match.group()) if year_match else None,
+        month=month_number,
+        keywords=[keyword.strip() for keyword in re.split(r'[,;]', text.get('keywords', '')) if keyword.strip()]
+    )
+
+
+def ris_to_paper(record: Dict[str, List[str]]) -> Optional[Dict[str, Any]]:
+    """
+    Map a parsed RIS record to the save_paper dictionary schema.
+
+    Args:
+        record: Record as produced by iter_ris
+
+    Returns:
+        Paper dictionary, or None if the record has no title
+    """
+    def first(*tags: str) -> str:
+        for tag in tags:
+            for value in record.get(tag, []):
+                if value:
+                    return value
+        return ''
+
+    date = first('PY', 'Y1', 'DA')
+    year_match = _YEAR.search(date)
+    month_match = _MONTH.match(date)
+
+    return _paper(
+        title=first('TI', 'T1', 'CT', 'BT'),
+        authors=[_format_author(name) for name in record.get('AU', []) + record.get('A1', []) if name],
+        abstract=first('AB', 'N2'),
+        doi=first('DO'),
+        url=first('UR', 'L2'),
+        journal=first('JO', 'JF', 'T2', 'JA', 'J2'),
+        year=int(year_match.group()) if year_match else None,
+        month=int(month_match.group(1)) if month_match else None,
+        keywords=[keyword for keyword in record.get('KW', []) if keyword]
+    )
+
+
+def detect_format(filename: Optional[str], first_line: str) -> str:
+    """
+    Work out whether a file is BibTeX or RIS.
+
+    Args:
+        filename: Name of the file, if known
+        first_line: First non-blank line of the file
+
+    Returns:
+        'bibtex' or 'ris'
+    """
+    extension = (filename or '').lower().rsplit('.', 1)[-1]
+    if extension in ('bib', 'bibtex'):
+        return 'bibtex'
+    if extension in ('ris', 'enw'):
+        return 'ris'
+    return 'ris' if _RIS_LINE.match(first_line.lstrip('\ufeff').rstrip('\r\n')) else 'bibtex'
+
+
+def iter_papers(lines: Iterable[str], fmt: Optional[str] = None,
+                filename: Optional[str] = None) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Parse a reference file into save_paper dictionaries, one entry at a time.
+
+    Args:
+        lines: Lines of the file, read lazily
+        fmt: 'bibtex' or 'ris', or None to detect it
+        filename: Name of the file, used to detect the format
+
+    Returns:
+        Iterator of paper dictionaries, with None for each entry skipped for lack of a title
+    """
+    lines = iter(lines)
+    if fmt is None:
+        head = list(itertools.islice(lines, 1))
+        while head and not head[0].strip():
+            head = list(itertools.islice(lines, 1))
+        fmt = detect_format(filename, head[0] if head else '')
+        lines = itertools.chain(head, lines)
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    if fmt == 'bibtex':
+        return (bibtex_to_paper(entry) for entry in iter_bibtex(lines))
+    return (ris_to_paper(record) for record in iter_ris(lines))
+
+
+class ReferenceImporter:
+    """
+    Import reference files into the library in chunks.
+
+    Entries are parsed lazily and saved SAVE_BATCH_SIZE at a time through
+    save_papers, which matches them against the library by DOI, source ID
+    or title, so only one chunk is ever held in memory. Each chunk is
+    committed on its own: an interrupted import keeps what it saved, and
+    importing the file again fills in the rest without duplicates.
+    """
+
+    def __init__(self, service, batch_size: Optional[int] = None):
+        """
+        Initialize the importer.
+
+        Args:
+            service: LiteratureSearchService used to save papers
+            batch_size: Entries saved per chunk
+        """
+        self.service = service
+        self.batch_size = batch_size or LiteratureSearchConfig.SAVE_BATCH_SIZE
+
+    def iter_import(self, lines: Iterable[str], user_id: int, fmt: Optional[str] = None,
+                    filename: Optional[str] = None, collection_id: Optional[int] = None) -> Iterator[Dict[str, int]]:
+        """
+        Import a reference file, reporting progress after every chunk.
+
+        Needs an application context for database access.
+
+        Args:
+            lines: Lines of the file, read lazily
+            user_id: User ID to associate with the papers
+            fmt: 'bibtex' or 'ris', or None to detect it
+            filename: Name of the file, used to detect the format
+            collection_id: Optional collection to add every imported paper to
+
+        Returns:
+            Iterator of running totals: entries read, papers 'saved' (new or
+            already in the library), 'created' (new), entries 'skipped' for
+            lack of a title, and papers 'collected' into the collection
+        """
+        stats = {'entries': 0, 'saved': 0, 'created': 0, 'skipped': 0, 'collected': 0}
+        reported = None
+
+        batch = []
+        for paper in iter_papers(lines, fmt, filename):
+            stats['entries'] += 1
+            if paper is None:
+                stats['skipped'] += 1
+                continue
+            batch.append(paper)
+            if len(batch) >= self.batch_size:
+                self._save(batch, user_id, collection_id, stats)
+                batch = []
+                reported = dict(stats)
+                yield reported
+
+        self._save(batch, user_id, collection_id, stats)
+        # Entries skipped after the last full chunk still count, and an empty file still gets its totals
+        if stats != reported:
+            yield dict(stats)
+
+    def import_references(self, lines: Iterable[str], user_id: int, fmt: Optional[str] = None,
+                          filename: Optional[str] = None, collection_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        Import a reference file.
+
+        Args:
+            lines: Lines of the file, read lazily
+            user_id: User ID to associate with the papers
+            fmt: 'bibtex' or 'ris', or None to detect it
+            filename: Name of the file, used to detect the format
+            collection_id: Optional collection to add every imported paper to
+
+        Returns:
+            The final totals, as reported by iter_import
+        """
+        stats = {}
+        for stats in self.iter_import(lines, user_id, fmt, filename, collection_id):
+            pass
+        return stats
+
+    def _save(self, batch: List[Dict[str, Any]], user_id: int, collection_id: Optional[int],
+              stats: Dict[str, int]) -> None:
+        """Save a chunk, add it to the collection and update the running totals."""
+        if not batch:
+            return
+
+        saved = self.service.save_papers_with_status(batch, user_id)
+        stats['saved'] += len(saved['paper_ids'])
+        stats['created'] += len(saved['created'])
+
+        if collection_id is not None:
+            stats['collected'] += self._collect(saved['paper_ids'], collection_id)
+
+    @staticmethod
+    def _collect(paper_ids: Iterable[int], collection_id: int) -> int:
+        """Add papers to a collection, skipping those already in it; returns the number added."""
+        paper_ids = set(paper_ids)
+        present = set(db.session.execute(
+            select(paper_collections.c.paper_id).where(
+                paper_collections.c.collection_id == collection_id,
+                paper_collections.c.paper_id.in_(paper_ids)
+            )
+        ).scalars())
+
+        rows = [{'paper_id': paper_id, 'collection_id': collection_id} for paper_id in sorted(paper_ids - present)]
+        if rows:
+            db.session.execute(paper_collections.insert(), rows)
+        db.session.commit()
+        return len(rows)
+
+
+if __name__ == '__main__':
+    # Import from the command line, e.g.
+    # python -m modules.literature_search.importers library.bib --user-id 1 --collection-name Thesis
+    import argparse
+
+    from app import create_app
+    from modules.literature_search.service import LiteratureSearchService
+
+    parser = argparse.ArgumentParser(description="Import a BibTeX or RIS file into the library")
+    parser.add_argument('path')
+    parser.add_argument('--user-id', type=int, required=True)
+    parser.add_argument('--format', choices=IMPORT_FORMATS, default=None)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--collection-id', type=int, default=None)
+    group.add_argument('--collection-name', default=None)
+    args = parser.parse_args()
+
+    with create_app().app_context():
+        service = LiteratureSearchService()
+        collection_id = args.collection_id
+        if args.collection_name:
+            collection_id = service.create_collection(args.collection_name, f"Imported from {args.path}",
+                                                      args.user_id).id
+
+        with open(args.path, encoding='utf-8-sig', errors='replace') as f:
+            for progress in ReferenceImporter(service).iter_import(f, args.user_id, args.format, args.path,
+                                                                   collection_id):
+                print(progress)
@@ -0,0 +1,181 @@
+# modules/literature_search/keyword_cache.py
+
+"""Process-wide interning of keyword text to Keyword ids."""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import db, Keyword
+from modules.literature_search.db_utils import conflict_insert
+
+# Session.info key holding keywords created in the session's open transaction
+_PENDING_KEY = 'literature_search_new_keywords'
+
+
+class KeywordCache:
+    """
+    Bounded map of keyword text to Keyword id, shared by every request in the process.
+
+    The keyword vocabulary is small and rows are never renamed, so an id once
+    seen stays valid. Entries are loaded lazily for the keywords a caller
+    asks for, and the least recently used are dropped once max_entries is
+    reached. Keywords created through the cache are only added once their
+    transaction commits, so a rollback can't leave ids of rows that never
+    existed; deleting a Keyword through the ORM drops its entry.
+    """
+
+    _instance: Optional["KeywordCache"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of keywords kept in memory
+        """
+        self.max_entries = max_entries
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'created': 0}
+
+    @classmethod
+    def shared(cls, max_entries: int = 10000) -> "KeywordCache":
+        """
+        Get the process-wide keyword cache, creating it on first use.
+
+        Args:
+            max_entries: Maximum number of keywords kept in memory
+
+        Returns:
+            The shared KeywordCache instance
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(max_entries)
+            return cls._instance
+
+    def _remember(self, ids: Dict[str, int]) -> None:
+        """Add entries, evicting the least recently used beyond max_entries."""
+        with self._lock:
+            for keyword, keyword_id in ids.items():
+                self._ids[keyword] = keyword_id
+                self._ids.move_to_end(keyword)
+            while len(self._ids) > self.max_entries:
+                self._ids.popitem(last=False)
+
+    def invalidate(self, keywords: Optional[Iterable[str]] = None) -> None:
+        """
+        Drop cached entries.
+
+        Args:
+            keywords: Keywords to drop, or None to clear the whole cache
+        """
+        with self._lock:
+            if keywords is None:
+                self._ids.clear()
+            else:
+                for keyword in keywords:
+                    self._ids.pop(keyword, None)
+
+    def lookup(self, keywords: Iterable[str]) -> Dict[str, int]:
+        """
+        Get the ids of existing keywords.
+
+        Args:
+            keywords: Keyword texts
+
+        Returns:
+            Mapping of keyword text to id, for the keywords that exist
+        """
+        wanted = set(keywords)
+        found: Dict[str, int] = {}
+        with self._lock:
+            for keyword in wanted:
+                keyword_id = self._ids.get(keyword)
+                if keyword_id is not None:
+                    self._ids.move_to_end(keyword)
+                    found[keyword] = keyword_id
+            self._stats['hits'] += len(found)
+            self._stats['misses'] += len(wanted) - len(found)
+
+        missing = wanted - found.keys()
+        if missing:
+            loaded = dict(db.session.execute(
+                select(Keyword.keyword, Keyword.id).where(Keyword.keyword.in_(missing))
+            ).all())
+            self._remember(loaded)
+            found.update(loaded)
+        return found
+
+    def resolve(self, keywords: Iterable[str]) -> Dict[str, int]:
+        """
+        Get the ids of keywords, creating any that don't exist yet.
+
+        New keywords are inserted in the caller's transaction with
+        INSERT ... ON CONFLICT DO NOTHING, so concurrent writers can't
+        create the same keyword twice. The caller commits.
+
+        Args:
+            keywords: Keyword texts
+
+        Returns:
+            Mapping of every keyword text to its id
+        """
+        wanted = set(keywords)
+        found = self.lookup(wanted)
+
+        missing = sorted(wanted - found.keys())
+        if missing:
+            db.session.execute(
+                conflict_insert(Keyword.__table__)
+                .values([{'keyword': keyword} for keyword in missing])
+                .on_conflict_do_nothing(index_elements=['keyword'])
+            )
+            created = dict(db.session.execute(
+                select(Keyword.keyword, Keyword.id).where(Keyword.keyword.in_(missing))
+            ).all())
+            found.update(created)
+
+            # Not visible to other transactions until commit, so cache them then
+            db.session.info.setdefault(_PENDING_KEY, {}).update(created)
+            with self._lock:
+                self._stats['created'] += len(created)
+        return found
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get counters for this cache.
+
+        Returns:
+            Dictionary with hits, misses, created and entries
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._ids)
+        return stats
+
+
+@event.listens_for(Session, 'after_commit')
+def _cache_committed_keywords(session):
+    """Cache keywords created in a transaction once it has committed."""
+    created = session.info.pop(_PENDING_KEY, None)
+    if created and KeywordCache._instance is not None:
+        KeywordCache._instance._remember(created)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_keywords(session):
+    """Forget keywords created in a transaction that rolled back."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+@event.listens_for(Keyword, 'after_delete')
+def _invalidate_deleted_keyword(mapper, connection, target):
+    """Drop a deleted keyword from the cache."""
+    if KeywordCache._instance is not None:
+        KeywordCache._instance.invalidate([target.keyword])
@@ -0,0 +1,309 @@
+# modules/literature_search/library_index.py
+
+"""Full-text search over the papers saved in the library."""
+
+import heapq
+import html
+import math
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, literal_column, select
+
+from models import db, Paper
+from modules.literature_search.config import LiteratureSearchConfig
+from modules.literature_search.dedup import normalize_title
+from modules.literature_search.ranking import tokenize
+
+# Text search configuration of the search_vector trigger; queries must use the same one
+TEXT_SEARCH_CONFIG = 'english'
+
+# ts_headline options: matches wrapped in <mark>, abstracts cut down to a couple of fragments
+TITLE_HEADLINE = 'HighlightAll=true, StartSel=<mark>, StopSel=</mark>'
+SNIPPET_HEADLINE = 'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2, ' \
+                   'FragmentDelimiter=" ... "'
+
+# Field weights, matching PostgreSQL's default weights for the A-D labels the trigger assigns
+FIELD_WEIGHTS = {'title': 1.0, 'authors': 0.4, 'abstract': 0.2, 'full_text': 0.1}
+
+# Characters of full text indexed, as in the trigger
+FULL_TEXT_LIMIT = 200000
+
+# Words of context in a snippet
+SNIPPET_WORDS = 35
+
+_WORD = re.compile(r'\w+')
+
+
+def _escaped(column):
+    """SQL expression for a text column with HTML special characters escaped."""
+    text = func.coalesce(column, '')
+    for char, entity in (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;')):
+        text = func.replace(text, char, entity)
+    return text
+
+
+def search_postgres(query: str, limit: int = 25, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Search the library through the search_vector GIN index.
+
+    Accepts web search syntax: quoted phrases, OR and -excluded words.
+
+    Args:
+        query: The search query
+        limit: Maximum number of hits to return
+        offset: Number of hits to skip
+
+    Returns:
+        Hits, best first; see LiteratureSearchService.search_library
+    """
+    tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+    vector = literal_column('papers.search_vector')
+    # Normalization 32 scales the rank into 0..1
+    rank = func.ts_rank_cd(vector, tsquery, 32)
+
+    # Rank through the index first, so only the returned page is highlighted
+    top = select(Paper.id, rank.label('score')). \
+        where(vector.op('@@')(tsquery)). \
+        order_by(rank.desc(), Paper.id). \
+        limit(limit). \
+        offset(offset). \
+        subquery()
+
+    snippet_text = func.coalesce(Paper.abstract, func.left(Paper.full_text, 20000))
+    rows = db.session.execute(
+        select(
+            Paper,
+            top.c.score,
+            func.ts_headline(TEXT_SEARCH_CONFIG, _escaped(Paper.title), tsquery, TITLE_HEADLINE),
+            func.ts_headline(TEXT_SEARCH_CONFIG, _escaped(snippet_text), tsquery, SNIPPET_HEADLINE)
+        ).
+        join(top, top.c.id == Paper.id).
+        order_by(top.c.score.desc(), Paper.id)
+    ).all()
+
+    return [
+        {'paper': paper, 'score': round(score, 4), 'title': title, 'snippet': snippet}
+        for paper, score, title, snippet in rows
+    ]
+
+
+def highlight(text: Optional[str], terms: Iterable[str]) -> str:
+    """
+    HTML-escape text, wrapping words that match search terms in <mark>.
+
+    Args:
+        text: Text to highlight
+        terms: Search terms, as produced by tokenize
+
+    Returns:
+        The highlighted text
+    """
+    return _highlight_span(text or '', set(terms), 0, len(text or ''))
+
+
+def _highlight_span(text: str, terms: set, start: int, end: int) -> str:
+    """Highlight text[start:end]."""
+    parts = []
+    position = start
+    for match in _WORD.finditer(text, start, end):
+        if normalize_title(match.group()) in terms:
+            parts.append(html.escape(text[position:match.start()]))
+            parts.append(f"<mark>{html.escape(match.group())}</mark>")
+            position = match.end()
+    parts.append(html.escape(text[position:end]))
+    return ''.join(parts)
+
+
+def snippet(text: Optional[str], terms: Iterable[str], words: int = SNIPPET_WORDS) -> str:
+    """
+    Cut a highlighted window of text around the first match.
+
+    Args:
+        text: Text to take the snippet from, e.g. an abstract
+        terms: Search terms, as produced by tokenize
+        words: Number of words in the window
+
+    Returns:
+        The highlighted snippet, with ' ... ' marking cut text
+    """
+    text = text or ''
+    terms = set(terms)
+    matches = list(_WORD.finditer(text))
+    if not matches:
+        return html.escape(text[:300])
+
+    first = next((i for i, match in enumerate(matches) if normalize_title(match.group()) in terms), 0)
+    lo = max(0, min(first - words // 3, len(matches) - words))
+    hi = min(len(matches), lo + words)
+
+    start = 0 if lo == 0 else matches[lo].start()
+    end = len(text) if hi == len(matches) else matches[hi - 1].end()
+    prefix = '... ' if start > 0 else ''
+    suffix = ' ...' if end < len(text) else ''
+    return prefix + _highlight_span(text, terms, start, end) + suffix
+
+
+class LibraryIndex:
+    """
+    In-process inverted index over the library, for databases without full-text search.
+
+    Title, authors, abstract and full text are indexed with the weights the
+    PostgreSQL index gives them, and hits are scored with BM25 over the
+    weighted term frequencies. Like websearch_to_tsquery, every query word
+    must match; unlike it, words aren't stemmed.
+
+    The index is built on first use and brought up to date before each
+    search from the papers updated since the last sync, so it also sees
+    papers saved by other processes. Deleted papers show up as a change in
+    the paper count and trigger a rebuild.
+    """
+
+    # Process-wide indexes, keyed by database URL
+    _registry: Dict[str, "LibraryIndex"] = {}
+    _registry_lock = threading.Lock()
+
+    # Papers updated this long before the last sync are indexed again, in case their
+    # transaction committed after it
+    SYNC_MARGIN = timedelta(seconds=60)
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Strength of document length normalization (0 to 1)
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_terms: Dict[int, List[str]] = {}
+        self._lengths: Dict[int, float] = {}
+        self._total_length = 0.0
+        self._synced_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "LibraryIndex":
+        """
+        Get the process-wide index for the current database, creating it on first use.
+
+        Returns:
+            The shared LibraryIndex instance
+        """
+        key = str(db.engine.url)
+        with cls._registry_lock:
+            if key not in cls._registry:
+                cls._registry[key] = cls(LiteratureSearchConfig.RANK_BM25_K1, LiteratureSearchConfig.RANK_BM25_B)
+            return cls._registry[key]
+
+    def _remove(self, paper_id: int) -> None:
+        """Drop a paper from the index."""
+        for term in self._doc_terms.pop(paper_id, []):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(paper_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(paper_id, 0.0)
+
+    def _add(self, paper_id: int, fields: Dict[str, Optional[str]]) -> None:
+        """Index a paper, replacing any earlier version of it."""
+        self._remove(paper_id)
+
+        weighted = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            text = fields.get(field) or ''
+            if field == 'full_text':
+                text = text[:FULL_TEXT_LIMIT]
+            for term in tokenize(text):
+                weighted[term] += weight
+
+        for term, tf in weighted.items():
+            self._postings.setdefault(term, {})[paper_id] = tf
+        self._doc_terms[paper_id] = list(weighted)
+        self._lengths[paper_id] = sum(weighted.values())
+        self._total_length += self._lengths[paper_id]
+
+    def sync(self) -> None:
+        """Bring the index up to date with the papers table."""
+        columns = select(Paper.id, Paper.title, Paper.authors, Paper.abstract, Paper.full_text)
+
+        with self._lock:
+            started = datetime.utcnow()
+            query = columns
+            if self._synced_at is not None:
+                query = columns.where(Paper.updated_at >= self._synced_at - self.SYNC_MARGIN)
+            for row in db.session.execute(query).mappings():
+                self._add(row['id'], row)
+
+            # Deletions leave no trace to sync from, but change the count
+            if db.session.scalar(select(func.count(Paper.id))) != len(self._lengths):
+                self._postings.clear()
+                self._doc_terms.clear()
+                self._lengths.clear()
+                self._total_length = 0.0
+                for row in db.session.execute(columns).mappings():
+                    self._add(row['id'], row)
+
+            self._synced_at = started
+
+    def search(self, query: str, limit: int = 25, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Search the library.
+
+        Args:
+            query: The search query
+            limit: Maximum number of hits to return
+            offset: Number of hits to skip
+
+        Returns:
+            Hits, best first; see LiteratureSearchService.search_library
+        """
+        self.sync()
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+
+            # Every word must match: walk the rarest term's papers only
+            candidates = set(min(postings, key=len))
+            for term_postings in postings:
+                candidates.intersection_update(term_postings)
+
+            total = len(self._lengths)
+            avg_length = self._total_length / total or 1.0
+            scores = dict.fromkeys(candidates, 0.0)
+            for term_postings in postings:
+                idf = math.log(1 + (total - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                for paper_id in candidates:
+                    norm = 1 - self.b + self.b * self._lengths[paper_id] / avg_length
+                    tf = term_postings[paper_id] / norm
+                    scores[paper_id] += idf * tf * (self.k1 + 1) / (tf + self.k1)
+
+        top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], -item[0]))[offset:]
+        papers = {paper.id: paper for paper in
+                  db.session.query(Paper).filter(Paper.id.in_([paper_id for paper_id, _ in top]))}
+
+        hits = []
+        for paper_id, score in top:
+            paper = papers.get(paper_id)
+            if paper is None:
+                continue
+            text = paper.abstract or (paper.full_text or '')[:20000]
+            hits.append({
+                'paper': paper,
+                # Scaled into 0..1 like ts_rank_cd's normalization 32
+                'score': round(score / (score + 1), 4),
+                'title': highlight(paper.title, terms),
+                'snippet': snippet(text, terms)
+            })
+        return hits
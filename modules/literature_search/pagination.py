@@ -0,0 +1,50 @@
+# modules/literature_search/pagination.py
+
+"""Opaque cursors for paging through search results."""
+
+from typing import Any, Dict
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+
+# Keeps cursors from being accepted anywhere else the secret key signs data
+_CURSOR_SALT = 'literature-search-cursor'
+
+
+def _serializer() -> URLSafeSerializer:
+    return URLSafeSerializer(current_app.secret_key, salt=_CURSOR_SALT)
+
+
+def encode_cursor(page: Dict[str, Any]) -> str:
+    """
+    Encode everything needed to fetch the next page into a cursor.
+
+    The cursor is signed with the app's secret key, so clients can pass it
+    back but can't construct or alter one.
+
+    Args:
+        page: JSON-serializable description of the next page
+
+    Returns:
+        URL-safe cursor string
+    """
+    return _serializer().dumps(page)
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor created by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a previous response
+
+    Returns:
+        The page description
+
+    Raises:
+        ValueError: If the cursor is malformed or was not issued by this app
+    """
+    try:
+        return _serializer().loads(cursor)
+    except BadSignature:
+        raise ValueError("Invalid cursor")
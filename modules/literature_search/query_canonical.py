@@ -0,0 +1,99 @@
+# modules/literature_search/query_canonical.py
+
+"""Canonical forms of search queries, so equivalent queries share cache entries."""
+
+import re
+import unicodedata
+from typing import List, Tuple, Union
+
+# Boolean operators of the arXiv and PubMed query syntaxes (upper case only, as both APIs require)
+OPERATORS = frozenset(['AND', 'OR', 'NOT', 'ANDNOT'])
+
+# A term runs until whitespace or a parenthesis, and may contain quoted phrases and
+# bracketed PubMed field tags, e.g. ti:"deep learning" or "breast cancer"[Title/Abstract]
+_TOKEN = re.compile(r'(?:[^\s()"\[]|"[^"]*"?|\[[^\]]*\]?)+|[()]')
+
+_Group = List[Union[str, "_Group"]]
+
+
+def _parse(tokens: List[str], position: int = 0, depth: int = 0) -> Tuple[_Group, int]:
+    """Parse tokens into nested groups, one level per parenthesis."""
+    group: _Group = []
+    while position < len(tokens):
+        token = tokens[position]
+        position += 1
+        if token == '(':
+            subgroup, position = _parse(tokens, position, depth + 1)
+            group.append(subgroup)
+        elif token == ')':
+            if depth > 0:
+                return group, position
+            # Nothing to close: skip it and keep parsing, rather than dropping the rest of the query
+        else:
+            group.append(token)
+    return group, position
+
+
+def _render(group: _Group) -> str:
+    """Render a group, ordering the operands of commutative operators."""
+    parts: List[str] = []
+    operands: List[str] = []
+    operators: List[str] = []
+    for item in group:
+        if isinstance(item, str) and item in OPERATORS:
+            operators.append(item)
+            parts.append(item)
+            continue
+
+        if parts and parts[-1] not in OPERATORS:
+            # Adjacent terms are implicitly ANDed by both APIs
+            operators.append(' ')
+        rendered = f"({_render(item)})" if isinstance(item, list) else item.lower()
+        operands.append(rendered)
+        parts.append(rendered)
+
+    kinds = set(operators)
+    if len(kinds) <= 1 and kinds <= {' ', 'AND', 'OR'} and len(operators) == len(operands) - 1:
+        # A chain of a single commutative operator means the same in any order
+        joiner = f" {operators[0]} " if operators and operators[0] != ' ' else ' '
+        return joiner.join(sorted(operands))
+
+    # Mixed or dangling operators: precedence differs between the APIs, so keep the order as written
+    return ' '.join(parts)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize the surface form of a query without changing its term order.
+
+    Applies Unicode compatibility normalization, collapses whitespace and
+    lower-cases everything except boolean operators.
+
+    Args:
+        query: The search query as entered
+
+    Returns:
+        The normalized query
+    """
+    query = unicodedata.normalize('NFKC', query or '')
+    return ' '.join(token if token in OPERATORS else token.lower() for token in query.split())
+
+
+def canonical_query(query: str) -> str:
+    """
+    Get the canonical form of a query, for use in cache keys.
+
+    On top of normalize_query, the operands of commutative boolean chains
+    (implicit AND, AND, OR) are sorted, so 'Machine  Learning' and
+    'learning machine' share one canonical form. Quoted phrases, field tags
+    and chains mixing different operators keep their order.
+
+    Args:
+        query: The search query as entered
+
+    Returns:
+        The canonical query
+    """
+    tokens = _TOKEN.findall(unicodedata.normalize('NFKC', query or ''))
+    group, _ = _parse(tokens)
+    return _render(group)
@@ -0,0 +1,163 @@
+# modules/literature_search/ranking.py
+
+"""Relevance ranking of merged search results."""
+
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from modules.literature_search.dedup import normalize_title
+
+# Function words, which say nothing about relevance. Content words like "study" or "analysis"
+# stay in: BM25's IDF already discounts them when they're common, and they can matter to a query.
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has in into is it its of on or that the these this to
+was were with via""".split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lower-case ASCII word tokens, dropping stopwords.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens in text order
+    """
+    return [token for token in normalize_title(text).split() if token not in STOPWORDS]
+
+
+def source_key(paper: Dict[str, Any]) -> Tuple[Any, Any]:
+    """Key identifying a record within its source."""
+    return paper.get('source_db'), paper.get('paper_id')
+
+
+class BM25Ranker:
+    """
+    Rank papers against a query with BM25 over title and abstract.
+
+    The two fields are combined BM25F-style: each field's term frequency is
+    normalized by that field's length, the title is weighted by title_boost,
+    and the weighted sum is saturated once per term. Token statistics are
+    computed once per result set into postings lists, so scoring walks only
+    the documents that contain each query term rather than every document.
+
+    The order each source returned its results in is its own relevance
+    judgement, so it is blended in as a prior.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, title_boost: float = 2.0,
+                 prior_weight: float = 0.3):
+        """
+        Initialize the ranker.
+
+        Args:
+            k1: Term frequency saturation
+            b: Strength of document length normalization (0 to 1)
+            title_boost: Weight of a title match relative to an abstract match
+            prior_weight: Share of the final score taken from the source order prior (0 to 1)
+        """
+        self.k1 = k1
+        self.b = b
+        self.title_boost = title_boost
+        self.prior_weight = prior_weight
+
+    def _postings(self, papers: List[Dict[str, Any]]) -> Dict[str, List[Tuple[int, float]]]:
+        """
+        Precompute the length-normalized, field-weighted term frequencies of each paper.
+
+        Returns:
+            Mapping of term to (paper index, weighted term frequency) pairs
+        """
+        fields = [(tokenize(p.get('title')), tokenize(p.get('abstract'))) for p in papers]
+        count = max(1, len(fields))
+        avg_title = sum(len(title) for title, _ in fields) / count or 1.0
+        avg_abstract = sum(len(abstract) for _, abstract in fields) / count or 1.0
+
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        for index, (title, abstract) in enumerate(fields):
+            title_norm = 1 - self.b + self.b * len(title) / avg_title
+            abstract_norm = 1 - self.b + self.b * len(abstract) / avg_abstract
+
+            weighted = Counter()
+            for term, tf in Counter(title).items():
+                weighted[term] += self.title_boost * tf / title_norm
+            for term, tf in Counter(abstract).items():
+                weighted[term] += tf / abstract_norm
+
+            for term, tf in weighted.items():
+                postings.setdefault(term, []).append((index, tf))
+        return postings
+
+    def scores(self, query: str, papers: List[Dict[str, Any]]) -> List[float]:
+        """
+        Compute the BM25 score of each paper for a query.
+
+        Args:
+            query: The search query
+            papers: Paper dictionaries
+
+        Returns:
+            Scores in the same order as papers
+        """
+        scores = [0.0] * len(papers)
+        terms = set(tokenize(query))
+        if not terms or not papers:
+            return scores
+
+        postings = self._postings(papers)
+        total = len(papers)
+        for term in terms:
+            docs = postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for index, tf in docs:
+                scores[index] += idf * tf * (self.k1 + 1) / (tf + self.k1)
+        return scores
+
+    def rank(self, query: str, papers: List[Dict[str, Any]],
+             source_ranks: Optional[Dict[Tuple[Any, Any], float]] = None) -> List[Dict[str, Any]]:
+        """
+        Order papers by relevance to a query.
+
+        Each paper gets a 'relevance' score between 0 and 1. Ties are broken by
+        publication date, newest first.
+
+        Args:
+            query: The search query
+            papers: Paper dictionaries, e.g. deduplicated results from several sources
+            source_ranks: Prior for each (source_db, paper_id), from 1 for a source's first
+                result down towards 0; see source_order_prior. Records merged from several
+                sources take their best prior.
+
+        Returns:
+            The papers, most relevant first
+        """
+        bm25 = self.scores(query, papers)
+        best = max(bm25, default=0.0) or 1.0
+        source_ranks = source_ranks or {}
+
+        for paper, score in zip(papers, bm25):
+            links = paper.get('sources') or [paper]
+            prior = max((source_ranks.get(source_key(link), 0.0) for link in links), default=0.0)
+            paper['relevance'] = round((1 - self.prior_weight) * score / best + self.prior_weight * prior, 4)
+
+        return sorted(papers, key=lambda p: (p['relevance'], p.get('published_date') or datetime.min),
+                      reverse=True)
+
+
+def source_order_prior(results: List[Dict[str, Any]]) -> Dict[Tuple[Any, Any], float]:
+    """
+    Turn one source's result order into a relevance prior.
+
+    Args:
+        results: Papers in the order the source ranked them
+
+    Returns:
+        Mapping of (source_db, paper_id) to a prior from 1 for the first result down towards 0
+    """
+    count = len(results)
+    return {source_key(paper): 1 - position / count for position, paper in enumerate(results)}
@@ -0,0 +1,181 @@
+# modules/literature_search/rate_limiter.py
+
+import asyncio
+import hashlib
+import os
+import struct
+import threading
+import time
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to an in-process lock only
+    fcntl = None
+
+from modules.literature_search.config import LiteratureSearchConfig
+
+# Bucket state on disk: available tokens and the epoch time they were last refilled
+_STATE = struct.Struct('dd')
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by every worker process on the machine.
+
+    The bucket state lives in a small file guarded by an exclusive file lock,
+    so all gunicorn workers draw from the same budget. Tokens are refilled
+    continuously at `rate` per second up to `capacity`.
+    """
+
+    # Process-wide buckets, keyed by name
+    _registry: Dict[str, "TokenBucket"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, rate: float, capacity: float = 1.0, state_dir: str = "./cache/rate_limits"):
+        """
+        Initialize the token bucket.
+
+        Args:
+            name: Name of the bucket, used for its state file
+            rate: Tokens added per second
+            capacity: Maximum number of tokens that can accumulate (burst size)
+            state_dir: Directory holding the bucket state files
+        """
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.path = os.path.join(state_dir, f"{name}.bucket")
+        self._lock = threading.Lock()
+
+        os.makedirs(state_dir, exist_ok=True)
+
+    @classmethod
+    def shared(cls, name: str, rate: float, capacity: float = 1.0,
+               state_dir: str = "./cache/rate_limits") -> "TokenBucket":
+        """
+        Get the process-wide bucket with the given name, creating it on first use.
+
+        Args:
+            name: Name of the bucket, used for its state file
+            rate: Tokens added per second
+            capacity: Maximum number of tokens that can accumulate (burst size)
+            state_dir: Directory holding the bucket state files
+
+        Returns:
+            The shared TokenBucket instance
+        """
+        with cls._registry_lock:
+            if name not in cls._registry:
+                cls._registry[name] = cls(name, rate, capacity, state_dir)
+            return cls._registry[name]
+
+    def _take(self, tokens: float) -> float:
+        """
+        Try to take tokens from the bucket.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            0 if the tokens were taken, otherwise the seconds to wait before trying again
+        """
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+
+                now = time.time()
+                raw = os.pread(fd, _STATE.size, 0)
+                if len(raw) == _STATE.size:
+                    available, updated = _STATE.unpack(raw)
+                    # Refill for the time elapsed since the last update (ignoring clock skew backwards)
+                    available = min(self.capacity, available + max(0.0, now - updated) * self.rate)
+                else:
+                    available = self.capacity
+
+                if available >= tokens:
+                    wait = 0.0
+                    available -= tokens
+                else:
+                    wait = (tokens - available) / self.rate
+
+                os.pwrite(fd, _STATE.pack(available, now), 0)
+                return wait
+            finally:
+                # Closing the descriptor also releases the file lock
+                os.close(fd)
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Block until tokens are available and take them.
+
+        Args:
+            tokens: Number of tokens to take
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if the tokens were taken, False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if wait <= 0:
+                return True
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+    async def acquire_async(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Wait without blocking the event loop until tokens are available, and take them.
+
+        Args:
+            tokens: Number of tokens to take
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if the tokens were taken, False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Taking the state file lock can block on other workers, so keep it off the event loop
+            wait = await asyncio.to_thread(self._take, tokens)
+            if wait <= 0:
+                return True
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            await asyncio.sleep(wait)
+
+
+def ncbi_bucket(api_key: Optional[str] = None) -> TokenBucket:
+    """
+    Get the shared token bucket for NCBI E-utilities requests.
+
+    NCBI allows 3 requests per second without an API key and 10 per second
+    for each API key, so keyed requests draw from their own bucket.
+
+    Args:
+        api_key: NCBI API key, if one is configured
+
+    Returns:
+        The TokenBucket every NCBI request for this key must acquire from
+    """
+    if api_key:
+        name = f"ncbi-{hashlib.sha1(api_key.encode()).hexdigest()[:12]}"
+        rate = LiteratureSearchConfig.PUBMED_RATE_LIMIT_WITH_KEY
+    else:
+        name = "ncbi"
+        rate = LiteratureSearchConfig.PUBMED_RATE_LIMIT
+
+    return TokenBucket.shared(name, rate, state_dir=LiteratureSearchConfig.RATE_LIMIT_DIR)
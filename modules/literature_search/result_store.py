@@ -0,0 +1,215 @@
+# modules/literature_search/result_store.py
+
+"""Search results persisted in the database, for replaying searches without going upstream."""
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Paper, SearchResultItem, SearchResultSet
+from modules.literature_search.filters import SearchFilter
+from modules.literature_search.query_canonical import canonical_query
+
+
+def _to_payload(paper: Dict[str, Any]) -> Dict[str, Any]:
+    """Make a paper dictionary JSON-serializable."""
+    payload = dict(paper)
+    if isinstance(payload.get('published_date'), datetime):
+        payload['published_date'] = payload['published_date'].isoformat()
+    return payload
+
+
+def _from_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore a paper dictionary stored with _to_payload."""
+    paper = dict(payload)
+    if isinstance(paper.get('published_date'), str):
+        try:
+            paper['published_date'] = datetime.fromisoformat(paper['published_date'])
+        except ValueError:
+            paper['published_date'] = None
+    return paper
+
+
+class SearchResultStore:
+    """
+    Store of ranked search results, keyed by normalized query.
+
+    Each distinct search (canonical query, source and filters) has one result
+    set, replaced whenever the search is run upstream again. Results are kept
+    as ordered items holding the paper dictionary, linked to the saved Paper
+    when there is one.
+    """
+
+    @staticmethod
+    def query_key(query: str, source: str, filters: Optional[SearchFilter] = None) -> str:
+        """
+        Get the key identifying a search.
+
+        Args:
+            query: The search query
+            source: Which database was searched
+            filters: Optional filters the search was restricted by
+
+        Returns:
+            Hex digest identifying the normalized search
+        """
+        params = filters.to_params() if filters is not None else {}
+        raw = json.dumps([canonical_query(query), source, params], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def _papers(result_set: SearchResultSet) -> List[Dict[str, Any]]:
+        """Get the papers of a result set, in ranked order."""
+        rows = db.session.execute(
+            select(SearchResultItem.payload)
+            .where(SearchResultItem.result_set_id == result_set.id)
+            .order_by(SearchResultItem.position)
+        ).scalars()
+        return [_from_payload(payload) for payload in rows]
+
+    def load(self, query: str, source: str, filters: Optional[SearchFilter], max_results: int,
+             max_age: float) -> Optional[Tuple[SearchResultSet, List[Dict[str, Any]]]]:
+        """
+        Get stored results for a search, if they are fresh enough and numerous enough.
+
+        Args:
+            query: The search query
+            source: Which database to search
+            filters: Optional filters to restrict the results
+            max_results: Number of results wanted
+            max_age: Oldest acceptable results, in seconds
+
+        Returns:
+            Tuple of (result set, up to max_results paper dictionaries), or None
+        """
+        key = self.query_key(query, source, filters)
+        result_set = db.session.query(SearchResultSet).filter_by(query_key=key).first()
+        if result_set is None or not self._usable(result_set, max_age):
+            return None
+
+        # A short set can only answer for more results if the sources had no more to give
+        if (result_set.results_count or 0) < max_results and not result_set.exhausted:
+            return None
+
+        return result_set, self._papers(result_set)[:max_results]
+
+    def load_result_set(self, result_set_id: int,
+                        max_age: float) -> Optional[Tuple[SearchResultSet, List[Dict[str, Any]]]]:
+        """
+        Get the stored results of a search history entry.
+
+        Args:
+            result_set_id: ID of the result set the history entry points to
+            max_age: Oldest acceptable results, in seconds
+
+        Returns:
+            Tuple of (result set, paper dictionaries), or None if missing or too old
+        """
+        result_set = db.session.get(SearchResultSet, result_set_id)
+        if result_set is None or not self._usable(result_set, max_age):
+            return None
+        return result_set, self._papers(result_set)
+
+    @staticmethod
+    def _usable(result_set: SearchResultSet, max_age: float) -> bool:
+        """Whether a result set is recent enough to serve."""
+        return result_set.fetched_at is not None and \
+            datetime.utcnow() - result_set.fetched_at <= timedelta(seconds=max_age)
+
+    @staticmethod
+    def exhausted(sources: Dict[str, Dict[str, Any]], papers: List[Dict[str, Any]], max_results: int) -> bool:
+        """
+        Check whether search results hold every match, so they can answer a request for more results.
+
+        Every source must have flagged itself 'exhausted', and nothing may
+        have been trimmed to fit max_results when their answers were combined.
+
+        Args:
+            sources: Per-source status flags of the search
+            papers: The combined results
+            max_results: Number of results that were asked for
+
+        Returns:
+            True if there are no more matches to fetch
+        """
+        return len(papers) < max_results and all(status.get('exhausted') for status in sources.values())
+
+    def save(self, query: str, source: str, filters: Optional[SearchFilter], max_results: int,
+             papers: List[Dict[str, Any]], exhausted: bool = False) -> Optional[SearchResultSet]:
+        """
+        Store the results of a search run upstream, replacing any older results for it.
+
+        Storing is best-effort: if another request stores the same search at the
+        same moment, this one gives way.
+
+        Args:
+            query: The search query
+            source: Which database was searched
+            filters: Optional filters the search was restricted by
+            max_results: Number of results that were asked for
+            papers: The results, in ranked order
+            exhausted: Whether every source returned all of its matches, so the results are the full set
+
+        Returns:
+            The stored SearchResultSet, or None if it couldn't be stored
+        """
+        key = self.query_key(query, source, filters)
+        try:
+            result_set = db.session.query(SearchResultSet).filter_by(query_key=key).first()
+            if result_set is None:
+                result_set = SearchResultSet(
+                    query_key=key,
+                    query=canonical_query(query)[:500],
+                    source_db=source,
+                    filters=filters.to_params() if filters is not None else {}
+                )
+                db.session.add(result_set)
+                db.session.flush()
+            else:
+                db.session.execute(delete(SearchResultItem).where(SearchResultItem.result_set_id == result_set.id))
+
+            # Kept as entered, so the warmer repeats the exact upstream request
+            result_set.query_text = query[:500]
+            result_set.requested = max_results
+            result_set.results_count = len(papers)
+            result_set.exhausted = exhausted
+            result_set.fetched_at = datetime.utcnow()
+
+            saved = self._saved_paper_ids(papers)
+            if papers:
+                db.session.execute(insert(SearchResultItem), [
+                    {
+                        'result_set_id': result_set.id,
+                        'position': position,
+                        'paper_id': saved.get((paper.get('source_db'), paper.get('paper_id'))),
+                        'payload': _to_payload(paper)
+                    }
+                    for position, paper in enumerate(papers)
+                ])
+            db.session.commit()
+            return result_set
+        except IntegrityError:
+            db.session.rollback()
+            return None
+
+    @staticmethod
+    def _saved_paper_ids(papers: List[Dict[str, Any]]) -> Dict[Tuple[Any, Any], int]:
+        """Find the saved Paper for each result, by any of the source IDs it was found under."""
+        links = {}
+        for paper in papers:
+            key = (paper.get('source_db'), paper.get('paper_id'))
+            for link in paper.get('sources') or [paper]:
+                if link.get('source_db') and link.get('paper_id'):
+                    links[(link['source_db'], link['paper_id'])] = key
+        if not links:
+            return {}
+
+        rows = db.session.execute(
+            select(Paper.id, Paper.source_db, Paper.paper_id)
+            .where(tuple_(Paper.source_db, Paper.paper_id).in_(list(links)))
+        ).all()
+        return {links[(source_db, source_paper_id)]: paper_id for paper_id, source_db, source_paper_id in rows}
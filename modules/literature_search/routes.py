@@ -1,5 +1,12 @@
-from flask import Blueprint, request, jsonify, current_app, render_template, flash, redirect, url_for
+import codecs
+import tempfile
+
+from flask import Blueprint, Response, request, jsonify, current_app, render_template, flash, redirect, url_for, \
+    stream_with_context
 from flask_login import login_required, current_user
+from modules.literature_search.filters import PAPER_TYPES, SearchFilter
+from modules.literature_search.importers import IMPORT_FORMATS, ReferenceImporter
+from modules.literature_search.pagination import decode_cursor, encode_cursor
 from modules.literature_search.service import LiteratureSearchService
 # Make sure to import the needed models
 from models import db, Collection, SearchQuery, paper_collections
@@ -15,7 +22,7 @@ literature_service = LiteratureSearchService()
 @login_required
 def search():
     """Render the literature search page."""
-    return render_template('literature/basic_search.html', title="Literature Search")
+    return render_template('literature/basic_search.html', title="Literature Search", paper_types=PAPER_TYPES)
 
 
 @literature_bp.route('/basic-search')
@@ -27,34 +34,44 @@ def basic_search():
     source = request.args.get('source', 'all')
     year_from = request.args.get('year_from', '')
     year_to = request.args.get('year_to', '')
+    paper_type = request.args.get('paper_type', '')
+    history_id = request.args.get('history', type=int)
+
+    if history_id:
+        try:
+            # Recent searches are shown from their stored results where possible
+            replay = literature_service.replay_search(history_id, current_user.id)
+            if replay is None:
+                flash("Search not found in your search history.", "warning")
+            else:
+                results = replay['results']
+                query = replay['search_query'].query
+                source = replay['search_query'].source_db or 'all'
+                filters = replay['filters']
+                if filters is not None:
+                    year_from = filters.year_from or ''
+                    year_to = filters.year_to or ''
+                    paper_type = filters.paper_type or ''
+
+        except Exception as e:
+            current_app.logger.error(f"Error replaying search: {e}")
+            flash(f"Error searching papers: {str(e)}", "danger")
+            results = []
 
-    if query:
+    elif query:
         try:
+            # Year range and paper type are applied by the sources themselves
+            filters = SearchFilter.from_args(request.args)
+
             # Get search results
             results = literature_service.search_papers(
                 query=query,
                 source=source,
                 max_results=25,
-                user_id=current_user.id
+                user_id=current_user.id,
+                filters=filters
             )
 
-            # Apply year filter if specified
-            if year_from or year_to:
-                filtered_results = []
-                for paper in results:
-                    year = paper.get('year')
-                    if year:
-                        if year_from and year_to:
-                            if int(year_from) <= year <= int(year_to):
-                                filtered_results.append(paper)
-                        elif year_from:
-                            if int(year_from) <= year:
-                                filtered_results.append(paper)
-                        elif year_to:
-                            if year <= int(year_to):
-                                filtered_results.append(paper)
-                results = filtered_results
-
         except Exception as e:
             current_app.logger.error(f"Error searching papers: {e}")
             flash(f"Error searching papers: {str(e)}", "danger")
@@ -99,6 +116,8 @@ def basic_search():
         source=source,
         year_from=year_from,
         year_to=year_to,
+        paper_type=paper_type,
+        paper_types=PAPER_TYPES,
         results=results,
         recent_searches=recent_searches,
         collections=collections
@@ -131,6 +150,41 @@ def get_collection_papers(collection_id):
         current_app.logger.error(f"Error getting collection papers: {e}")
         return jsonify({'error': str(e)}), 500
 
+@literature_bp.route('/api/collections/<int:collection_id>/similar')
+@login_required
+def get_collection_similar_papers(collection_id):
+    """Get saved papers similar to a collection's papers."""
+    collection = db.session.query(Collection).filter_by(id=collection_id, user_id=current_user.id).first()
+    if collection is None:
+        return jsonify({'error': 'Collection not found'}), 404
+
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    try:
+        similar = literature_service.get_collection_similar_papers(collection_id, limit)
+
+        paper_list = []
+        for item in similar:
+            paper = item['paper']
+            paper_list.append({
+                'id': paper.id,
+                'title': paper.title,
+                'authors': paper.authors,
+                'journal': paper.journal,
+                'year': paper.year,
+                'doi': paper.doi,
+                'url': paper.url,
+                'score': item['score']
+            })
+
+        return jsonify(paper_list)
+    except Exception as e:
+        current_app.logger.error(f"Error getting similar papers: {e}")
+        return jsonify({'error': str(e)}), 500
+
 # Add this route with a different name to avoid conflict
 @literature_bp.route('/submit-collection', methods=['POST'])
 @login_required
@@ -163,33 +217,126 @@ def submit_collection_form():
 @literature_bp.route('/api/search', methods=['GET'])
 @login_required
 def search_papers():
-    """Search for papers API endpoint."""
-    query = request.args.get('query', '')
-    source = request.args.get('source', 'all')
-    max_results = int(request.args.get('max_results', 25))
+    """
+    Search for papers API endpoint.
+
+    Responses include a next_cursor while more results are available; pass it
+    back as ?cursor=... (without the other parameters) to get the next page.
+    """
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            page = decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = page['query']
+        source = page['source']
+        max_results = page['page_size']
+        filters = SearchFilter(**page['filters'])
+        state = page['state']
+        offset = page['offset']
+    else:
+        query = request.args.get('query', '')
+        source = request.args.get('source', 'all')
+        max_results = int(request.args.get('max_results', 25))
+        state = None
+        offset = 0
+
+        if not query:
+            return jsonify({'error': 'Query is required'}), 400
 
-    if not query:
-        return jsonify({'error': 'Query is required'}), 400
+        try:
+            filters = SearchFilter.from_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
     try:
-        papers = literature_service.search_papers(
+        search_result = literature_service.search_page(
             query=query,
             source=source,
-            max_results=max_results,
-            user_id=current_user.id
+            page_size=max_results,
+            user_id=current_user.id,
+            filters=filters,
+            state=state
         )
+        papers = search_result['results']
+
+        next_cursor = None
+        if search_result['next'] is not None:
+            next_cursor = encode_cursor({
+                'query': query,
+                'source': source,
+                'page_size': max_results,
+                'filters': filters.to_params(),
+                'state': search_result['next'],
+                'offset': offset + len(papers)
+            })
 
         return jsonify({
             'query': query,
             'source': source,
             'results': papers,
-            'count': len(papers)
+            'count': len(papers),
+            'offset': offset,
+            'sources': search_result['sources'],
+            'next_cursor': next_cursor
         })
     except Exception as e:
         current_app.logger.error(f"Error searching papers: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+def _sse_event(event: str, data) -> str:
+    """Format a Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {current_app.json.dumps(data)}\n\n"
+
+
+@literature_bp.route('/api/search/stream', methods=['GET'])
+@login_required
+def stream_search_papers():
+    """Search for papers, streaming each source's results as Server-Sent Events."""
+    query = request.args.get('query', '')
+    source = request.args.get('source', 'all')
+    max_results = int(request.args.get('max_results', 25))
+
+    if not query:
+        return jsonify({'error': 'Query is required'}), 400
+
+    try:
+        filters = SearchFilter.from_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    user_id = current_user.id
+
+    def generate():
+        count = 0
+        sources = {}
+        try:
+            for source_name, papers, status in literature_service.iter_search_papers(
+                    query=query,
+                    source=source,
+                    max_results=max_results,
+                    user_id=user_id,
+                    filters=filters
+            ):
+                count += len(papers)
+                sources[source_name] = status
+                yield _sse_event('batch', {'source': source_name, 'results': papers, 'status': status})
+
+            yield _sse_event('done', {'query': query, 'source': source, 'count': count, 'sources': sources})
+        except Exception as e:
+            current_app.logger.error(f"Error streaming search results: {e}")
+            yield _sse_event('search-error', {'error': str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        # Stop proxies from buffering the stream, which would defeat early results
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @literature_bp.route('/paper/<source>/<paper_id>')
 @login_required
 def view_paper(source, paper_id):
@@ -201,11 +348,19 @@ def view_paper(source, paper_id):
         # Get user collections for adding to collection
         collections = db.session.query(Collection).filter(Collection.user_id == current_user.id).all()
 
+        # Similar papers are a nicety; the details page shows without them
+        try:
+            similar_papers = literature_service.get_similar_papers(paper, limit=5)
+        except Exception as e:
+            current_app.logger.error(f"Error getting similar papers: {e}")
+            similar_papers = []
+
         return render_template(
             'literature/paper_details.html',
             title=paper.get('title', 'Paper Details'),
             paper=paper,
-            collections=collections
+            collections=collections,
+            similar_papers=similar_papers
         )
     except Exception as e:
         current_app.logger.error(f"Error getting paper details: {e}")
@@ -238,6 +393,145 @@ def api_save_paper():
         return jsonify({'error': str(e)}), 500
 
 
+@literature_bp.route('/api/import', methods=['POST'])
+@login_required
+def import_references():
+    """Import a BibTeX or RIS file, streaming progress as Server-Sent Events."""
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'A BibTeX or RIS file is required'}), 400
+
+    fmt = request.form.get('format') or None
+    if fmt is not None and fmt not in IMPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(IMPORT_FORMATS)}"}), 400
+
+    user_id = current_user.id
+    collection_id = request.form.get('collection_id', type=int)
+    collection_name = request.form.get('collection_name', '').strip()
+    if collection_id is not None:
+        collection = db.session.query(Collection).filter_by(id=collection_id, user_id=user_id).first()
+        if collection is None:
+            return jsonify({'error': 'Collection not found'}), 404
+    elif collection_name:
+        collection_id = literature_service.create_collection(
+            collection_name, f"Imported from {upload.filename}", user_id
+        ).id
+
+    # The upload is closed when this view returns, before the response streams, so copy it to disk first
+    spool = tempfile.TemporaryFile()
+    upload.save(spool)
+    spool.seek(0)
+    filename = upload.filename
+    importer = ReferenceImporter(literature_service)
+
+    def generate():
+        stats = {}
+        try:
+            # Decode a line at a time rather than reading the file whole
+            lines = codecs.iterdecode(spool, 'utf-8-sig', errors='replace')
+            for stats in importer.iter_import(lines, user_id, fmt, filename, collection_id):
+                yield _sse_event('progress', stats)
+
+            yield _sse_event('done', dict(stats, collection_id=collection_id))
+        except Exception as e:
+            current_app.logger.error(f"Error importing references: {e}")
+            yield _sse_event('import-error', dict(stats, error=str(e)))
+        finally:
+            spool.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@literature_bp.route('/api/library/search', methods=['GET'])
+@login_required
+def search_library():
+    """
+    Full-text search over the saved papers API endpoint.
+
+    Titles and snippets in the response are HTML, with matches wrapped in <mark>.
+    """
+    query = request.args.get('query', '')
+    if not query.strip():
+        return jsonify({'error': 'Query is required'}), 400
+
+    try:
+        limit = min(max(int(request.args.get('limit', 25)), 1), 100)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+
+    try:
+        hits = literature_service.search_library(query, limit, offset)
+
+        results = []
+        for hit in hits:
+            paper = hit['paper']
+            results.append({
+                'id': paper.id,
+                'title': paper.title,
+                'authors': paper.authors,
+                'journal': paper.journal,
+                'year': paper.year,
+                'doi': paper.doi,
+                'url': paper.url,
+                'source_db': paper.source_db,
+                'paper_id': paper.paper_id,
+                'score': hit['score'],
+                'highlights': {'title': hit['title'], 'snippet': hit['snippet']}
+            })
+
+        return jsonify({
+            'query': query,
+            'results': results,
+            'count': len(results),
+            'offset': offset
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error searching library: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@literature_bp.route('/api/papers/<int:paper_id>/related', methods=['GET'])
+@login_required
+def get_related_papers(paper_id):
+    """API endpoint to get the saved papers related to a paper through citations."""
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    try:
+        related = literature_service.get_related_papers(paper_id, limit)
+
+        paper_list = []
+        for item in related:
+            paper = item['paper']
+            paper_list.append({
+                'id': paper.id,
+                'title': paper.title,
+                'authors': paper.authors,
+                'journal': paper.journal,
+                'year': paper.year,
+                'doi': paper.doi,
+                'url': paper.url,
+                'score': item['score'],
+                'cited': item['cited'],
+                'citing': item['citing'],
+                'co_citations': item['co_citations'],
+                'coupling': item['coupling'],
+                'influence': item['influence']
+            })
+
+        return jsonify(paper_list)
+    except Exception as e:
+        current_app.logger.error(f"Error getting related papers: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 @literature_bp.route('/api/collections', methods=['GET'])
 @login_required
 def api_get_collections():
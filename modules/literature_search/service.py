@@ -1,11 +1,23 @@
 # modules/literature_search/service.py
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Set, Tuple
+from sqlalchemy import select, func, tuple_
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
-from models import db, Paper, Keyword, SearchQuery, Collection, paper_keywords, paper_collections
-from modules.literature_search.api_clients import SearchClientFactory
+from models import db, Paper, Keyword, SearchQuery, SearchResultSet, Collection, ScientificDatabase, paper_keywords, \
+    paper_collections
+from modules.literature_search.api_clients import SearchClientFactory, MultiSourceClient
+from modules.literature_search.citation_graph import CitationGraph
+from modules.literature_search.config import LiteratureSearchConfig
+from modules.literature_search.db_utils import conflict_insert
+from modules.literature_search.dedup import PaperDeduplicator, normalize_doi, title_year_key
+from modules.literature_search.filters import SearchFilter
+from modules.literature_search.keyword_cache import KeywordCache
+from modules.literature_search.library_index import LibraryIndex, search_postgres
+from modules.literature_search.ranking import source_order_prior
+from modules.literature_search.result_store import SearchResultStore
+from modules.literature_search.similarity import SimilarityIndex
 
 
 class LiteratureSearchService:
@@ -13,9 +25,12 @@ class LiteratureSearchService:
 
     def __init__(self):
         self.search_factory = SearchClientFactory()
+        self.keyword_cache = KeywordCache.shared(LiteratureSearchConfig.KEYWORD_CACHE_ENTRIES)
+        self.result_store = SearchResultStore()
 
     def search_papers(self, query: str, source: str = 'all', max_results: int = 25,
-                      user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+                      user_id: Optional[int] = None,
+                      filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
         """
         Search for papers across specified sources.
 
@@ -24,14 +39,35 @@ class LiteratureSearchService:
             source: Which database to search ('all', 'arxiv', 'pubmed', etc.)
             max_results: Maximum number of results to return
             user_id: Optional user ID to associate with the search
+            filters: Optional year range, source and paper type filters, applied by the sources
 
         Returns:
             List of paper dictionaries
         """
-        # Get the appropriate client
-        client = self.search_factory.get_client(source)
+        return self.search_papers_with_status(query, source, max_results, user_id, filters)['results']
+
+    def search_papers_with_status(self, query: str, source: str = 'all', max_results: int = 25,
+                                  user_id: Optional[int] = None,
+                                  filters: Optional[SearchFilter] = None) -> Dict[str, Any]:
+        """
+        Search for papers and report how each source responded.
+
+        Searches run again within RESULT_STORE_TTL are answered from the
+        results stored by the earlier run, flagged 'stored' in the status.
+
+        Args:
+            query: The search query
+            source: Which database to search ('all', 'arxiv', 'pubmed', etc.)
+            max_results: Maximum number of results to return
+            user_id: Optional user ID to associate with the search
+            filters: Optional year range, source and paper type filters, applied by the sources
 
+        Returns:
+            Dictionary with the list of paper dictionaries under 'results' and
+            per-source status flags ('ok', 'error', 'unavailable' or 'timeout') under 'sources'
+        """
         # Log the search query if user_id is provided
+        search_query = None
         if user_id:
             search_query = SearchQuery(
                 query=query,
@@ -41,24 +77,262 @@ class LiteratureSearchService:
             db.session.add(search_query)
             db.session.commit()
 
+        # Recent runs of the same search are answered from the stored results
+        stored = self.result_store.load(query, source, filters, max_results, LiteratureSearchConfig.RESULT_STORE_TTL)
+        if stored is not None:
+            result_set, papers = stored
+            self._record_results(search_query, papers, result_set)
+            return {'results': papers, 'sources': self._stored_status(source, papers)}
+
+        # Get the appropriate client, using the user's own NCBI key for the higher rate limit
+        client = self.search_factory.get_client(source, pubmed_api_key=self._pubmed_api_key(user_id))
+
         # Perform the search
         try:
-            papers = client.search(query, max_results)
+            papers = client.search(query, max_results, filters)
+            # Judged before filtering: only a short answer from upstream shows the source has no more matches
+            exhausted = len(papers) < max_results
+            if filters is not None:
+                papers = [paper for paper in papers if filters.matches(paper)]
+
+            # Multi-source clients track each source separately; single sources either answer or raise
+            sources = getattr(client, 'source_status', None) or {
+                client.name: {'status': 'ok', 'count': len(papers), 'exhausted': exhausted}
+            }
+
+            # Only complete results are worth replaying; a source that failed this time may answer next time
+            result_set = None
+            if all(status.get('status') == 'ok' for status in sources.values()):
+                result_set = self.result_store.save(query, source, filters, max_results, papers,
+                                                    self.result_store.exhausted(sources, papers, max_results))
 
             # Update the search query with results count
-            if user_id:
-                search_query.results_count = len(papers)
-                db.session.commit()
+            self._record_results(search_query, papers, result_set)
 
-            return papers
+            return {'results': papers, 'sources': sources}
         except Exception as e:
             # Log the error and re-raise
             print(f"Error searching {source}: {e}")
-            if user_id:
+            self._record_results(search_query, [])
+            raise
+
+    def replay_search(self, search_query_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Show the results of a search from the user's search history again.
+
+        Results stored within RESULT_STORE_REPLAY_TTL are served from the
+        database without searching upstream or adding to the history; older
+        searches are run again.
+
+        Args:
+            search_query_id: ID of the SearchQuery to replay
+            user_id: User the search must belong to
+
+        Returns:
+            Dictionary as returned by search_papers_with_status, plus the SearchQuery
+            under 'search_query', or None if the user has no such search
+        """
+        search_query = db.session.query(SearchQuery).filter_by(id=search_query_id, user_id=user_id).first()
+        if search_query is None:
+            return None
+
+        if search_query.result_set_id is not None:
+            stored = self.result_store.load_result_set(search_query.result_set_id,
+                                                       LiteratureSearchConfig.RESULT_STORE_REPLAY_TTL)
+            if stored is not None:
+                result_set, papers = stored
+                return {
+                    'results': papers,
+                    'sources': self._stored_status(search_query.source_db, papers),
+                    'search_query': search_query,
+                    'filters': SearchFilter(**(result_set.filters or {}))
+                }
+
+        # Too old to replay: the stored filters still describe the original search
+        result_set = search_query.result_set
+        filters = SearchFilter(**(result_set.filters or {})) if result_set is not None else None
+        result = self.search_papers_with_status(search_query.query, search_query.source_db or 'all',
+                                                LiteratureSearchConfig.DEFAULT_MAX_RESULTS, user_id, filters)
+        result['search_query'] = search_query
+        result['filters'] = filters
+        return result
+
+    @staticmethod
+    def _stored_status(source: str, papers: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Source status for results served from the result store."""
+        return {source: {'status': 'ok', 'count': len(papers), 'stored': True}}
+
+    @staticmethod
+    def _record_results(search_query: Optional[SearchQuery], papers: List[Dict[str, Any]],
+                        result_set: Optional[SearchResultSet] = None) -> None:
+        """Record the outcome of a search in its search history entry, if it has one."""
+        if search_query is None:
+            return
+        search_query.results_count = len(papers)
+        if result_set is not None:
+            search_query.result_set_id = result_set.id
+        db.session.commit()
+
+    def search_page(self, query: str, source: str = 'all', page_size: int = 25,
+                    user_id: Optional[int] = None, filters: Optional[SearchFilter] = None,
+                    state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get one page of search results, prefetching the following page in the background.
+
+        Args:
+            query: The search query
+            source: Which database to search ('all', 'arxiv', 'pubmed', etc.)
+            page_size: Number of results per page
+            user_id: Optional user ID to associate with the search (logged for the first page only)
+            filters: Optional year range, source and paper type filters, applied by the sources
+            state: Paging state returned with the previous page, or None for the first page
+
+        Returns:
+            Dictionary with the list of paper dictionaries under 'results', per-source
+            status flags under 'sources', and the paging state for the following page
+            under 'next' (None after the last page)
+        """
+        # Get the appropriate client, using the user's own NCBI key for the higher rate limit
+        client = self.search_factory.get_client(source, pubmed_api_key=self._pubmed_api_key(user_id))
+
+        # Log the search query when it is first run, not for every page
+        search_query = None
+        if user_id and state is None:
+            search_query = SearchQuery(
+                query=query,
+                user_id=user_id,
+                source_db=source
+            )
+            db.session.add(search_query)
+            db.session.commit()
+
+        try:
+            papers, next_state = client.search_page(query, page_size, state, filters)
+        except Exception as e:
+            print(f"Error searching {source}: {e}")
+            if search_query is not None:
                 search_query.results_count = 0
                 db.session.commit()
             raise
 
+        if filters is not None:
+            papers = [paper for paper in papers if filters.matches(paper)]
+
+        if search_query is not None:
+            search_query.results_count = len(papers)
+            db.session.commit()
+
+        # Warm the cache with the next page while the user reads this one
+        if next_state is not None:
+            client.prefetch_page(query, page_size, next_state, filters)
+
+        sources = getattr(client, 'source_status', None) or {
+            client.name: {'status': 'ok', 'count': len(papers)}
+        }
+        return {'results': papers, 'sources': sources, 'next': next_state}
+
+    def iter_search_papers(self, query: str, source: str = 'all', max_results: int = 25,
+                           user_id: Optional[int] = None,
+                           filters: Optional[SearchFilter] = None
+                           ) -> Iterator[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Search for papers, yielding each source's results as soon as that source is done.
+
+        Unlike search_papers, failures are reported through the status of the
+        failed source instead of being raised.
+
+        Args:
+            query: The search query
+            source: Which database to search ('all', 'arxiv', 'pubmed', etc.)
+            max_results: Maximum number of results to return across all batches
+            user_id: Optional user ID to associate with the search
+            filters: Optional year range, source and paper type filters, applied by the sources
+
+        Yields:
+            Tuples of (source name, list of paper dictionaries, status dictionary)
+        """
+        # Get the appropriate client, using the user's own NCBI key for the higher rate limit
+        client = self.search_factory.get_client(source, pubmed_api_key=self._pubmed_api_key(user_id))
+
+        # Log the search query if user_id is provided
+        search_query = None
+        if user_id:
+            search_query = SearchQuery(
+                query=query,
+                user_id=user_id,
+                source_db=source
+            )
+            db.session.add(search_query)
+            db.session.commit()
+
+        # Recent runs of the same search are answered from the stored results, in one batch
+        stored = self.result_store.load(query, source, filters, max_results, LiteratureSearchConfig.RESULT_STORE_TTL)
+        if stored is not None:
+            result_set, papers = stored
+            self._record_results(search_query, papers, result_set)
+            yield source, papers, self._stored_status(source, papers)[source]
+            return
+
+        if isinstance(client, MultiSourceClient):
+            batches = client.iter_search(query, max_results, filters)
+        else:
+            try:
+                papers = client.search(query, max_results, filters)
+                batches = [(client.name, papers,
+                            {'status': 'ok', 'count': len(papers), 'exhausted': len(papers) < max_results})]
+            except Exception as e:
+                print(f"Error searching {source}: {e}")
+                batches = [(client.name, [], {'status': 'error', 'count': 0, 'error': str(e)})]
+
+        # Papers already sent can't be retracted, so later duplicates are merged into them and dropped
+        deduplicator = PaperDeduplicator()
+        sent: List[Dict[str, Any]] = []
+        source_ranks = {}
+        sources = {}
+        complete = True
+        try:
+            for source_name, papers, status in batches:
+                sources[source_name] = status
+                if filters is not None:
+                    papers = [paper for paper in papers if filters.matches(paper)]
+                source_ranks.update(source_order_prior(papers))
+                papers = [record for record in map(deduplicator.add, papers) if record is not None]
+                # Sources each get a share of max_results, so trim whatever overshoots the total
+                papers = papers[:max(0, max_results - len(sent))]
+                sent.extend(papers)
+                complete = complete and status.get('status') == 'ok'
+                yield source_name, papers, status
+        except BaseException:
+            # The client went away, or the search failed, before every source answered
+            complete = False
+            raise
+        finally:
+            # Store the results if every source answered, ranked as search_papers would have
+            result_set = None
+            if complete:
+                if isinstance(client, MultiSourceClient):
+                    sent = client.rank(query, list(sent), source_ranks)
+                result_set = self.result_store.save(query, source, filters, max_results, sent,
+                                                    self.result_store.exhausted(sources, sent, max_results))
+            # Update the search query with results count
+            self._record_results(search_query, sent, result_set)
+
+    def _pubmed_api_key(self, user_id: Optional[int]) -> Optional[str]:
+        """
+        Get the NCBI API key a user has configured for PubMed.
+
+        Args:
+            user_id: Optional user ID
+
+        Returns:
+            The API key, or None if the user hasn't configured one
+        """
+        if not user_id:
+            return None
+
+        config = ScientificDatabase.query.filter_by(user_id=user_id, database_name='pubmed').first()
+        return config.api_key if config else None
+
     def get_paper(self, paper_id: str, source: str) -> Dict[str, Any]:
         """
         Get details for a specific paper.
@@ -76,6 +350,100 @@ class LiteratureSearchService:
         # Get the paper
         return client.get_paper(paper_id)
 
+    def search_library(self, query: str, limit: int = 25, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Search the full text of the papers saved in the library.
+
+        Uses the search_vector index on PostgreSQL, and an in-process index
+        on other databases.
+
+        Args:
+            query: The search query
+            limit: Maximum number of hits to return
+            offset: Number of hits to skip
+
+        Returns:
+            Hits, best first, as dictionaries with the Paper ('paper'), a
+            relevance score between 0 and 1 ('score'), and the title and an
+            abstract snippet with matches wrapped in <mark> ('title', 'snippet')
+        """
+        if not query or not query.strip():
+            return []
+
+        if db.engine.dialect.name == 'postgresql':
+            return search_postgres(query, limit, offset)
+        return LibraryIndex.shared().search(query, limit, offset)
+
+    def get_related_papers(self, paper_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get the saved papers most closely related to a paper through citations.
+
+        Args:
+            paper_id: ID of the saved paper
+            limit: Maximum number of related papers
+
+        Returns:
+            Dictionaries as returned by CitationGraph.related, with the Paper under 'paper'
+        """
+        related = CitationGraph.shared().related(paper_id, limit)
+        papers = {
+            paper.id: paper
+            for paper in db.session.query(Paper).filter(Paper.id.in_([item['paper_id'] for item in related]))
+        }
+        return [dict(item, paper=papers[item['paper_id']]) for item in related if item['paper_id'] in papers]
+
+    def get_similar_papers(self, paper_data: Dict[str, Any], limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get the saved papers most similar in content to a paper.
+
+        The paper need not be saved itself, e.g. on its details page after a search.
+
+        Args:
+            paper_data: Paper data dictionary
+            limit: Maximum number of similar papers
+
+        Returns:
+            Dictionaries with the Paper under 'paper' and the cosine similarity under 'score',
+            most similar first
+        """
+        index = SimilarityIndex.shared()
+        if not index.available():
+            return []
+
+        saved_id = self._existing_paper_ids([paper_data]).get(0)
+        if saved_id is not None:
+            hits = index.similar([saved_id], limit)[saved_id]
+        else:
+            hits = index.similar_to_texts([(paper_data.get('title'), paper_data.get('abstract'))], limit)[0]
+        return self._similar_papers(hits)
+
+    def get_collection_similar_papers(self, collection_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get the saved papers most similar in content to a collection as a whole.
+
+        Args:
+            collection_id: Collection ID
+            limit: Maximum number of similar papers
+
+        Returns:
+            Dictionaries as returned by get_similar_papers, leaving out the collection's own papers
+        """
+        index = SimilarityIndex.shared()
+        if not index.available():
+            return []
+
+        paper_ids = db.session.execute(
+            select(paper_collections.c.paper_id).where(paper_collections.c.collection_id == collection_id)
+        ).scalars().all()
+        return self._similar_papers(index.similar_to_group(paper_ids, limit))
+
+    @staticmethod
+    def _similar_papers(hits: List[Tuple[int, float]]) -> List[Dict[str, Any]]:
+        """Load the Papers of similarity hits, dropping any deleted since they were indexed."""
+        papers = {paper.id: paper for paper in
+                  db.session.query(Paper).filter(Paper.id.in_([paper_id for paper_id, _ in hits]))}
+        return [{'paper': papers[paper_id], 'score': score} for paper_id, score in hits if paper_id in papers]
+
     def save_paper(self, paper_data: Dict[str, Any], user_id: int) -> Paper:
         """
         Save a paper to the database.
@@ -87,86 +455,277 @@ class LiteratureSearchService:
         Returns:
             Saved Paper object
         """
-        # Check if paper already exists
-        existing_paper = None
-        if paper_data.get('doi'):
-            existing_paper = Paper.query.filter_by(doi=paper_data['doi']).first()
-        elif paper_data.get('paper_id') and paper_data.get('source_db'):
-            existing_paper = Paper.query.filter_by(
-                paper_id=paper_data['paper_id'],
-                source_db=paper_data['source_db']
-            ).first()
-
-        if existing_paper:
-            return existing_paper
-
-        # Create new paper
-        new_paper = Paper(
-            title=paper_data['title'],
-            authors=paper_data.get('authors', ''),
-            abstract=paper_data.get('abstract', ''),
-            doi=paper_data.get('doi'),
-            url=paper_data.get('url'),
-            journal=paper_data.get('journal', ''),
-            published_date=paper_data.get('published_date'),
-            year=paper_data.get('year'),
-            source_db=paper_data.get('source_db', ''),
-            paper_id=paper_data.get('paper_id', ''),
-            full_text=paper_data.get('full_text')
-        )
+        paper_ids = self.save_papers([paper_data], user_id)
+        return db.session.get(Paper, paper_ids[0])
 
-        # Add keywords if present
-        if 'keywords' in paper_data and paper_data['keywords']:
-            keywords = paper_data['keywords']
-            if isinstance(keywords, str):
-                keywords = [k.strip() for k in keywords.split(',')]
-
-            for keyword_text in keywords:
-                keyword = Keyword.query.filter_by(keyword=keyword_text).first()
-                if not keyword:
-                    keyword = Keyword(keyword=keyword_text)
-                    db.session.add(keyword)
-                new_paper.keywords.append(keyword)
-
-        # Add categories as keywords if present (for arXiv papers)
-        if 'categories' in paper_data and paper_data['categories']:
-            for category in paper_data['categories']:
-                keyword = Keyword.query.filter_by(keyword=category).first()
-                if not keyword:
-                    keyword = Keyword(keyword=category)
-                    db.session.add(keyword)
-                if keyword not in new_paper.keywords:
-                    new_paper.keywords.append(keyword)
+    def save_papers(self, papers: List[Dict[str, Any]], user_id: int) -> List[int]:
+        """
+        Save many papers to the database in one transaction.
+
+        Args:
+            papers: Paper data dictionaries
+            user_id: User ID to associate with the papers
+
+        Returns:
+            ID of the saved Paper for each paper dictionary, in the same order
+        """
+        return self.save_papers_with_status(papers, user_id)['paper_ids']
+
+    def save_papers_with_status(self, papers: List[Dict[str, Any]], user_id: int) -> Dict[str, Any]:
+        """
+        Save many papers to the database in one transaction, reporting which were new.
+
+        Papers already saved are reused rather than duplicated, matched by DOI,
+        by source ID, or by the same normalized title and year. Similar titles
+        are not enough, so "Part I" and "Part II" stay separate papers.
+        Duplicates within papers are saved once. Lookups
+        are set-based and new papers, keywords and keyword links are written with
+        INSERT ... ON CONFLICT DO NOTHING, so saving takes a handful of queries
+        however many papers there are.
+
+        Args:
+            papers: Paper data dictionaries
+            user_id: User ID to associate with the papers
+
+        Returns:
+            Dictionary with the ID of the saved Paper for each paper dictionary,
+            in the same order, under 'paper_ids', and the set of IDs of the
+            Papers this call created under 'created'
+        """
+        if not papers:
+            return {'paper_ids': [], 'created': set()}
+
+        # Group duplicates within the batch so each distinct paper is saved once
+        deduplicator = PaperDeduplicator(exact_titles=True)
+        groups = []
+        for paper_data in papers:
+            record = deduplicator.find(paper_data)
+            if record is None:
+                record = deduplicator.add(paper_data)
+            else:
+                deduplicator.add(paper_data)
+            groups.append(record)
+
+        records = deduplicator.records
+        index_of = {id(record): index for index, record in enumerate(records)}
 
-        # Save to database
-        db.session.add(new_paper)
         try:
+            paper_ids = self._existing_paper_ids(records)
+            new_records = {index: record for index, record in enumerate(records) if index not in paper_ids}
+            inserted, created_indexes = self._insert_papers(new_records)
+            paper_ids.update(inserted)
+
+            # Only papers created here get keywords; existing papers keep theirs
+            created = {inserted[index]: new_records[index] for index in created_indexes}
+            self._link_keywords(created)
+
             db.session.commit()
-            return new_paper
-        except IntegrityError:
+        except Exception:
             db.session.rollback()
-            # If there was an integrity error, the paper might have been added by another process
-            # Try to find it again
-            if paper_data.get('doi'):
-                return Paper.query.filter_by(doi=paper_data['doi']).first()
-            elif paper_data.get('paper_id') and paper_data.get('source_db'):
-                return Paper.query.filter_by(
-                    paper_id=paper_data['paper_id'],
-                    source_db=paper_data['source_db']
-                ).first()
-            else:
-                # If we can't find a unique identifier, just create a new entry
-                new_paper = Paper(
-                    title=paper_data['title'],
-                    authors=paper_data.get('authors', ''),
-                    abstract=paper_data.get('abstract', ''),
-                    # Generate a unique DOI-like identifier
-                    paper_id=f"local-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}",
-                    source_db='local'
+            raise
+
+        self._index_similarity(created)
+
+        return {'paper_ids': [paper_ids[index_of[id(record)]] for record in groups], 'created': set(created)}
+
+    @staticmethod
+    def _index_similarity(records: Dict[int, Dict[str, Any]]) -> None:
+        """
+        Fold newly saved papers into the similar-papers index, if it has been built.
+
+        Args:
+            records: Mapping of Paper ID to the record it was saved from
+        """
+        index = SimilarityIndex.shared()
+        if not records or not index.available():
+            return
+
+        try:
+            index.add((paper_id, record.get('title'), record.get('abstract'))
+                      for paper_id, record in records.items())
+        except Exception as e:
+            # The papers are saved either way; the next build picks them up
+            print(f"Error indexing saved papers for similarity: {e}")
+
+    def _existing_paper_ids(self, records: List[Dict[str, Any]]) -> Dict[int, int]:
+        """
+        Find saved papers that records duplicate.
+
+        Args:
+            records: Deduplicated paper records, each with a 'sources' list
+
+        Returns:
+            Mapping of record index to the ID of the matching saved Paper
+        """
+        found: Dict[int, int] = {}
+
+        # By DOI; older rows may hold the DOI as the source reported it
+        by_doi: Dict[str, int] = {}
+        for index, record in enumerate(records):
+            doi = normalize_doi(record.get('doi'))
+            if doi:
+                by_doi.setdefault(doi, index)
+                by_doi.setdefault(record['doi'].strip(), index)
+        if by_doi:
+            rows = db.session.execute(select(Paper.id, Paper.doi).where(Paper.doi.in_(by_doi))).all()
+            for paper_id, doi in rows:
+                found.setdefault(by_doi[doi], paper_id)
+
+        # By any of the source IDs each record was found under
+        by_link: Dict[Tuple[str, str], List[int]] = {}
+        for index, record in enumerate(records):
+            if index in found:
+                continue
+            for link in record.get('sources') or [record]:
+                if link.get('source_db') and link.get('paper_id'):
+                    by_link.setdefault((link['source_db'], link['paper_id']), []).append(index)
+        if by_link:
+            rows = db.session.execute(
+                select(Paper.id, Paper.source_db, Paper.paper_id)
+                .where(tuple_(Paper.source_db, Paper.paper_id).in_(list(by_link)))
+            ).all()
+            for paper_id, source_db, source_paper_id in rows:
+                for index in by_link[(source_db, source_paper_id)]:
+                    found.setdefault(index, paper_id)
+
+        # By the same title and year, looked up through the lower(title) index and confirmed normalized
+        by_title: Dict[Tuple[str, Optional[int]], int] = {}
+        for index, record in enumerate(records):
+            key = title_year_key(record)
+            if index not in found and key is not None:
+                by_title.setdefault(key, index)
+        if by_title:
+            titles = {records[index]['title'].strip().lower() for index in by_title.values()}
+            rows = db.session.execute(
+                select(Paper.id, Paper.title, Paper.year, Paper.doi).where(func.lower(Paper.title).in_(titles))
+            ).all()
+            for paper_id, title, year, doi in rows:
+                index = by_title.get(title_year_key({'title': title, 'year': year}))
+                if index is None or index in found:
+                    continue
+                record_doi = normalize_doi(records[index].get('doi'))
+                if record_doi and doi and normalize_doi(doi) != record_doi:
+                    # Different DOIs are different works, even under the same title
+                    continue
+                found[index] = paper_id
+
+        return found
+
+    def _insert_papers(self, records: Dict[int, Dict[str, Any]]) -> Tuple[Dict[int, int], Set[int]]:
+        """
+        Insert new papers, skipping any another process saved in the meantime.
+
+        Args:
+            records: Mapping of record index to paper record
+
+        Returns:
+            Mapping of record index to the ID of its Paper row, and the indexes
+            of the records whose rows were inserted here rather than found
+        """
+        inserted: Dict[int, int] = {}
+        if not records:
+            return inserted, set()
+
+        now = datetime.utcnow()
+        keyed: Dict[Any, int] = {}
+        aliases: Dict[int, int] = {}
+        rows = []
+        for index, record in records.items():
+            row = {
+                'title': record['title'],
+                'authors': record.get('authors', ''),
+                'abstract': record.get('abstract', ''),
+                'doi': normalize_doi(record.get('doi')),
+                'url': record.get('url'),
+                'journal': record.get('journal', ''),
+                'published_date': record.get('published_date'),
+                'year': record.get('year'),
+                'source_db': record.get('source_db', ''),
+                'paper_id': record.get('paper_id', ''),
+                'full_text': record.get('full_text'),
+                'created_at': now,
+                'updated_at': now,
+            }
+            key = row['doi'] or ((row['source_db'], row['paper_id']) if row['paper_id'] else None)
+            if key is None:
+                # Nothing to match the returned row on, so insert it on its own
+                inserted[index] = db.session.execute(
+                    conflict_insert(Paper.__table__).values(row).returning(Paper.id)
+                ).scalar_one()
+                continue
+            if key in keyed:
+                # Same identifier as another record in the batch, so the same row
+                aliases[index] = keyed[key]
+                continue
+            keyed[key] = index
+            rows.append(row)
+
+        # Rows with a DOI may clash on the DOI or the source ID, so any conflict skips them. Rows
+        # without one can only clash on the source ID, whose partial unique index is the target.
+        with_doi = [row for row in rows if row['doi']]
+        without_doi = [row for row in rows if not row['doi']]
+        batch_size = LiteratureSearchConfig.SAVE_BATCH_SIZE
+        for batch, conflict_target in ((with_doi, {}),
+                                       (without_doi, {'index_elements': ['source_db', 'paper_id'],
+                                                      'index_where': Paper.paper_id != ''})):
+            for start in range(0, len(batch), batch_size):
+                statement = (
+                    conflict_insert(Paper.__table__)
+                    .values(batch[start:start + batch_size])
+                    .on_conflict_do_nothing(**conflict_target)
+                    .returning(Paper.id, Paper.doi, Paper.source_db, Paper.paper_id)
                 )
-                db.session.add(new_paper)
-                db.session.commit()
-                return new_paper
+                for paper_id, doi, source_db, source_paper_id in db.session.execute(statement):
+                    inserted[keyed[doi or (source_db, source_paper_id)]] = paper_id
+
+        # Rows skipped on conflict were saved concurrently under the same DOI or source ID
+        created = set(inserted)
+        conflicted = [index for index in keyed.values() if index not in inserted]
+        if conflicted:
+            found = self._existing_paper_ids([records[index] for index in conflicted])
+            for position, paper_id in found.items():
+                inserted[conflicted[position]] = paper_id
+
+        for index, original in aliases.items():
+            inserted[index] = inserted[original]
+            if original in created:
+                created.add(index)
+
+        return inserted, created
+
+    def _link_keywords(self, records: Dict[int, Dict[str, Any]]) -> None:
+        """
+        Create any missing keywords and link them to newly saved papers.
+
+        Args:
+            records: Mapping of Paper ID to the record it was saved from
+        """
+        terms_by_paper: Dict[int, List[str]] = {}
+        for paper_id, record in records.items():
+            terms = record.get('keywords') or []
+            if isinstance(terms, str):
+                terms = terms.split(',')
+            # arXiv categories are saved as keywords too
+            terms = list(terms) + list(record.get('categories') or [])
+            terms = list(dict.fromkeys(term.strip() for term in terms if term and term.strip()))
+            # Keywords longer than the keyword column are skipped rather than cut to a different keyword
+            terms = [term for term in terms if len(term) <= 100]
+            if terms:
+                terms_by_paper[paper_id] = terms
+
+        all_terms = sorted({term for terms in terms_by_paper.values() for term in terms})
+        if not all_terms:
+            return
+
+        keyword_ids = self.keyword_cache.resolve(all_terms)
+
+        links = [{'paper_id': paper_id, 'keyword_id': keyword_ids[term]}
+                 for paper_id, terms in terms_by_paper.items() for term in terms]
+        batch_size = LiteratureSearchConfig.SAVE_BATCH_SIZE
+        for start in range(0, len(links), batch_size):
+            db.session.execute(
+                conflict_insert(paper_keywords).values(links[start:start + batch_size]).on_conflict_do_nothing()
+            )
 
     def add_paper_to_collection(self, paper_id: int, collection_id: int) -> bool:
         """
@@ -0,0 +1,483 @@
+# modules/literature_search/similarity.py
+
+"""Similar-paper recommendations from TF-IDF vectors reduced with truncated SVD (latent semantic analysis)."""
+
+import json
+import math
+import os
+import shutil
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Similar papers are unavailable without numpy
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: index writes aren't serialized across processes
+    fcntl = None
+
+from sqlalchemy import select
+
+from models import db, Paper
+from modules.literature_search.config import LiteratureSearchConfig
+from modules.literature_search.ranking import tokenize
+
+# Title terms count this many times as much as abstract terms
+TITLE_WEIGHT = 2
+
+# Rows scored per matrix product, bounding the size of the score matrix
+QUERY_CHUNK = 65536
+
+# Nonzeros multiplied at once while building, bounding the size of the products
+BUILD_CHUNK = 262144
+
+
+def _row_ids(indptr) -> "np.ndarray":
+    """Row of each nonzero of a CSR matrix."""
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+
+def _csr_dot(indptr, indices, data, dense) -> "np.ndarray":
+    """Multiply a CSR matrix by a dense matrix."""
+    rows = len(indptr) - 1
+    out = np.zeros((rows, dense.shape[1]), dtype=np.float32)
+    start = 0
+    while start < rows:
+        # Rows whose nonzeros fit in one chunk (at least one row)
+        stop = max(int(np.searchsorted(indptr, indptr[start] + BUILD_CHUNK, side='right')) - 1, start + 1)
+        stop = min(stop, rows)
+        lo, hi = indptr[start], indptr[stop]
+        if hi > lo:
+            product = data[lo:hi, None] * dense[indices[lo:hi]]
+            offsets = indptr[start:stop] - lo
+            nonempty = np.diff(indptr[start:stop + 1]) > 0
+            out[start:stop][nonempty] = np.add.reduceat(product, offsets[nonempty], axis=0)
+        start = stop
+    return out
+
+
+def _csr_transpose(indptr, indices, data, columns: int) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Transpose a CSR matrix, so products with the transpose are CSR products too."""
+    order = np.argsort(indices, kind='stable')
+    transposed_indptr = np.zeros(columns + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=columns), out=transposed_indptr[1:])
+    return transposed_indptr, _row_ids(indptr)[order].astype(np.int32), data[order]
+
+
+def _normalized(vectors) -> "np.ndarray":
+    """Scale rows to unit length, leaving empty rows at zero."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class SimilarityIndex:
+    """
+    Paper vectors for finding similar papers by cosine similarity.
+
+    Titles and abstracts are turned into TF-IDF vectors over hashed terms,
+    reduced to a hundred or so dimensions with a randomized truncated SVD of
+    the whole library, and normalized. The reduced vectors are stored as a
+    float32 array in a .npy file that every worker memory-maps, alongside the
+    Paper ID of each row, so a query is one matrix product over the file.
+
+    The SVD is fitted by build, offline. Papers saved afterwards are folded
+    into the existing components by add, keeping the IDF weights of the
+    build; rebuild now and then to take new vocabulary into account.
+    Deleted papers keep their rows until the next build, and are dropped
+    from results when their Paper no longer exists.
+    """
+
+    # Process-wide indexes, keyed by directory
+    _registry: Dict[str, "SimilarityIndex"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str = "./cache/similarity", features: int = 2 ** 17, dims: int = 128):
+        """
+        Initialize the index.
+
+        Args:
+            path: Directory holding the index files
+            features: Number of hashed term features
+            dims: Number of dimensions papers are reduced to
+        """
+        self.path = path
+        self.features = features
+        self.dims = dims
+        self._lock = threading.Lock()
+        self._meta: Optional[Dict] = None
+        self._meta_mtime: Optional[float] = None
+        self._row_of: Dict[int, int] = {}
+
+    @classmethod
+    def shared(cls) -> "SimilarityIndex":
+        """
+        Get the process-wide index in SIMILARITY_DIR, creating it on first use.
+
+        Returns:
+            The shared SimilarityIndex instance
+        """
+        path = LiteratureSearchConfig.SIMILARITY_DIR
+        with cls._registry_lock:
+            if path not in cls._registry:
+                cls._registry[path] = cls(path, LiteratureSearchConfig.SIMILARITY_FEATURES,
+                                          LiteratureSearchConfig.SIMILARITY_DIMS)
+            return cls._registry[path]
+
+    def available(self) -> bool:
+        """Whether numpy is installed and the index has been built."""
+        return np is not None and os.path.exists(os.path.join(self.path, 'meta.json'))
+
+    def _file(self, name: str, path: Optional[str] = None) -> str:
+        """Path of one of the index files."""
+        return os.path.join(path or self.path, name)
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the lock serializing writes to the index across processes."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the descriptor also releases the file lock
+            os.close(fd)
+
+    def _reload(self) -> None:
+        """Map the index files again if another process or thread has changed them."""
+        mtime = os.stat(self._file('meta.json')).st_mtime_ns
+        if mtime == self._meta_mtime:
+            return
+
+        with open(self._file('meta.json')) as f:
+            meta = json.load(f)
+        same_build = self._meta is not None and self._meta['build'] == meta['build']
+
+        self._components = np.load(self._file('components.npy'), mmap_mode='r')
+        self._idf = np.load(self._file('idf.npy'), mmap_mode='r')
+        self._vectors = np.load(self._file('vectors.npy'), mmap_mode='r')
+        self._ids = np.load(self._file('ids.npy'), mmap_mode='r')
+
+        # Rows are only ever appended between builds, so only new rows need mapping
+        first = self._meta['count'] if same_build else 0
+        if not same_build:
+            self._row_of = {}
+        for row, paper_id in enumerate(self._ids[first:meta['count']].tolist(), start=first):
+            self._row_of[paper_id] = row
+
+        self._meta = meta
+        self._meta_mtime = mtime
+        # Terms must hash the way they did when the index was built
+        self.features = meta['features']
+
+    def _hash(self, term: str) -> int:
+        """Feature of a term; stable across processes, unlike hash()."""
+        return zlib.crc32(term.encode()) % self.features
+
+    def _term_counts(self, title: Optional[str], abstract: Optional[str]) -> Counter:
+        """Weighted counts of a paper's hashed terms."""
+        counts = Counter()
+        for term in tokenize(title or ''):
+            counts[self._hash(term)] += TITLE_WEIGHT
+        for term in tokenize(abstract or ''):
+            counts[self._hash(term)] += 1
+        return counts
+
+    def _append_counts(self, counts: Counter, indices: array, data: array) -> None:
+        """Append a paper's log-scaled term frequencies to CSR arrays being built."""
+        indices.extend(counts.keys())
+        data.extend(1 + math.log(count) for count in counts.values())
+
+    def _weighted(self, indptr, indices, data, idf) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """Weight log-scaled term frequencies in CSR form by IDF and normalize the rows."""
+        data = data * idf[indices]
+        rows = _row_ids(indptr)
+        norms = np.sqrt(np.bincount(rows, weights=data ** 2, minlength=len(indptr) - 1)).astype(np.float32)
+        data /= norms[rows]
+        return indptr, indices, data
+
+    def _tfidf(self, documents: Sequence[Counter], idf) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """Build the normalized TF-IDF matrix of term counts, in CSR form."""
+        indptr = array('q', [0])
+        indices = array('i')
+        data = array('f')
+        for counts in documents:
+            self._append_counts(counts, indices, data)
+            indptr.append(len(indices))
+        return self._weighted(np.frombuffer(indptr, dtype=np.int64), np.frombuffer(indices, dtype=np.int32),
+                              np.frombuffer(data, dtype=np.float32), idf)
+
+    def _project(self, documents: Sequence[Counter]) -> "np.ndarray":
+        """Reduce term counts to normalized vectors with the built components."""
+        indptr, indices, data = self._tfidf(documents, self._idf)
+        return _normalized(_csr_dot(indptr, indices, data, np.asarray(self._components).T))
+
+    def build(self, power_iterations: int = 2, seed: int = 0) -> Dict[str, int]:
+        """
+        Fit the index to every saved paper, replacing any earlier build.
+
+        Needs an application context for database access.
+
+        Args:
+            power_iterations: Power iterations of the randomized SVD; more are slower but more accurate
+            seed: Seed of the random projection, for reproducible builds
+
+        Returns:
+            Dictionary with the number of papers and dimensions
+        """
+        started = time.time()
+        # Term counts go straight into flat CSR arrays as rows stream in, rather than a Counter per paper
+        ids = array('q')
+        indptr = array('q', [0])
+        indices = array('i')
+        data = array('f')
+        rows = db.session.execute(select(Paper.id, Paper.title, Paper.abstract).order_by(Paper.id)). \
+            yield_per(5000)
+        for paper_id, title, abstract in rows:
+            ids.append(paper_id)
+            self._append_counts(self._term_counts(title, abstract), indices, data)
+            indptr.append(len(indices))
+
+        if not ids:
+            return {'papers': 0, 'dims': 0}
+
+        indptr = np.frombuffer(indptr, dtype=np.int64)
+        indices = np.frombuffer(indices, dtype=np.int32)
+        # Each paper's terms are distinct, so counting nonzeros per term gives document frequencies
+        df = np.bincount(indices, minlength=self.features)
+        idf = (np.log((1 + len(ids)) / (1 + df)) + 1).astype(np.float32)
+        matrix = self._weighted(indptr, indices, np.frombuffer(data, dtype=np.float32), idf)
+        transposed = _csr_transpose(*matrix, self.features)
+        del data
+
+        # Randomized truncated SVD (Halko et al.): the range of the matrix from a random projection,
+        # sharpened by power iterations, then an exact SVD of the small projected matrix
+        dims = min(self.dims, len(ids), self.features)
+        width = min(dims + 10, len(ids))
+        rng = np.random.default_rng(seed)
+        sketch = _csr_dot(*matrix, rng.standard_normal((self.features, width), dtype=np.float32))
+        basis, _ = np.linalg.qr(sketch)
+        for _ in range(power_iterations):
+            basis, _ = np.linalg.qr(_csr_dot(*transposed, basis))
+            basis, _ = np.linalg.qr(_csr_dot(*matrix, basis))
+        small = _csr_dot(*transposed, basis).T
+        left, singular, components = np.linalg.svd(small, full_matrices=False)
+        vectors = _normalized((basis @ (left[:, :dims] * singular[:dims])).astype(np.float32))
+
+        # Write the new build beside the current one, then swap it in
+        building = f"{self.path}.building"
+        shutil.rmtree(building, ignore_errors=True)
+        os.makedirs(building)
+        np.save(self._file('components.npy', building), components[:dims].astype(np.float32))
+        np.save(self._file('idf.npy', building), idf)
+        # Leave room for papers added before the next build, so add doesn't copy the files right away
+        self._write_rows(building, vectors, np.frombuffer(ids, dtype=np.int64),
+                         capacity=int(len(ids) * 1.25) + 1024)
+        with open(self._file('meta.json', building), 'w') as f:
+            json.dump({'build': f"{started:.6f}", 'count': len(ids), 'dims': dims, 'features': self.features}, f)
+
+        with self._writing():
+            retired = f"{self.path}.retired"
+            shutil.rmtree(retired, ignore_errors=True)
+            if os.path.exists(self.path):
+                os.rename(self.path, retired)
+            os.rename(building, self.path)
+            shutil.rmtree(retired, ignore_errors=True)
+
+        return {'papers': len(ids), 'dims': dims}
+
+    def _write_rows(self, path: str, vectors, ids, capacity: int) -> None:
+        """Write vector and ID files with room for capacity rows."""
+        stored = np.lib.format.open_memmap(self._file('vectors.npy.tmp', path), mode='w+', dtype=np.float32,
+                                           shape=(capacity, vectors.shape[1]))
+        stored[:len(vectors)] = vectors
+        stored.flush()
+        stored_ids = np.lib.format.open_memmap(self._file('ids.npy.tmp', path), mode='w+', dtype=np.int64,
+                                               shape=(capacity,))
+        stored_ids[:len(ids)] = ids
+        stored_ids.flush()
+        del stored, stored_ids
+        os.replace(self._file('vectors.npy.tmp', path), self._file('vectors.npy', path))
+        os.replace(self._file('ids.npy.tmp', path), self._file('ids.npy', path))
+
+    def add(self, papers: Iterable[Tuple[int, Optional[str], Optional[str]]]) -> int:
+        """
+        Add or update papers without rebuilding, folding them into the built components.
+
+        Args:
+            papers: (Paper ID, title, abstract) of each paper
+
+        Returns:
+            Number of papers written
+        """
+        papers = list(papers)
+        if not papers or not self.available():
+            return 0
+
+        with self._lock, self._writing():
+            self._reload()
+            vectors = self._project([self._term_counts(title, abstract) for _, title, abstract in papers])
+            count = self._meta['count']
+
+            new = [paper_id for paper_id, _, _ in papers if paper_id not in self._row_of]
+            new = list(dict.fromkeys(new))
+            if count + len(new) > len(self._ids):
+                # Out of room: copy the rows into files with double the capacity
+                capacity = max(2 * len(self._ids), count + len(new))
+                self._write_rows(self.path, np.asarray(self._vectors[:count]), np.asarray(self._ids[:count]),
+                                 capacity)
+
+            stored = np.load(self._file('vectors.npy'), mmap_mode='r+')
+            stored_ids = np.load(self._file('ids.npy'), mmap_mode='r+')
+            rows = {}
+            for paper_id in new:
+                rows[paper_id] = count
+                stored_ids[count] = paper_id
+                count += 1
+            for (paper_id, _, _), vector in zip(papers, vectors):
+                stored[self._row_of.get(paper_id, rows.get(paper_id))] = vector
+            stored.flush()
+            stored_ids.flush()
+            del stored, stored_ids
+
+            # Readers only look at the first count rows, so publishing the count makes the rows visible
+            meta = dict(self._meta, count=count)
+            with open(self._file('meta.json.tmp'), 'w') as f:
+                json.dump(meta, f)
+            os.replace(self._file('meta.json.tmp'), self._file('meta.json'))
+            self._reload()
+
+        return len(papers)
+
+    def _top(self, queries, k: int, exclude: Sequence[Set[int]]) -> List[List[Tuple[int, float]]]:
+        """Find the k rows closest to each query vector, skipping excluded Paper IDs."""
+        count = self._meta['count']
+        # Room for excluded rows, which are dropped after ranking
+        keep = min(k + max((len(ids) for ids in exclude), default=0), count)
+        if keep <= 0:
+            return [[] for _ in range(len(queries))]
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, count, QUERY_CHUNK):
+            block = self._vectors[start:min(start + QUERY_CHUNK, count)]
+            scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, start + len(block)),
+                                                              (len(queries), len(block)))], axis=1)
+            if scores.shape[1] > keep:
+                top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+                scores = np.take_along_axis(scores, top, axis=1)
+                rows = np.take_along_axis(rows, top, axis=1)
+            best_scores, best_rows = scores, rows
+
+        results = []
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        for i, excluded in enumerate(exclude):
+            hits = []
+            for j in order[i]:
+                paper_id = int(self._ids[best_rows[i, j]])
+                score = round(float(best_scores[i, j]), 4)
+                # Papers sharing no terms with the query aren't similar, however the ranking falls
+                if paper_id not in excluded and score > 0:
+                    hits.append((paper_id, score))
+                    if len(hits) == k:
+                        break
+            results.append(hits)
+        return results
+
+    def _vectors_for(self, paper_ids: Sequence[int]) -> "np.ndarray":
+        """Vectors of papers, projecting any the index doesn't hold yet from their saved text."""
+        missing = [paper_id for paper_id in paper_ids if paper_id not in self._row_of]
+        projected = {}
+        if missing:
+            rows = db.session.execute(
+                select(Paper.id, Paper.title, Paper.abstract).where(Paper.id.in_(missing))
+            ).all()
+            vectors = self._project([self._term_counts(title, abstract) for _, title, abstract in rows])
+            projected = {row[0]: vector for row, vector in zip(rows, vectors)}
+
+        zero = np.zeros(self._meta['dims'], dtype=np.float32)
+        return np.array([
+            self._vectors[self._row_of[paper_id]] if paper_id in self._row_of else projected.get(paper_id, zero)
+            for paper_id in paper_ids
+        ], dtype=np.float32).reshape(len(paper_ids), self._meta['dims'])
+
+    def similar(self, paper_ids: Sequence[int], k: int = 10) -> Dict[int, List[Tuple[int, float]]]:
+        """
+        Get the papers most similar to each of several saved papers, in one batch.
+
+        Args:
+            paper_ids: IDs of the papers
+            k: Number of similar papers per paper
+
+        Returns:
+            For each paper ID, (paper ID, cosine similarity) pairs, most similar first
+        """
+        paper_ids = list(paper_ids)
+        if not paper_ids or not self.available():
+            return {paper_id: [] for paper_id in paper_ids}
+
+        with self._lock:
+            self._reload()
+            queries = self._vectors_for(paper_ids)
+            hits = self._top(queries, k, [{paper_id} for paper_id in paper_ids])
+        return dict(zip(paper_ids, hits))
+
+    def similar_to_texts(self, texts: Sequence[Tuple[Optional[str], Optional[str]]], k: int = 10,
+                         exclude: Optional[Sequence[Set[int]]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Get the saved papers most similar to texts, e.g. of papers found by a search and not saved.
+
+        Args:
+            texts: (title, abstract) of each query
+            k: Number of similar papers per query
+            exclude: Paper IDs to leave out of each query's results
+
+        Returns:
+            For each query, (paper ID, cosine similarity) pairs, most similar first
+        """
+        if not texts or not self.available():
+            return [[] for _ in texts]
+
+        with self._lock:
+            self._reload()
+            queries = self._project([self._term_counts(title, abstract) for title, abstract in texts])
+            return self._top(queries, k, exclude or [set() for _ in texts])
+
+    def similar_to_group(self, paper_ids: Sequence[int], k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Get the papers most similar to a group of papers as a whole, such as a collection.
+
+        Args:
+            paper_ids: IDs of the papers in the group
+            k: Number of similar papers
+
+        Returns:
+            (paper ID, cosine similarity to the group's centroid) pairs, most similar first,
+            excluding the group's own papers
+        """
+        paper_ids = list(paper_ids)
+        if not paper_ids or not self.available():
+            return []
+
+        with self._lock:
+            self._reload()
+            centroid = _normalized(self._vectors_for(paper_ids).sum(axis=0, keepdims=True))
+            return self._top(centroid, k, [set(paper_ids)])[0]
+
+
+if __name__ == '__main__':
+    # Rebuild offline, e.g. nightly from cron
+    from app import create_app
+
+    with create_app().app_context():
+        print(SimilarityIndex.shared().build())
@@ -0,0 +1,181 @@
+# modules/literature_search/singleflight.py
+
+"""Coalescing of identical concurrent upstream requests."""
+
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalesce within the process only
+    fcntl = None
+
+
+class _Call:
+    """An in-flight call whose result is shared with every caller of the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time, sharing its result with concurrent callers.
+
+    Within a process, callers arriving while a call for their key is in
+    flight wait for it and get its result (or its exception). Across worker
+    processes, the leader of each key also holds an exclusive lock on a lock
+    file, so leaders in other workers wait for it; their call function should
+    then find the result in a shared cache instead of fetching it again.
+
+    Each key in flight has its own lock file, named by the key's hash, so
+    unrelated keys never wait for each other. The leader removes the file
+    when it finishes, so the lock directory only holds keys in flight.
+    """
+
+    # Process-wide instances, keyed by lock directory
+    _registry: Dict[str, "SingleFlight"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, lock_dir: str = "./cache/inflight", wait_timeout: float = 30.0):
+        """
+        Initialize the coalescer.
+
+        Args:
+            lock_dir: Directory holding the lock files shared by worker processes
+            wait_timeout: Longest time to wait for another worker's call before making it anyway
+        """
+        self.lock_dir = lock_dir
+        self.wait_timeout = wait_timeout
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'coalesced': 0, 'lock_waits': 0}
+
+        os.makedirs(lock_dir, exist_ok=True)
+
+    @classmethod
+    def shared(cls, lock_dir: str = "./cache/inflight", wait_timeout: float = 30.0) -> "SingleFlight":
+        """
+        Get the process-wide coalescer for a lock directory, creating it on first use.
+
+        Args:
+            lock_dir: Directory holding the lock files shared by worker processes
+            wait_timeout: Longest time to wait for another worker's call before making it anyway
+
+        Returns:
+            The shared SingleFlight instance
+        """
+        with cls._registry_lock:
+            if lock_dir not in cls._registry:
+                cls._registry[lock_dir] = cls(lock_dir, wait_timeout)
+            return cls._registry[lock_dir]
+
+    @contextmanager
+    def _file_lock(self, key: str) -> Iterator[None]:
+        """Hold the cross-process lock for a key, giving up after wait_timeout."""
+        if fcntl is None:
+            yield
+            return
+
+        path = os.path.join(self.lock_dir, f"{hashlib.sha1(key.encode()).hexdigest()}.lock")
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+        fd = None
+        try:
+            while True:
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    os.close(fd)
+                    fd = None
+                    if time.monotonic() >= deadline:
+                        # A stuck worker must not block everyone; go ahead without the lock
+                        break
+                    waited = True
+                    time.sleep(0.05)
+                    continue
+
+                try:
+                    current = os.stat(path)
+                except FileNotFoundError:
+                    current = None
+                if current is not None and os.path.samestat(current, os.fstat(fd)):
+                    break
+                # The previous leader removed this file after we opened it; lock the new one instead
+                os.close(fd)
+                fd = None
+
+            if waited:
+                with self._lock:
+                    self._stats['lock_waits'] += 1
+            yield
+        finally:
+            if fd is not None:
+                # Remove the file while still holding the lock, so waiters on it retry on a new one
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+                # Closing the descriptor also releases the file lock
+                os.close(fd)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Call fn, unless a call for the same key is already in flight.
+
+        Args:
+            key: Identifies equivalent calls, e.g. a normalized cache key
+            fn: The call to make; in other workers it runs after this one finishes
+
+        Returns:
+            The result of fn, possibly from a call made for another caller
+
+        Raises:
+            Whatever fn raised, for every caller sharing the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['leaders'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._file_lock(key):
+                call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get counters for this coalescer.
+
+        Returns:
+            Dictionary with leaders, coalesced, lock_waits and in_flight
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
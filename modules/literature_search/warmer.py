@@ -0,0 +1,246 @@
+# modules/literature_search/warmer.py
+
+"""Background refreshing of the cached results of popular searches."""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import func
+
+try:
+    import fcntl
+except ImportError:  # Windows: every worker warms
+    fcntl = None
+
+from models import db, SearchQuery, SearchResultSet
+from modules.literature_search.api_clients import BaseSearchClient, SearchClientFactory
+from modules.literature_search.config import LiteratureSearchConfig
+from modules.literature_search.filters import SearchFilter
+from modules.literature_search.rate_limiter import TokenBucket
+from modules.literature_search.result_store import SearchResultStore
+
+
+class CacheWarmer:
+    """
+    Refresh the cached results of the most popular searches before they expire.
+
+    Popularity is the number of search history entries pointing at a stored
+    result set within a sliding window, so equivalent queries count together.
+    Each run re-fetches the upstream cache entries of the top searches per
+    source that are about to expire, then refreshes their stored results, so
+    the first users after a quiet period don't pay for a cold fetch.
+
+    Runs are capped by a budget of upstream searches and paced by a token
+    bucket shared by all workers. PubMed requests also still draw from the
+    NCBI rate limiter, like any other request.
+    """
+
+    def __init__(self, window: float = 7 * 86400, top_n: int = 20, budget: int = 40,
+                 rate: float = 0.2, lead_time: float = 900, lock_path: str = "./cache/warmer.lock"):
+        """
+        Initialize the warmer.
+
+        Args:
+            window: Seconds of search history popularity is measured over
+            top_n: Most popular searches warmed per source
+            budget: Maximum number of upstream searches per run
+            rate: Upstream searches per second the warmer may make, across all workers
+            lead_time: Refresh cached results expiring within this many seconds
+            lock_path: Lock file ensuring only one worker warms at a time
+        """
+        self.window = window
+        self.top_n = top_n
+        self.budget = budget
+        self.lead_time = lead_time
+        self.lock_path = lock_path
+        self.search_factory = SearchClientFactory()
+        self.result_store = SearchResultStore()
+        self.pacer = TokenBucket.shared('warmer', rate, state_dir=LiteratureSearchConfig.RATE_LIMIT_DIR)
+        self._started_pid: Optional[int] = None
+
+        os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+
+    @classmethod
+    def from_config(cls) -> "CacheWarmer":
+        """Create a warmer with the settings in LiteratureSearchConfig."""
+        return cls(
+            window=LiteratureSearchConfig.WARMER_WINDOW,
+            top_n=LiteratureSearchConfig.WARMER_TOP_N,
+            budget=LiteratureSearchConfig.WARMER_BUDGET,
+            rate=LiteratureSearchConfig.WARMER_RATE,
+            lead_time=LiteratureSearchConfig.WARMER_LEAD_TIME,
+            lock_path=LiteratureSearchConfig.WARMER_LOCK
+        )
+
+    def popular_searches(self) -> List[SearchResultSet]:
+        """
+        Get the most popular searches within the window.
+
+        Returns:
+            Up to top_n result sets per source, most searched first
+        """
+        since = datetime.utcnow() - timedelta(seconds=self.window)
+        hits = func.count(SearchQuery.id).label('hits')
+        rows = db.session.query(SearchResultSet.id, SearchResultSet.source_db, hits). \
+            join(SearchQuery, SearchQuery.result_set_id == SearchResultSet.id). \
+            filter(SearchQuery.created_at >= since). \
+            group_by(SearchResultSet.id, SearchResultSet.source_db). \
+            order_by(hits.desc(), SearchResultSet.id). \
+            all()
+
+        per_source: Dict[str, int] = {}
+        top_ids = []
+        for result_set_id, source, _ in rows:
+            if per_source.get(source, 0) < self.top_n:
+                per_source[source] = per_source.get(source, 0) + 1
+                top_ids.append(result_set_id)
+        if not top_ids:
+            return []
+
+        result_sets = {
+            result_set.id: result_set
+            for result_set in db.session.query(SearchResultSet).filter(SearchResultSet.id.in_(top_ids))
+        }
+        return [result_sets[result_set_id] for result_set_id in top_ids if result_set_id in result_sets]
+
+    def warm(self) -> Dict[str, int]:
+        """
+        Run one warming pass over the popular searches.
+
+        Needs an application context for database access.
+
+        Returns:
+            Dictionary with the number of searches checked, upstream searches
+            made and stored result sets refreshed
+        """
+        stats = {'checked': 0, 'fetched': 0, 'stored': 0}
+        for result_set in self.popular_searches():
+            remaining = self.budget - stats['fetched']
+            if remaining <= 0:
+                break
+            stats['checked'] += 1
+
+            try:
+                filters = SearchFilter(**(result_set.filters or {}))
+                client = self.search_factory.get_client(result_set.source_db or 'all')
+                requested = result_set.requested or LiteratureSearchConfig.DEFAULT_MAX_RESULTS
+                # Sets stored before the text was kept only have the canonical form
+                query = result_set.query_text or result_set.query
+
+                # Each upstream search waits for its token, whichever worker makes it
+                fetched = client.warm_search(query, requested, filters, self.lead_time, remaining, self.pacer.acquire)
+                stats['fetched'] += fetched
+
+                # The rebuild reads the entries just warmed; out of budget, or without a cache,
+                # some would still be cold and the rebuild would fetch them outside the budget
+                if fetched < remaining and client.cache is not None and \
+                        self._refresh_stored(client, result_set, query, filters, requested):
+                    stats['stored'] += 1
+            except Exception as e:
+                print(f"Error warming search '{result_set.query}': {e}")
+                db.session.rollback()
+
+        return stats
+
+    def _refresh_stored(self, client: BaseSearchClient, result_set: SearchResultSet, query: str,
+                        filters: SearchFilter, requested: int) -> bool:
+        """Rebuild a stored result set about to expire from the freshly warmed cache."""
+        if result_set.fetched_at is not None:
+            expires = result_set.fetched_at + timedelta(seconds=LiteratureSearchConfig.RESULT_STORE_TTL)
+            if expires - datetime.utcnow() > timedelta(seconds=self.lead_time):
+                return False
+
+        source = result_set.source_db
+        fetched = client.search(query, requested, filters)
+        papers = [paper for paper in fetched if filters.matches(paper)]
+
+        # As with user searches, only complete results are stored
+        statuses = getattr(client, 'source_status', None) or {
+            client.name: {'status': 'ok', 'exhausted': len(fetched) < requested}
+        }
+        if any(status.get('status') != 'ok' for status in statuses.values()):
+            return False
+        exhausted = self.result_store.exhausted(statuses, papers, requested)
+        return self.result_store.save(query, source, filters, requested, papers, exhausted) is not None
+
+    @contextmanager
+    def _leader(self) -> Iterator[Optional[int]]:
+        """Try to become the one worker that warms, yielding the locked file descriptor or None."""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            leader = True
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    leader = False
+            yield fd if leader else None
+        finally:
+            # Closing the descriptor also releases the file lock
+            os.close(fd)
+
+    def run_once(self, min_gap: float = 0) -> Optional[Dict[str, int]]:
+        """
+        Warm unless another worker is warming or has warmed recently.
+
+        The lock file holds the time of the last run, so workers started at
+        different times don't each spend the budget.
+
+        Args:
+            min_gap: Seconds that must have passed since the last run by any worker
+
+        Returns:
+            The stats of the run, or None if it was skipped
+        """
+        with self._leader() as fd:
+            if fd is None:
+                return None
+
+            last = os.pread(fd, 32, 0).decode(errors='ignore').strip()
+            if last and time.time() - float(last) < min_gap:
+                return None
+
+            stats = self.warm()
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, f"{time.time():.3f}".encode(), 0)
+            return stats
+
+    def start(self, app: Any, interval: float = 600) -> None:
+        """
+        Warm every interval seconds in a background thread of this process.
+
+        Every worker may start the thread; each run is made by whichever
+        worker takes the lock first, and skipped if another worker ran recently.
+
+        Args:
+            app: The Flask application, for the database context
+            interval: Seconds between runs
+        """
+        if self._started_pid == os.getpid():
+            return
+        self._started_pid = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    with app.app_context():
+                        # Runs from other workers count, so the whole pool warms about once per interval
+                        self.run_once(min_gap=interval / 2)
+                except Exception as e:
+                    print(f"Error warming search cache: {e}")
+
+        thread = threading.Thread(target=loop, name="search-cache-warmer", daemon=True)
+        thread.start()
+
+
+if __name__ == '__main__':
+    # One warming run, e.g. from cron ahead of the morning peak
+    from app import create_app
+
+    with create_app().app_context():
+        print(CacheWarmer.from_config().run_once())
@@ -0,0 +1,100 @@
+# modules/literature_search/xml_stream.py
+
+"""Incremental XML parsing for large API responses."""
+
+import xml.etree.ElementTree as ET
+from typing import IO, AsyncIterator, Iterator
+
+import requests
+
+
+def iter_elements(source: IO[bytes], tag: str) -> Iterator[ET.Element]:
+    """
+    Incrementally parse XML, yielding each complete element with the given tag.
+
+    Each element is detached from the tree once the caller has processed it,
+    so memory use stays flat no matter how many records the document holds.
+    Elements must not be used after the iterator has moved on.
+
+    Args:
+        source: Binary file-like object to read the XML from
+        tag: Tag of the record elements, in Clark notation for namespaced XML
+            (e.g. '{http://www.w3.org/2005/Atom}entry')
+
+    Yields:
+        Each matching element, fully parsed
+    """
+    context = ET.iterparse(source, events=('start', 'end'))
+    root = None
+    for event, elem in context:
+        if root is None:
+            # The first event is the start of the document element
+            root = elem
+        elif event == 'end' and elem.tag == tag:
+            yield elem
+            # Drop the processed record and anything parsed before it
+            root.clear()
+
+
+def iter_response_elements(response: requests.Response, tag: str) -> Iterator[ET.Element]:
+    """
+    Parse a streamed HTTP response incrementally.
+
+    The response should have been requested with stream=True. HTTP errors are
+    raised on the first iteration, and the response is closed once parsing
+    finishes or the iterator is discarded.
+
+    Args:
+        response: Streamed response with an XML body
+        tag: Tag of the record elements, in Clark notation for namespaced XML
+
+    Yields:
+        Each matching element, fully parsed
+    """
+    try:
+        response.raise_for_status()
+
+        # Let urllib3 undo any gzip/deflate transfer encoding while we read
+        response.raw.decode_content = True
+        yield from iter_elements(response.raw, tag)
+    finally:
+        response.close()
+
+
+async def aiter_elements(chunks: AsyncIterator[bytes], tag: str) -> AsyncIterator[ET.Element]:
+    """
+    Incrementally parse XML arriving in chunks, e.g. an async HTTP response body.
+
+    The asynchronous counterpart of iter_elements, with the same memory
+    behaviour: each element is detached from the tree once the caller has
+    processed it, and must not be used after the iterator has moved on.
+
+    Args:
+        chunks: Async iterator over the raw bytes of the document
+        tag: Tag of the record elements, in Clark notation for namespaced XML
+
+    Yields:
+        Each matching element, fully parsed
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+
+    def matches() -> Iterator[ET.Element]:
+        nonlocal root
+        for event, elem in parser.read_events():
+            if root is None:
+                # The first event is the start of the document element
+                root = elem
+            elif event == 'end' and elem.tag == tag:
+                yield elem
+                # Drop the processed record and anything parsed before it
+                root.clear()
+
+    async for chunk in chunks:
+        parser.feed(chunk)
+        for elem in matches():
+            yield elem
+
+    parser.close()
+    for elem in matches():
+        yield elem
@@ -0,0 +1,75 @@
+# tests/test_citation_crawler.py
+
+"""Crawler checkpointing against a local reference source."""
+
+import pytest
+from flask import Flask
+
+from models import db, Citation, CitationCrawl, Paper
+from modules.literature_search.citation_crawler import CitationCrawler, ReferenceSource
+from modules.literature_search.config import LiteratureSearchConfig
+
+
+class StubReferenceSource(ReferenceSource):
+    """Reference lists served from memory, failing for the DOIs in `failing`."""
+
+    name = 'stub'
+
+    def __init__(self):
+        super().__init__('http://stub.invalid', rate=1000)
+        self.calls = []
+        self.failing = set()
+
+    def _fetch_references(self, doi):
+        self.calls.append(doi)
+        if doi in self.failing:
+            raise IOError("upstream unavailable")
+        return [{'title': f"Cited by {doi}", 'doi': f"{doi}.ref", 'source_db': self.name, 'paper_id': f"{doi}.ref"},
+                {'title': 'Library paper 1', 'doi': '10.1/p.1', 'source_db': self.name, 'paper_id': '10.1/p.1'}]
+
+
+@pytest.fixture
+def crawler(tmp_path, monkeypatch):
+    monkeypatch.setattr(LiteratureSearchConfig, 'RATE_LIMIT_DIR', str(tmp_path))
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        for i in range(1, 6):
+            db.session.add(Paper(title=f"Library paper {i}", doi=f"10.1/p.{i}", source_db='arxiv', paper_id=str(i)))
+        db.session.commit()
+        yield CitationCrawler(StubReferenceSource(), concurrency=2, batch_size=2, max_attempts=2,
+                              lock_path=str(tmp_path / 'crawl.lock'))
+
+
+def test_resumes_from_checkpoint(crawler):
+    assert crawler.run(max_papers=3)['papers'] == 3
+    assert crawler.source.calls == ['10.1/p.1', '10.1/p.2', '10.1/p.3']
+
+    assert crawler.run()['papers'] == 2
+    assert crawler.source.calls[3:] == ['10.1/p.4', '10.1/p.5']
+    assert crawler.run()['papers'] == 0
+
+
+def test_reinserted_edges_are_ignored(crawler):
+    crawler.run()
+    edges = db.session.query(Citation).count()
+    assert edges == 5 + 4  # each paper cites its own reference and paper 1, except paper 1 itself
+
+    db.session.query(CitationCrawl).delete()
+    db.session.commit()
+    stats = crawler.run()
+    assert stats['papers'] == 5 and stats['citations'] == 0
+    assert db.session.query(Citation).count() == edges
+
+
+def test_retries_up_to_max_attempts(crawler):
+    crawler.source.failing = {'10.1/p.2'}
+    assert crawler.run()['errors'] == 1
+    assert crawler.run() == {'papers': 1, 'errors': 1, 'citations': 0}
+    assert crawler.run()['papers'] == 0
+    assert crawler.source.calls.count('10.1/p.2') == 2
+
+    crawl = db.session.query(CitationCrawl).filter_by(paper_id=2).one()
+    assert (crawl.status, crawl.attempts) == ('error', 2)